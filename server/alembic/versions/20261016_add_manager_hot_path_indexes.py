@@ -0,0 +1,53 @@
+"""Add secondary indexes for manager contour hot query paths
+
+Revision ID: 20261016_add_manager_hot_path_indexes
+Revises: 20251024_add_contract_signature_fields
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261016_add_manager_hot_path_indexes"
+down_revision = "20251024_add_contract_signature_fields"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # list_clients: tab filter by status, keyset order (created_at DESC, id DESC)
+    op.create_index(
+        "ix_manager_clients_status_created_at",
+        "manager_clients",
+        ["status", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    # list_clients: "mine" tab
+    op.create_index(
+        "ix_manager_clients_assigned_manager_created_at",
+        "manager_clients",
+        ["assigned_manager_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    # ensure_manager_client: lookup by user
+    op.create_index("ix_manager_clients_user_id", "manager_clients", ["user_id"])
+    # get_client / devices_count subquery
+    op.create_index("ix_user_devices_client_id", "user_devices", ["client_id"])
+    op.create_index("ix_user_device_photos_device_id", "user_device_photos", ["device_id"])
+    op.create_index("ix_manager_support_threads_client_id", "manager_support_threads", ["client_id"])
+    # ensure_invoice_for_client + invoices relationship (prefix on client_id)
+    op.create_index(
+        "ix_user_invoices_client_contract_status",
+        "user_invoices",
+        ["client_id", "contract_number", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_invoices_client_contract_status", table_name="user_invoices")
+    op.drop_index("ix_manager_support_threads_client_id", table_name="manager_support_threads")
+    op.drop_index("ix_user_device_photos_device_id", table_name="user_device_photos")
+    op.drop_index("ix_user_devices_client_id", table_name="user_devices")
+    op.drop_index("ix_manager_clients_user_id", table_name="manager_clients")
+    op.drop_index("ix_manager_clients_assigned_manager_created_at", table_name="manager_clients")
+    op.drop_index("ix_manager_clients_status_created_at", table_name="manager_clients")
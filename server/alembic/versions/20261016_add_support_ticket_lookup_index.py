@@ -0,0 +1,29 @@
+"""Add composite index for SupportBridgeService.ensure_ticket lookups
+
+Revision ID: 20261016_add_support_ticket_lookup_index
+Revises: 20261016_add_outbox_messages
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261016_add_support_ticket_lookup_index"
+down_revision = "20261016_add_outbox_messages"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ensure_ticket: latest ticket of the user with the given subject
+    op.create_index(
+        "ix_support_tickets_user_subject_created",
+        "support_tickets",
+        ["user_id", "subject", sa.text("created_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_support_tickets_user_subject_created", table_name="support_tickets")
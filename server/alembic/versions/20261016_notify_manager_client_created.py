@@ -0,0 +1,47 @@
+"""Notify the manager client-list stream about every new manager_clients row
+
+Revision ID: 20261016_notify_manager_client_created
+Revises: 20261016_add_support_ticket_lookup_index
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "20261016_notify_manager_client_created"
+down_revision = "20261016_add_support_ticket_lookup_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Клиентов создают не только через crud (scripts/backfill_manager_clients.py и т.п.),
+    # поэтому client.created шлёт триггер; формат — как у client_events.notify_client_change
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_manager_client_created() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('manager_clients', json_build_object(
+                'type', 'client.created',
+                'client_id', NEW.id,
+                'status', NEW.status,
+                'assigned_manager_id', NEW.assigned_manager_id
+            )::text);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER manager_clients_notify_created
+        AFTER INSERT ON manager_clients
+        FOR EACH ROW EXECUTE FUNCTION notify_manager_client_created()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS manager_clients_notify_created ON manager_clients")
+    op.execute("DROP FUNCTION IF EXISTS notify_manager_client_created()")
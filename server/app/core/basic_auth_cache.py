@@ -0,0 +1,81 @@
+"""Short-lived cache of verified Basic credentials for core.deps.get_current_user."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import uuid
+
+from app.core.cache import TTLCache, column_attributes, detached_copy, invalidate_on_set
+from app.core.config import settings
+from app.models.users import User
+
+# session.info key: users changed in the current transaction
+_PENDING_KEY = "basic_auth_cache_invalidate"
+
+
+class BasicAuthCache:
+    """Bounded LRU of successful Basic verifications, each entry lives `ttl` seconds.
+
+    Keys are HMAC-SHA256 digests of the Authorization header under a random
+    per-process key, so the cache never holds anything password-equivalent.
+    Values are detached column-only copies of User (see core.cache.detached_copy);
+    callers attach them with `merge(load=False)`, so a hit costs neither the KDF
+    nor a query. Any change of the user row through the ORM (password, name,
+    email, status…) drops the user's entries right away and once more after
+    commit; only successful checks are cached.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int) -> None:
+        self._key = secrets.token_bytes(32)
+        self._entries: TTLCache[bytes, User] = TTLCache(ttl=ttl, maxsize=maxsize, on_evict=self._unindex)
+        self._by_user: dict[uuid.UUID, set[bytes]] = {}
+        self._index_lock = threading.Lock()
+
+    def _digest(self, header: str) -> bytes:
+        return hmac.new(self._key, header.encode("utf-8"), hashlib.sha256).digest()
+
+    def get(self, header: str) -> User | None:
+        if not self._entries.enabled:
+            return None
+        return self._entries.get(self._digest(header))
+
+    def put(self, header: str, user: User) -> None:
+        if not self._entries.enabled:
+            return
+        digest = self._digest(header)
+        self._entries.put(digest, detached_copy(user))
+        with self._index_lock:
+            self._by_user.setdefault(user.id, set()).add(digest)
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        with self._index_lock:
+            digests = self._by_user.pop(user_id, set())
+        for digest in digests:
+            self._entries.pop(digest)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._entries.stats()
+
+    def _unindex(self, digest: bytes, user: User) -> None:
+        with self._index_lock:
+            digests = self._by_user.get(user.id)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self._by_user[user.id]
+
+
+basic_auth_cache = BasicAuthCache(ttl=settings.BASIC_AUTH_CACHE_TTL, maxsize=settings.BASIC_AUTH_CACHE_SIZE)
+
+# через модульную переменную: тесты подменяют basic_auth_cache
+invalidate_on_set(
+    column_attributes(User),
+    lambda user_id: basic_auth_cache.invalidate_user(user_id),
+    pending_key=_PENDING_KEY,
+)
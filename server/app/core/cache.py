@@ -0,0 +1,132 @@
+"""Building blocks of the in-process auth caches: TTL-LRU, detached ORM snapshots, ORM-driven invalidation."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Iterable, TypeVar
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import InstrumentedAttribute, Session, make_transient_to_detached, object_session
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+M = TypeVar("M")
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe bounded LRU whose entries live `ttl` seconds.
+
+    `ttl=0` or `maxsize=0` turns the cache off. `on_evict(key, value)` is
+    called (under the cache lock) for every entry that leaves the cache:
+    expired, pushed out by the size bound, replaced or popped.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int, on_evict: Callable[[K, V], None] | None = None) -> None:
+        self._ttl = max(0.0, ttl)
+        self._maxsize = max(0, maxsize)
+        self._on_evict = on_evict
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0 and self._maxsize > 0
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, cached_at = entry
+                if time.monotonic() - cached_at < self._ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._evict(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: K, value: V) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._evict(key)
+            self._entries[key] = (value, time.monotonic())
+            while len(self._entries) > self._maxsize:
+                self._evict(next(iter(self._entries)))
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._evict(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _evict(self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._on_evict is not None:
+            self._on_evict(key, entry[0])
+
+
+def detached_copy(instance: M) -> M:
+    """Column-only copy of an ORM instance in the detached state.
+
+    The request's own instance may be expired by a later rollback; the copy is
+    attached to another session with `merge(load=False)`, which emits no SQL.
+    """
+    mapper = inspect(type(instance))
+    loaded = inspect(instance).dict
+    columns = {attr.key: loaded[attr.key] for attr in mapper.column_attrs if attr.key in loaded}
+    copy = mapper.class_(**columns)
+    make_transient_to_detached(copy)
+    return copy
+
+
+def column_attributes(model: type) -> list[InstrumentedAttribute]:
+    return [getattr(model, attr.key) for attr in inspect(model).column_attrs]
+
+
+def invalidate_on_set(
+    attributes: Iterable[InstrumentedAttribute],
+    invalidate: Callable[[Any], None],
+    *,
+    pending_key: str,
+) -> None:
+    """Call `invalidate(target.id)` when one of `attributes` changes through the ORM or the row is deleted.
+
+    The id is dropped right away and once more after the session commits:
+    a concurrent request may cache the old row before the change is committed.
+    Changes made outside the ORM (bulk UPDATE, other processes) are only picked
+    up when the cache TTL runs out.
+    """
+    attributes = list(attributes)
+
+    def _on_set(target, value, oldvalue, initiator) -> None:
+        if inspect(target).key is None or value == oldvalue:
+            return  # ещё не сохранён — в кэше его нет
+        invalidate(target.id)
+        # параллельный запрос мог закэшировать старое значение до коммита — сбросим ещё раз после него
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(pending_key, set()).add(target.id)
+
+    def _on_delete(mapper, connection, target) -> None:
+        invalidate(target.id)
+
+    def _on_commit(session: Session) -> None:
+        for target_id in session.info.pop(pending_key, ()):
+            invalidate(target_id)
+
+    for attribute in attributes:
+        event.listen(attribute, "set", _on_set)
+    event.listen(attributes[0].class_, "after_delete", _on_delete)
+    event.listen(Session, "after_commit", _on_commit)
@@ -9,10 +9,35 @@ class Settings(BaseSettings):
     S3_ACCESS_KEY: str = "minioadmin"
     S3_SECRET_KEY: str = "minioadmin"
     S3_BUCKET: str = "privet-bucket"
+    S3_REGION: str = "us-east-1"
+    # boto3 connection pool / timeouts and the thread pool used by async storage calls
+    S3_MAX_POOL_CONNECTIONS: int = 20
+    S3_CONNECT_TIMEOUT: float = 5.0
+    S3_READ_TIMEOUT: float = 30.0
+    S3_TCP_KEEPALIVE: bool = True
+    S3_IO_WORKERS: int = 8
+    S3_CALL_TIMEOUT: float = 60.0
+    # Presigned GET URL cache: max entries and the share of the URL lifetime
+    # after which a cached URL is re-signed (0.5 => reuse for 3.5 of 7 days)
+    PRESIGNED_URL_CACHE_SIZE: int = 4096
+    PRESIGNED_URL_CACHE_REFRESH_FRACTION: float = 0.5
+    # /uploads/direct: size cap, multipart part size (S3 minimum is 5 MiB) and
+    # comma-separated content-type allowlist ("image/*" matches any image)
+    UPLOAD_MAX_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_ALLOWED_CONTENT_TYPES: str = "image/*,video/*,application/pdf"
     # Token lifetimes (can be overridden via .env)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     MANAGER_ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
+    # Authenticated managers cached in-process: lifetime in seconds (0 = disabled) and max entries
+    MANAGER_AUTH_CACHE_TTL: float = 30.0
+    MANAGER_AUTH_CACHE_SIZE: int = 1024
+    # Password hashing/verification worker processes (0 = a thread of the default pool)
+    PASSWORD_HASH_WORKERS: int = 2
+    # Verified Basic-auth credentials cache: lifetime in seconds (0 = disabled) and max entries
+    BASIC_AUTH_CACHE_TTL: float = 60.0
+    BASIC_AUTH_CACHE_SIZE: int = 1024
 
     # SMTP settings (optional). If not provided, email sending is disabled.
     SMTP_HOST: str | None = None
@@ -23,6 +48,23 @@ class Settings(BaseSettings):
     SMTP_SSL: bool = False
     SMTP_FROM: str | None = None
     SMTP_FROM_NAME: str | None = "PrivetSuper"
+    # Pooled SMTP sessions: open sessions, messages per batch on one session, idle seconds before reconnect
+    SMTP_POOL_SIZE: int = 2
+    SMTP_BATCH_SIZE: int = 20
+    SMTP_IDLE_TIMEOUT: float = 60.0
+    SMTP_TIMEOUT: float = 30.0
+    # Outbox dispatcher: rows per round, deliveries in flight, claim lease seconds (a row whose worker died
+    # is retried after it), idle poll seconds, attempts before "failed", retry backoff seconds
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_CLAIM_TIMEOUT: float = 300.0
+    OUTBOX_POLL_INTERVAL: float = 5.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE: float = 2.0
+    OUTBOX_BACKOFF_MAX: float = 600.0
+    # SSE stream of client-list changes: heartbeat seconds, buffered events per connection
+    CLIENT_EVENTS_HEARTBEAT: float = 15.0
+    CLIENT_EVENTS_QUEUE_SIZE: int = 100
     # Public base URL for links in emails (optional)
     APP_BASE_URL: str | None = None
 
@@ -30,6 +72,14 @@ class Settings(BaseSettings):
     APP_VERSION: str | None = None
     APP_CHANNEL: str | None = None  # web | pwa | apk | ipa
     CONTRACT_SIGNATURE_SECRET: str = "change_me_signature"
+    # Contract PDF rendering: worker processes (0 = render in-process) and max queued renders (beyond it -> 503)
+    CONTRACT_PDF_WORKERS: int = 2
+    CONTRACT_PDF_MAX_PENDING: int = 16
+    # DOCX contracts via LibreOffice: converter slots (0 = disabled) and per-conversion timeout, seconds.
+    # Off by default: every conversion starts a soffice process, ReportLab renders in-process
+    CONTRACT_DOCX_CONVERTERS: int = 0
+    CONTRACT_DOCX_TIMEOUT: float = 30.0
+    LIBREOFFICE_BINARY: str = "soffice"
 
     model_config = SettingsConfigDict(
         env_file=".env",
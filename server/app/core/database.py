@@ -1,5 +1,6 @@
 import os
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
@@ -34,3 +35,35 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+_UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """One transaction for several crud steps.
+
+    Inside the block save_changes() only flushes; the block commits once on
+    exit and rolls back if it raises. Nested blocks join the outer one.
+    """
+    if session.info.get(_UNIT_OF_WORK_KEY):
+        yield session
+        return
+    session.info[_UNIT_OF_WORK_KEY] = True
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        session.info.pop(_UNIT_OF_WORK_KEY, None)
+
+
+async def save_changes(session: AsyncSession) -> None:
+    """Commit, or only flush when called inside unit_of_work()."""
+    if session.info.get(_UNIT_OF_WORK_KEY):
+        await session.flush()
+    else:
+        await session.commit()
@@ -10,14 +10,23 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.basic_auth_cache import basic_auth_cache
 from app.core.database import get_db
-from app.core.security import decode_jwt_token
+from app.core.security import decode_jwt_token, verify_password_async
 from app.models.users import User
-from app.services.users import UserService
 
 # Allow both Bearer and Basic in Swagger Authorize (we defined both in main.py)
 bearer_scheme = HTTPBearer(auto_error=False)
 
+
+async def authenticate_user(db: AsyncSession, phone: str, password: str) -> User | None:
+    """Look the user up by phone and check the password on the password-hash pool."""
+    user = await db.scalar(select(User).where(User.phone == phone))
+    if user is None or not await verify_password_async(password, user.password_hash):
+        return None
+    return user
+
+
 async def get_current_user(
     request: Request,
     creds: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)] = None,
@@ -71,6 +80,12 @@ async def get_current_user(
     # Fallback: Basic (username=phone, password)
     auth_header = request.headers.get("authorization") or ""
     if auth_header.lower().startswith("basic "):
+        cached = basic_auth_cache.get(auth_header)
+        if cached is not None:
+            # заголовок уже проверялся: без KDF и без запроса пользователя
+            user = await db.merge(cached, load=False)
+            log.info("ME ok_basic_cached id=%s ip=%s user_id=%s", req_id, ip, user.id)
+            return user
         b64 = auth_header.split(" ", 1)[1].strip()
         try:
             raw = base64.b64decode(b64).decode("utf-8")
@@ -89,8 +104,7 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Basic"},
             )
         phone, password = raw.split(":", 1)
-        service = UserService(db)
-        user = await service.authenticate(phone, password)
+        user = await authenticate_user(db, phone, password)
         if not user:
             log.warning("ME basic_bad_credentials id=%s ip=%s", req_id, ip)
             raise HTTPException(
@@ -98,6 +112,7 @@ async def get_current_user(
                 detail="Invalid credentials",
                 headers={"WWW-Authenticate": "Basic"},
             )
+        basic_auth_cache.put(auth_header, user)
         log.info("ME ok_basic id=%s ip=%s user_id=%s", req_id, ip, user.id)
         return user
 
@@ -0,0 +1,38 @@
+"""HTTP header helpers shared by the API and the static frontend."""
+from __future__ import annotations
+
+
+def parse_accept_encoding(header: str | None) -> dict[str, float]:
+    """Accept-Encoding -> {coding: q}; codings with q=0 are dropped."""
+    accepted: dict[str, float] = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted[coding] = q
+    return accepted
+
+
+def etag_matches(if_none_match: str | None, etags: set[str]) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.message import EmailMessage
 from email.utils import formataddr
-from typing import Iterable
+from typing import Callable, Iterable, Optional
 
 from app.core.config import settings
 import logging
@@ -38,54 +41,65 @@ def _build_message(
     return msg
 
 
-def _send_sync(msg: EmailMessage) -> None:
+def _open_connection() -> smtplib.SMTP:
+    """Open an authenticated SMTP session using settings (primary mode, then the alternative port)."""
     host = settings.SMTP_HOST
     port = settings.SMTP_PORT or (465 if settings.SMTP_SSL else 587)
     user = settings.SMTP_USER
     password = settings.SMTP_PASSWORD
     use_tls = bool(settings.SMTP_TLS)
     use_ssl = bool(getattr(settings, 'SMTP_SSL', False))
+    timeout = settings.SMTP_TIMEOUT
 
-    if not host or not port:
-        logger.warning("SMTP disabled: host/port not configured")
-        return
-
-    def send_tls(p: int):
-        with smtplib.SMTP(host, p, timeout=30) as s:
+    def open_tls(p: int) -> smtplib.SMTP:
+        s = smtplib.SMTP(host, p, timeout=timeout)
+        try:
             s.ehlo()
             s.starttls()
             s.ehlo()
             if user and password:
                 s.login(user, password)
-            s.send_message(msg)
+        except Exception:
+            s.close()
+            raise
+        return s
 
-    def send_ssl(p: int):
-        with smtplib.SMTP_SSL(host, p, timeout=30) as s:
+    def open_ssl(p: int) -> smtplib.SMTP:
+        s = smtplib.SMTP_SSL(host, p, timeout=timeout)
+        try:
             if user and password:
                 s.login(user, password)
-            s.send_message(msg)
+        except Exception:
+            s.close()
+            raise
+        return s
+
+    def open_plain(p: int) -> smtplib.SMTP:
+        s = smtplib.SMTP(host, p, timeout=timeout)
+        try:
+            s.ehlo()
+            if user and password:
+                s.login(user, password)
+        except Exception:
+            s.close()
+            raise
+        return s
 
     tried = []
     # Primary attempt
     try:
         if use_ssl or port == 465:
-            logger.info("SMTP try SSL %s:%s", host, port)
+            logger.info("SMTP connect SSL %s:%s", host, port)
             tried.append(f"ssl:{port}")
-            send_ssl(port)
-        elif use_tls:
-            logger.info("SMTP try TLS %s:%s", host, port)
+            return open_ssl(port)
+        if use_tls:
+            logger.info("SMTP connect TLS %s:%s", host, port)
             tried.append(f"tls:{port}")
-            send_tls(port)
-        else:
-            # plain (rare)
-            logger.info("SMTP try PLAIN %s:%s", host, port)
-            tried.append(f"plain:{port}")
-            with smtplib.SMTP(host, port, timeout=30) as s:
-                s.ehlo()
-                if user and password:
-                    s.login(user, password)
-                s.send_message(msg)
-        return
+            return open_tls(port)
+        # plain (rare)
+        logger.info("SMTP connect PLAIN %s:%s", host, port)
+        tried.append(f"plain:{port}")
+        return open_plain(port)
     except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, TimeoutError, OSError) as e:
         logger.warning("SMTP primary attempt failed (%s). Tried=%s", e, tried)
         # Fallback: try alternative port/mode commonly used
@@ -93,16 +107,175 @@ def _send_sync(msg: EmailMessage) -> None:
             if 'ssl' in ''.join(tried):
                 alt_port = 587
                 logger.info("SMTP fallback to TLS %s:%s", host, alt_port)
-                send_tls(alt_port)
-            else:
-                alt_port = 465
-                logger.info("SMTP fallback to SSL %s:%s", host, alt_port)
-                send_ssl(alt_port)
+                return open_tls(alt_port)
+            alt_port = 465
+            logger.info("SMTP fallback to SSL %s:%s", host, alt_port)
+            return open_ssl(alt_port)
         except Exception as e2:
             logger.error("SMTP fallback failed: %s", e2)
             raise
 
 
+def _lost_connection(exc: BaseException) -> bool:
+    """True if the session is unusable after `exc` (SMTPException is an OSError too, but a reply)."""
+    return isinstance(exc, smtplib.SMTPServerDisconnected) or (
+        isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+    )
+
+
+class SmtpMailer:
+    """Keeps up to `pool_size` authenticated SMTP sessions alive and reuses them.
+
+    `send()` queues a message; each of `pool_size` workers takes whatever is
+    queued (up to `batch_size`) and delivers it on one session in a worker
+    thread. An idle session is checked with NOOP before reuse and replaced
+    when it is older than `idle_timeout` or the server has dropped it.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_size: int,
+        batch_size: int,
+        idle_timeout: float,
+        connect: Callable[[], smtplib.SMTP] = _open_connection,
+    ) -> None:
+        self._pool_size = max(1, pool_size)
+        self._batch_size = max(1, batch_size)
+        self._idle_timeout = idle_timeout
+        self._connect = connect
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._idle_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue[tuple[EmailMessage, asyncio.Future]]] = None
+        self._workers: list[asyncio.Task] = []
+        self.connections_opened = 0
+
+    async def send(self, msg: EmailMessage) -> None:
+        """Deliver one message; raises the SMTP error if it could not be sent."""
+        if self._queue is None:
+            self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((msg, future))
+        await future
+
+    def _start(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self._pool_size, thread_name_prefix="smtp")
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._pool_size)]
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self._executor, self._deliver, [msg for msg, _ in batch])
+            except Exception as exc:  # не смогли даже подключиться
+                results = [exc] * len(batch)
+            for (_, future), error in zip(batch, results):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    def _deliver(self, messages: list[EmailMessage]) -> list[Optional[Exception]]:
+        conn: Optional[smtplib.SMTP] = self._checkout()
+        results: list[Optional[Exception]] = []
+        try:
+            for msg in messages:
+                try:
+                    if conn is None:
+                        conn = self._open()
+                    try:
+                        conn.send_message(msg)
+                    except OSError as exc:
+                        if not _lost_connection(exc):
+                            raise
+                        # сервер закрыл сессию (простой, лимит писем) — одна попытка на новой
+                        self._discard(conn)
+                        conn = None
+                        conn = self._open()
+                        conn.send_message(msg)
+                    results.append(None)
+                except OSError as exc:
+                    results.append(exc)
+                    if conn is None:
+                        continue
+                    if _lost_connection(exc):
+                        self._discard(conn)
+                        conn = None
+                        continue
+                    # отказ по конкретному письму (получатель и т.п.) — сессия жива, сбрасываем транзакцию
+                    try:
+                        conn.rset()
+                    except OSError:
+                        self._discard(conn)
+                        conn = None
+        finally:
+            if conn is not None:
+                self._checkin(conn)
+        return results
+
+    def _open(self) -> smtplib.SMTP:
+        conn = self._connect()
+        self.connections_opened += 1
+        return conn
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._idle_lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self._idle_timeout:
+                try:
+                    if conn.noop()[0] == 250:
+                        return conn
+                except Exception:
+                    pass
+            self._discard(conn)
+        return self._open()
+
+    def _checkin(self, conn: smtplib.SMTP) -> None:
+        with self._idle_lock:
+            if len(self._idle) < self._pool_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        self._discard(conn)
+
+    @staticmethod
+    def _discard(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    async def close(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+mailer = SmtpMailer(
+    pool_size=settings.SMTP_POOL_SIZE,
+    batch_size=settings.SMTP_BATCH_SIZE,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+)
+
+
 async def send_email(
     subject: str,
     body_text: str,
@@ -110,18 +283,20 @@ async def send_email(
     html_body: str | None = None,
     headers: dict[str, str] | None = None,
 ) -> bool:
-    """Send email using standard library in a thread executor.
+    """Send email through the pooled SMTP sessions of `mailer`.
 
     Returns True on success, False on failure. No-op (False) if SMTP is not configured.
     """
+    if not settings.SMTP_HOST:
+        logger.warning("SMTP disabled: host/port not configured")
+        return False
     msg = _build_message(subject, body_text, to, html_body, headers)
     logger.info(
         "Sending email via SMTP host=%s port=%s to=%s (TLS=%s SSL=%s)",
         settings.SMTP_HOST, settings.SMTP_PORT, list(to), settings.SMTP_TLS, getattr(settings, 'SMTP_SSL', False)
     )
     try:
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, _send_sync, msg)
+        await mailer.send(msg)
         logger.info("Email sent to %s", list(to))
         return True
     except Exception as e:
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.context import CryptContext
 
 # Support both legacy argon2 hashes and new bcrypt hashes
@@ -84,4 +89,49 @@ def create_refresh_token(subject: Union[str, Dict[str, Any]], expires_days: int
 
 def decode_jwt_token(token: str) -> Dict[str, Any]:
     """Decode and validate a JWT (access or refresh). Raises jwt exceptions on failure."""
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
\ No newline at end of file
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+# --- Async hashing ---
+# bcrypt/argon2 занимают 100–300 мс CPU на вызов, а бэкенд bcrypt (os_crypt) держит GIL,
+# поэтому проверки идут в отдельном ограниченном пуле процессов, а не в event loop.
+PASSWORD_HASH_WORKERS = (
+    getattr(settings, "PASSWORD_HASH_WORKERS", 2) if _SETTINGS_AVAILABLE else 2
+)
+
+_hash_executor: ProcessPoolExecutor | None = None
+_hash_executor_lock = threading.Lock()
+
+
+def _hash_executor_or_init() -> ProcessPoolExecutor | None:
+    """The password-hash pool; None when PASSWORD_HASH_WORKERS=0 (a thread is used instead)."""
+    global _hash_executor
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _hash_executor
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password-hash pool; the event loop stays free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor_or_init(), verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password-hash pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor_or_init(), hash_password, password)
+
+
+def shutdown_password_executor() -> None:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
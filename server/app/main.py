@@ -14,13 +14,49 @@ logging.getLogger("app.auth").propagate = True
 logging.getLogger("mailer").propagate = True
 
 logging.info("BOOT: logging configured (root=INFO)")
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from app.manager_api import router as manager_router
-
-app = FastAPI(title="PrivetSuperApp", docs_url="/docs", redoc_url="/redoc")
+from app.core.mailer import mailer
+from app.core.security import shutdown_password_executor
+from app.services.contracts import contract_pdf_renderer, contract_templates
+from app.services.docx_converter import docx_converter
+from app.services.frontend import AssetServer, SpaShell, serve_file
+from app.services.outbox import outbox_dispatcher
+from app.services.client_events import client_events
+from app.services.storage import async_storage_service, s3_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Шаблон договора компилируем при старте, дальше он перечитывается только при смене mtime
+    contract_templates.get()
+    # index.html SPA держим в памяти (перечитывается при новой сборке)
+    spa_shell.get()
+    s3_clients.open()
+    # Если пул DOCX включён: soffice ищем в PATH один раз и прогреваем профили в фоне, чтобы не задерживать старт
+    docx_warmup = asyncio.create_task(docx_converter.start())
+    # Сообщения в поддержку и письма из outbox доставляются в фоне
+    outbox_dispatcher.start()
+    yield
+    docx_warmup.cancel()
+    await outbox_dispatcher.stop()
+    await client_events.stop()
+    # Останавливаем пулы хранилища, рендера договоров и хэширования паролей, закрываем S3- и SMTP-сессии
+    async_storage_service.shutdown()
+    contract_pdf_renderer.shutdown()
+    docx_converter.shutdown()
+    shutdown_password_executor()
+    await mailer.close()
+    s3_clients.close()
+
+
+app = FastAPI(title="PrivetSuperApp", docs_url="/docs", redoc_url="/redoc", lifespan=lifespan)
 
 # (CORS и прочее как есть)
 
@@ -40,33 +76,25 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DIST_DIR = BASE_DIR / "frontend-manager" / "dist"
 ASSETS_DIR = DIST_DIR / "assets"
 
-# ассеты Vite по корню
-app.mount("/assets", StaticFiles(directory=str(ASSETS_DIR)), name="assets")
+# ассеты Vite по корню: индекс в памяти, immutable-кэш для хэшированных имён, готовые .br/.gz
+app.mount("/assets", AssetServer(ASSETS_DIR), name="assets")
+
+# SPA: index.html на / (из памяти, с ETag и сжатыми вариантами)
+SPA_SHELL_CACHE_CONTROL = "no-cache"  # хранить можно, но каждый раз ревалидировать по ETag
+spa_shell = SpaShell(DIST_DIR / "index.html")
+
+
+def _serve_spa_shell(request: Request) -> Response:
+    shell = spa_shell.get()
+    if shell is None:
+        return Response("Frontend build not found. Run npm run build in frontend.", status_code=503)
+    return serve_file(shell, request, media_type="text/html", cache_control=SPA_SHELL_CACHE_CONTROL)
+
 
-# SPA: index.html на /
 @app.get("/", include_in_schema=False)
-async def spa_root():
-    index_file = DIST_DIR / "index.html"
-    if index_file.exists():
-        # Disable caching for the HTML shell to avoid serving stale index.html
-        return Response(
-            content=index_file.read_text(encoding="utf-8"),
-            media_type="text/html; charset=utf-8",
-            headers={"Cache-Control": "no-store, max-age=0"},
-        )
-    return Response("Frontend build not found. Run npm run build in frontend.", status_code=503)
+async def spa_root(request: Request):
+    return _serve_spa_shell(request)
 
-# SPA fallback: любые пути — тоже index.html (для React Router)
-@app.get("/{path:path}", include_in_schema=False)
-async def spa_catch_all(path: str):
-    index_file = DIST_DIR / "index.html"
-    if index_file.exists():
-        return Response(
-            content=index_file.read_text(encoding="utf-8"),
-            media_type="text/html; charset=utf-8",
-            headers={"Cache-Control": "no-store, max-age=0"},
-        )
-    return Response("Frontend build not found. Run npm run build in frontend.", status_code=503)
 
 @app.get("/sw.js", include_in_schema=False)
 async def sw():
@@ -119,3 +147,10 @@ async def favicon():
     if f.exists():
         return FileResponse(f)
     return Response(status_code=404)
+
+
+# SPA fallback: любые пути — тоже index.html (для React Router).
+# Объявлен последним, иначе перекрывает /sw.js, манифест и иконки выше.
+@app.get("/{path:path}", include_in_schema=False)
+async def spa_catch_all(path: str, request: Request):
+    return _serve_spa_shell(request)
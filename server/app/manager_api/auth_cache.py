@@ -0,0 +1,52 @@
+"""In-process cache of authenticated managers for deps.get_current_manager."""
+
+from __future__ import annotations
+
+import uuid
+
+from app.core.cache import TTLCache, column_attributes, detached_copy, invalidate_on_set
+from app.core.config import settings
+from app.manager_api.models import ManagerUser
+
+# session.info key: managers changed in the current transaction
+_PENDING_KEY = "manager_cache_invalidate"
+
+
+class ManagerCache:
+    """Bounded LRU of active managers keyed by id, each entry lives `ttl` seconds.
+
+    Entries are detached column-only copies of ManagerUser (see
+    core.cache.detached_copy); callers attach them to their session with
+    `merge(load=False)`, which emits no SQL, so any column change through the
+    ORM (not only `is_active`) drops the entry right away and once more after
+    commit; changes made outside this process are picked up when the TTL runs out.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int) -> None:
+        self._entries: TTLCache[uuid.UUID, ManagerUser] = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def get(self, manager_id: uuid.UUID) -> ManagerUser | None:
+        return self._entries.get(manager_id)
+
+    def put(self, manager: ManagerUser) -> None:
+        if self._entries.enabled and manager.is_active:
+            self._entries.put(manager.id, detached_copy(manager))
+
+    def invalidate(self, manager_id: uuid.UUID) -> None:
+        self._entries.pop(manager_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._entries.stats()
+
+
+manager_cache = ManagerCache(ttl=settings.MANAGER_AUTH_CACHE_TTL, maxsize=settings.MANAGER_AUTH_CACHE_SIZE)
+
+# через модульную переменную: тесты подменяют manager_cache
+invalidate_on_set(
+    column_attributes(ManagerUser),
+    lambda manager_id: manager_cache.invalidate(manager_id),
+    pending_key=_PENDING_KEY,
+)
@@ -2,21 +2,26 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import uuid
 from uuid import UUID
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status  # если импорта нет — добавь
 from typing import Any, Optional
-from app.core.database import get_db
+from app.core.database import get_db, save_changes
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import RowMapping, event, func, or_, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.users import User
 from app.models.devices import Device, DevicePhoto
 from app.services.storage import storage_service
+from app.services import client_events
 from app.manager_api.models import (
     ManagerClient,
     ManagerClientStatus,
@@ -34,6 +39,8 @@ from app.manager_api.models import (
     UserPassport,
 )
 from app.manager_api.schemas import (
+    CLIENTS_PAGE_DEFAULT_LIMIT,
+    CLIENTS_PAGE_MAX_LIMIT,
     ClientProfileUpdate,
     DeviceCreate,
     DeviceUpdate,
@@ -67,48 +74,137 @@ async def create_manager(
 ) -> ManagerUser:
     manager = ManagerUser(email=email.lower(), password_hash=password_hash, name=name)
     db.add(manager)
-    await db.commit()
-    await db.refresh(manager)
+    await save_changes(db)
     return manager
 
 
 # --- Clients ----------------------------------------------------------------------
 
 
-async def list_clients(
-    db: AsyncSession,
-    *,
-    manager_id: uuid.UUID | None,
-    tab: str,
-) -> list[ManagerClient]:
-    stmt = (
-        select(ManagerClient)
-        .options(
-            selectinload(ManagerClient.user),
-            selectinload(ManagerClient.passport),
-            selectinload(ManagerClient.devices),
-        )
-        .order_by(ManagerClient.created_at.desc())
-    )
+_IN_WORK_STATUSES = (
+    ManagerClientStatus.IN_VERIFICATION,
+    ManagerClientStatus.AWAITING_CONTRACT,
+    ManagerClientStatus.AWAITING_PAYMENT,
+)
 
+
+def encode_clients_cursor(created_at: datetime, client_id: uuid.UUID) -> str:
+    """Pack the keyset position (created_at, id) into an opaque url-safe token."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(client_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_clients_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverse of encode_clients_cursor. Raises ValueError on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except (binascii.Error, UnicodeError, TypeError, KeyError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _apply_clients_filters(stmt, *, manager_id: uuid.UUID | None, tab: str, search: str | None):
     if tab == "new":
         stmt = stmt.where(ManagerClient.status == ManagerClientStatus.NEW)
     elif tab == "in_work":
-        stmt = stmt.where(ManagerClient.status.in_((
-            ManagerClientStatus.IN_VERIFICATION,
-            ManagerClientStatus.AWAITING_CONTRACT,
-            ManagerClientStatus.AWAITING_PAYMENT,
-        )))
+        stmt = stmt.where(ManagerClient.status.in_(_IN_WORK_STATUSES))
     elif tab == "processed":
         stmt = stmt.where(ManagerClient.status == ManagerClientStatus.PROCESSED)
     elif tab == "mine" and manager_id:
         stmt = stmt.where(ManagerClient.assigned_manager_id == manager_id)
 
-    result = await db.execute(stmt)
-    return list(result.scalars().unique())
+    term = (search or "").strip()
+    if term:
+        # ФИО и адрес регистрации из паспорта — как искал прежний фильтр в SPA
+        passport_match = (
+            select(UserPassport.id)
+            .where(UserPassport.client_id == ManagerClient.id)
+            .where(
+                or_(
+                    func.concat_ws(
+                        " ", UserPassport.last_name, UserPassport.first_name, UserPassport.middle_name
+                    ).icontains(term, autoescape=True),
+                    UserPassport.registration_address.icontains(term, autoescape=True),
+                )
+            )
+            .correlate(ManagerClient)
+            .exists()
+        )
+        stmt = stmt.where(
+            or_(
+                User.name.icontains(term, autoescape=True),
+                User.phone.icontains(term, autoescape=True),
+                User.email.icontains(term, autoescape=True),
+                User.address.icontains(term, autoescape=True),
+                passport_match,
+            )
+        )
+    return stmt
 
 
-async def get_client(db: AsyncSession, client_id: uuid.UUID) -> ManagerClient | None:
+async def list_clients(
+    db: AsyncSession,
+    *,
+    manager_id: uuid.UUID | None,
+    tab: str,
+    search: str | None = None,
+    cursor: str | None = None,
+    limit: int = CLIENTS_PAGE_DEFAULT_LIMIT,
+) -> tuple[list[RowMapping], str | None]:
+    """Return one page of client summary rows ordered by (created_at, id) DESC and the next cursor.
+
+    Rows are plain projections (client + user columns and a devices COUNT subquery),
+    no ORM entities for devices/passports are built.
+    """
+    if not 1 <= limit <= CLIENTS_PAGE_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {CLIENTS_PAGE_MAX_LIMIT}")
+    devices_count = (
+        select(func.count(ManagerDevice.id))
+        .where(ManagerDevice.client_id == ManagerClient.id)
+        .correlate(ManagerClient)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            ManagerClient.id,
+            ManagerClient.user_id,
+            ManagerClient.status,
+            ManagerClient.assigned_manager_id,
+            ManagerClient.support_ticket_id,
+            ManagerClient.created_at,
+            ManagerClient.updated_at,
+            User.name.label("name"),
+            User.phone.label("phone"),
+            User.email.label("email"),
+            User.address.label("registration_address"),
+            devices_count.label("devices_count"),
+        )
+        .join(User, User.id == ManagerClient.user_id)
+        .order_by(ManagerClient.created_at.desc(), ManagerClient.id.desc())
+        .limit(limit + 1)
+    )
+    stmt = _apply_clients_filters(stmt, manager_id=manager_id, tab=tab, search=search)
+
+    if cursor:
+        after_created_at, after_id = decode_clients_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(ManagerClient.created_at, ManagerClient.id) < tuple_(after_created_at, after_id)
+        )
+
+    result = await db.execute(stmt)
+    rows = list(result.mappings())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_clients_cursor(last["created_at"], last["id"])
+    return rows, next_cursor
+
+
+async def get_client(
+    db: AsyncSession, client_id: uuid.UUID, *, populate_existing: bool = False
+) -> ManagerClient | None:
     stmt = (
         select(ManagerClient)
         .options(
@@ -122,10 +218,116 @@ async def get_client(db: AsyncSession, client_id: uuid.UUID) -> ManagerClient |
         )
         .where(ManagerClient.id == client_id)
     )
+    if populate_existing:
+        stmt = stmt.execution_options(populate_existing=True)
     result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
 
+def _latest(model, *where):
+    return select(func.max(model.updated_at)).where(*where).scalar_subquery()
+
+
+def _count(model, *where):
+    return select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+async def get_client_version(db: AsyncSession, client_id: uuid.UUID) -> tuple | None:
+    """Change watermark of the ClientDetail aggregate in a single query (for the ETag).
+
+    Newest updated_at of the client and of every child table, plus row counts
+    of the collections: deleting a row does not move max(updated_at).
+    None when the client does not exist.
+    """
+    client = ManagerClient
+    client_photos = ManagerDevicePhoto.device_id.in_(
+        select(ManagerDevice.id).where(ManagerDevice.client_id == client.id).correlate(client)
+    )
+    stmt = select(
+        client.updated_at,
+        select(User.updated_at).where(User.id == client.user_id).scalar_subquery(),
+        _latest(UserPassport, UserPassport.client_id == client.id),
+        _latest(ManagerDevice, ManagerDevice.client_id == client.id),
+        _count(ManagerDevice, ManagerDevice.client_id == client.id),
+        _latest(ManagerDevicePhoto, client_photos),
+        _count(ManagerDevicePhoto, client_photos),
+        _latest(ManagerClientTariff, ManagerClientTariff.client_id == client.id),
+        select(ManagerTariff.updated_at)
+        .join(ManagerClientTariff, ManagerClientTariff.tariff_id == ManagerTariff.id)
+        .where(ManagerClientTariff.client_id == client.id)
+        .scalar_subquery(),
+        _latest(ManagerContract, ManagerContract.client_id == client.id),
+        # счета привязаны к user_id (см. ManagerClient.invoices)
+        _latest(ManagerInvoice, ManagerInvoice.client_id == client.user_id),
+        _count(ManagerInvoice, ManagerInvoice.client_id == client.user_id),
+    ).where(client.id == client_id)
+    row = (await db.execute(stmt)).one_or_none()
+    return tuple(row) if row is not None else None
+
+
+# Request-scoped aggregate cache: get_db opens one session per request
+_CLIENTS_CACHE_KEY = "manager_clients"
+# set once the session rolled back: objects of the aggregate may be expired or point at rolled-back rows
+_CLIENTS_RELOAD_KEY = "manager_clients_reload"
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_cached_clients(session: Session, previous_transaction) -> None:
+    # откат (в т.ч. savepoint) экспайрит тронутые объекты, а ленивой загрузки в AsyncSession нет
+    if session.info.pop(_CLIENTS_CACHE_KEY, None):
+        session.info[_CLIENTS_RELOAD_KEY] = True
+
+# relationship -> statement that reloads it (with nested collections) for refresh_client
+_CLIENT_RELATIONS = {
+    "user": lambda client: select(User).where(User.id == client.user_id),
+    "passport": lambda client: select(UserPassport).where(UserPassport.client_id == client.id),
+    "devices": lambda client: (
+        select(ManagerDevice)
+        .where(ManagerDevice.client_id == client.id)
+        .options(selectinload(ManagerDevice.photos))
+    ),
+    "tariff": lambda client: (
+        select(ManagerClientTariff)
+        .where(ManagerClientTariff.client_id == client.id)
+        .options(selectinload(ManagerClientTariff.tariff))
+    ),
+    "contract": lambda client: select(ManagerContract).where(ManagerContract.client_id == client.id),
+    "support_thread": lambda client: select(ManagerSupportThread).where(ManagerSupportThread.client_id == client.id),
+    "invoices": lambda client: select(ManagerInvoice).where(ManagerInvoice.client_id == client.user_id),
+}
+
+
+async def load_client(db: AsyncSession, client_id: uuid.UUID) -> ManagerClient | None:
+    """get_client cached in the session: the full aggregate is loaded once per request.
+
+    A rollback (savepoint included) empties the cache; the next load then
+    overwrites the in-session objects instead of reusing their stale state.
+    """
+    cache: dict[uuid.UUID, ManagerClient] = db.info.setdefault(_CLIENTS_CACHE_KEY, {})
+    client = cache.get(client_id)
+    if client is None:
+        client = await get_client(db, client_id, populate_existing=db.info.get(_CLIENTS_RELOAD_KEY, False))
+        if client is not None:
+            cache[client_id] = client
+    return client
+
+
+async def refresh_client(db: AsyncSession, client: ManagerClient, *relations: str) -> ManagerClient:
+    """Reload only the relationships a mutation touched (rows added/removed by crud helpers).
+
+    Objects changed in place are already current (expire_on_commit=False);
+    reloaded rows overwrite their in-session state, so call after commit/flush.
+    """
+    for relation in relations:
+        stmt = _CLIENT_RELATIONS[relation](client).execution_options(populate_existing=True)
+        rows = list((await db.execute(stmt)).scalars())
+        if ManagerClient.__mapper__.relationships[relation].uselist:
+            set_committed_value(client, relation, rows)
+        else:
+            set_committed_value(client, relation, rows[0] if rows else None)
+    return client
+
+
 async def update_client_profile(
     db: AsyncSession,
     *,
@@ -151,8 +353,7 @@ async def update_client_profile(
     if payload.address is not None:
         user.address = payload.address
 
-    await db.commit()
-    await db.refresh(user)
+    await save_changes(db)
     return user
 
 async def upsert_passport(
@@ -177,8 +378,8 @@ async def upsert_passport(
     passport.registration_address = payload.registration_address
     passport.photo_url = payload.photo_url
 
-    await db.commit()
-    await db.refresh(passport)
+    await save_changes(db)
+    set_committed_value(client, "passport", passport)
     return passport
 
 
@@ -194,8 +395,8 @@ async def update_passport_photo(
         db.add(passport)
 
     passport.photo_url = file_key
-    await db.commit()
-    await db.refresh(passport)
+    await save_changes(db)
+    set_committed_value(client, "passport", passport)
     return passport
 
 
@@ -225,8 +426,7 @@ async def create_device(
         serial_number=serial_number,
     )
     db.add(shared_device)
-    await db.commit()
-    await db.refresh(device)
+    await save_changes(db)
     return device
 
 
@@ -256,8 +456,7 @@ async def update_device(
         if payload.device_type is not None:
             shared_device.brand = payload.device_type
 
-    await db.commit()
-    await db.refresh(device)
+    await save_changes(db)
     return device
 
 
@@ -267,7 +466,7 @@ async def delete_device(db: AsyncSession, device: ManagerDevice) -> None:
     if shared_device:
         await db.delete(shared_device)
     await db.delete(device)
-    await db.commit()
+    await save_changes(db)
 
 
 async def add_device_photo(
@@ -285,8 +484,7 @@ async def add_device_photo(
     if shared_device:
         file_url = storage_service.generate_presigned_get_url(file_key)
         db.add(DevicePhoto(device_id=shared_device.id, file_url=file_url))
-    await db.commit()
-    await db.refresh(photo)
+    await save_changes(db)
     return photo
 
 
@@ -304,7 +502,7 @@ async def remove_device_photo(
         if shared_photo:
             await db.delete(shared_photo)
     await db.delete(photo)
-    await db.commit()
+    await save_changes(db)
 
 
 # --- Ensure invoice for client (no duplicates) ---
@@ -341,8 +539,7 @@ async def ensure_invoice_for_client(
         status=InvoiceStatus.PENDING,
     )
     db.add(invoice)
-    await db.commit()
-    await db.refresh(invoice)
+    await save_changes(db)
     return invoice
 
 
@@ -361,12 +558,14 @@ async def update_tariff(
         db.add(ct)
 
     ct.tariff_id = tariff.id if tariff else None
+    # связь синхронизируем сами: refresh после commit больше нет, а ленивой загрузки в AsyncSession быть не должно
+    set_committed_value(ct, "tariff", tariff)
     ct.device_count = device_count
     ct.total_extra_fee = Decimal(str(total_extra_fee))
     ct.calculated_at = datetime.utcnow()
 
-    await db.commit()
-    await db.refresh(ct)
+    await save_changes(db)
+    set_committed_value(client, "tariff", ct)
     return ct
 
 
@@ -398,9 +597,9 @@ async def ensure_manager_client(db: AsyncSession, user_id: uuid.UUID) -> Manager
         return client
 
     client = ManagerClient(user_id=user_id)
+    # client.created шлёт триггер manager_clients_notify_created — он ловит и вставки в обход crud
     db.add(client)
-    await db.commit()
-    await db.refresh(client)
+    await save_changes(db)
     return client
 
 
@@ -410,9 +609,10 @@ async def set_client_status(
     client: ManagerClient,
     status: ManagerClientStatus,
 ) -> ManagerClient:
-    client.status = status
-    await db.commit()
-    await db.refresh(client)
+    if client.status != status:
+        client.status = status
+        await client_events.notify_client_change(db, client_events.STATUS_CHANGED, client)
+    await save_changes(db)
     return client
 
 
@@ -456,8 +656,8 @@ async def upsert_contract(
     if "signed_user_agent" in data:
         contract.signed_user_agent = data["signed_user_agent"]
 
-    await db.commit()
-    await db.refresh(contract)
+    await save_changes(db)
+    set_committed_value(client, "contract", contract)
     return contract
 
 
@@ -467,9 +667,10 @@ async def assign_manager(
     client: ManagerClient,
     manager_id: uuid.UUID,
 ) -> ManagerClient:
-    client.assigned_manager_id = manager_id
-    await db.commit()
-    await db.refresh(client)
+    if client.assigned_manager_id != manager_id:
+        client.assigned_manager_id = manager_id
+        await client_events.notify_client_change(db, client_events.ASSIGNED, client)
+    await save_changes(db)
     return client
 
 
@@ -484,9 +685,8 @@ async def ensure_support_thread(
 
     thread = ManagerSupportThread(client_id=client.id, title=title)
     db.add(thread)
-    await db.commit()
-    await db.refresh(thread)
-    await db.refresh(client)
+    await save_changes(db)
+    set_committed_value(client, "support_thread", thread)
     return thread
 
 
@@ -500,8 +700,7 @@ async def add_support_message(
 ) -> ManagerSupportMessage:
     message = ManagerSupportMessage(thread_id=thread.id, sender=sender, content=content, payload=payload)
     db.add(message)
-    await db.commit()
-    await db.refresh(message)
+    await save_changes(db)
     return message
 
 
@@ -523,8 +722,7 @@ async def create_invoice(
         status=InvoiceStatus.PENDING,
     )
     db.add(invoice)
-    await db.commit()
-    await db.refresh(invoice)
+    await save_changes(db)
     return invoice
 
 async def ensure_invoice_for_client(
@@ -568,6 +766,5 @@ async def ensure_invoice_for_client(
         status=InvoiceStatus.PENDING,
     )
     db.add(inv)
-    await db.commit()
-    await db.refresh(inv)
+    await save_changes(db)
     return inv
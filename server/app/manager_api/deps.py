@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.manager_api import security
+from app.manager_api.auth_cache import manager_cache
 from app.manager_api.models import ManagerUser
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/manager/auth/login")
@@ -32,9 +33,15 @@ async def get_current_manager(
     if not manager_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
+    cached = manager_cache.get(manager_id)
+    if cached is not None:
+        # в кэше только активные; merge(load=False) привязывает копию к сессии без запроса
+        return await db.merge(cached, load=False)
+
     result = await db.execute(select(ManagerUser).where(ManagerUser.id == manager_id))
     manager = result.scalar_one_or_none()
     if not manager or not manager.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Manager not found or inactive")
 
+    manager_cache.put(manager)
     return manager
@@ -78,6 +78,21 @@ class ManagerClient(Base):
     )
 
 
+sa.Index(
+    "ix_manager_clients_status_created_at",
+    ManagerClient.status,
+    ManagerClient.created_at.desc(),
+    ManagerClient.id.desc(),
+)
+sa.Index(
+    "ix_manager_clients_assigned_manager_created_at",
+    ManagerClient.assigned_manager_id,
+    ManagerClient.created_at.desc(),
+    ManagerClient.id.desc(),
+)
+sa.Index("ix_manager_clients_user_id", ManagerClient.user_id)
+
+
 class UserPassport(Base):
     __tablename__ = "users_passports"
 
@@ -125,6 +140,7 @@ class ManagerClientTariff(Base):
 
 class ManagerDevice(Base):
     __tablename__ = "user_devices"
+    __table_args__ = (sa.Index("ix_user_devices_client_id", "client_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     client_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("manager_clients.id", ondelete="CASCADE"))
@@ -140,6 +156,7 @@ class ManagerDevice(Base):
 
 class ManagerDevicePhoto(Base):
     __tablename__ = "user_device_photos"
+    __table_args__ = (sa.Index("ix_user_device_photos_device_id", "device_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     device_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("user_devices.id", ondelete="CASCADE"))
@@ -179,6 +196,9 @@ class InvoiceStatus(str, PyEnum):
 
 class ManagerInvoice(Base):
     __tablename__ = "user_invoices"
+    __table_args__ = (
+        sa.Index("ix_user_invoices_client_contract_status", "client_id", "contract_number", "status"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     client_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("manager_clients.id", ondelete="CASCADE"))
@@ -211,6 +231,7 @@ class SupportSender(str, PyEnum):
 
 class ManagerSupportThread(Base):
     __tablename__ = "manager_support_threads"
+    __table_args__ = (sa.Index("ix_manager_support_threads_client_id", "client_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     client_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("manager_clients.id", ondelete="CASCADE"))
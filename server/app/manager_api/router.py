@@ -8,16 +8,20 @@ import uuid
 import secrets
 import hashlib
 import hmac
+import time
 from datetime import datetime, timezone
 from decimal import Decimal
 import json
+import mimetypes
+from urllib.parse import quote, unquote
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Response, Request
+from fastapi.responses import StreamingResponse
 import os
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, unit_of_work
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.manager_api import security
 from app.manager_api import crud
 from app.manager_api.crud import router as crud_router
@@ -35,6 +39,7 @@ from app.manager_api.schemas import (
     ClientDetail,
     ClientProfileUpdate,
     ClientSummary,
+    ClientsPage,
     ContractConfirmRequest,
     ContractGenerateResponse,
     ContractRead,
@@ -59,13 +64,23 @@ from app.manager_api.schemas import (
     TariffCalculateResponse,
     TariffRead,
     ClientsQuery,
+    ClientsTab,
+    CLIENTS_PAGE_DEFAULT_LIMIT,
+    CLIENTS_PAGE_MAX_LIMIT,
 )
-from app.services.storage import storage_service
-from app.services.contracts import build_contract_pdf
-from app.services.support_bridge import SupportBridgeService
+from app.services.storage import UploadTooLarge, async_storage_service, storage_service
+from app.services.contracts import (
+    CONTRACT_NUMBER_META,
+    ContractRendererBusy,
+    contract_pdf_key,
+    contract_template_version,
+    render_contract_pdf,
+)
+from app.services import outbox
+from app.core.http import etag_matches
+from app.services.client_events import client_events
 from app.core.config import settings
 
-import boto3
 
 router = APIRouter(prefix="/api/manager", tags=["manager"])
 router.include_router(crud_router)
@@ -113,21 +128,6 @@ async def create_generic_upload_url_get(
 
 # --- Fallback: direct upload via backend (no CORS required) ---
 
-def _make_s3_client():
-    endpoint = os.getenv("S3_ENDPOINT", "http://localhost:9000").rstrip("/")
-    access_key = os.getenv("S3_ACCESS_KEY", "minioadmin")
-    secret_key = os.getenv("S3_SECRET_KEY", "minioadmin")
-    # use path-style for MinIO
-    return boto3.client(
-        "s3",
-        endpoint_url=endpoint,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name="us-east-1",
-        config=boto3.session.Config(s3={"addressing_style": "path"}),
-    )
-
-
 def _public_url_for(key: str) -> str | None:
     public = os.getenv("S3_PUBLIC_ENDPOINT") or os.getenv("S3_ENDPOINT")
     if not public:
@@ -135,6 +135,57 @@ def _public_url_for(key: str) -> str | None:
     return f"{public.rstrip('/')}/{os.getenv('S3_BUCKET', 'privet-bucket')}/{key.lstrip('/')}"
 
 
+def _content_type_allowed(content_type: str) -> bool:
+    for pattern in settings.UPLOAD_ALLOWED_CONTENT_TYPES.split(","):
+        pattern = pattern.strip().lower()
+        if not pattern:
+            continue
+        if pattern.endswith("/*") and content_type.startswith(pattern[:-1]):
+            return True
+        if content_type == pattern:
+            return True
+    return False
+
+
+# браузеры (особенно мобильные, HEIC с iPhone) часто шлют пустой тип или application/octet-stream
+_GENERIC_CONTENT_TYPES = {"", "application/octet-stream", "binary/octet-stream"}
+_FTYP_BRANDS = {
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"mif1": "image/heif",
+    b"msf1": "image/heif",
+    b"avif": "image/avif",
+    b"qt  ": "video/quicktime",
+}
+
+
+def _sniff_content_type(head: bytes) -> str | None:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(head[8:12], "video/mp4")
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm"
+    return None
+
+
+async def _upload_content_type(file: UploadFile, filename: str) -> str:
+    declared = (file.content_type or "").split(";")[0].strip().lower()
+    if declared not in _GENERIC_CONTENT_TYPES:
+        return declared
+    head = await file.read(16)
+    await file.seek(0)
+    return _sniff_content_type(head) or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
 @router.post("/uploads/direct")
 async def direct_upload(
     file: UploadFile = File(...),
@@ -143,18 +194,30 @@ async def direct_upload(
     """Accepts a file via form-data and uploads it to MinIO under
     managers/<manager_id>/uploads/<uuid>-<filename>. Returns {file_key}.
     Useful when presigned POST is blocked by CORS in local dev.
+    The file is streamed to S3 in UPLOAD_PART_SIZE parts (multipart upload).
+    A missing or application/octet-stream type is replaced by one sniffed from
+    the first bytes (or guessed from the filename) before the allowlist check.
     """
-    bucket = os.getenv("S3_BUCKET", "privet-bucket")
     # construct key
     safe_name = os.path.basename(file.filename) if file.filename else "upload.bin"
     key = f"managers/{current_manager.id}/uploads/{uuid.uuid4()}-{safe_name}"
 
-    s3 = _make_s3_client()
-    body = await file.read()
-    content_type = file.content_type or "application/octet-stream"
+    content_type = await _upload_content_type(file, safe_name)
+    if not _content_type_allowed(content_type):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="UNSUPPORTED_CONTENT_TYPE")
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="FILE_TOO_LARGE")
 
     try:
-        s3.put_object(Bucket=bucket, Key=key, Body=body, ContentType=content_type)
+        await async_storage_service.upload_stream(
+            key=key,
+            read=file.read,
+            content_type=content_type,
+            part_size=settings.UPLOAD_PART_SIZE,
+            max_bytes=settings.UPLOAD_MAX_BYTES,
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="FILE_TOO_LARGE")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"S3 upload failed: {exc}")
 
@@ -169,7 +232,9 @@ def _full_name(client: ManagerClient) -> str | None:
     return None
 
 
-def _device_to_schema(device: ManagerDevice) -> DeviceRead:
+def _device_to_schema(device: ManagerDevice, urls: dict[str, str] | None = None) -> DeviceRead:
+    if urls is None:
+        urls = storage_service.presign_many(photo.file_key for photo in device.photos)
     return DeviceRead(
         id=device.id,
         device_type=device.device_type,
@@ -184,7 +249,7 @@ def _device_to_schema(device: ManagerDevice) -> DeviceRead:
                 id=photo.id,
                 file_key=photo.file_key,
                 created_at=photo.created_at,
-                file_url=storage_service.generate_presigned_get_url(photo.file_key),
+                file_url=urls[photo.file_key],
             )
             for photo in device.photos
         ],
@@ -199,35 +264,37 @@ async def create_manager_device(
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ):
     """Создание нового устройства клиента и мягкий пересчёт тарифа."""
-    client = await _get_client_or_404(db, client_id)
-    # как и в других операциях — фиксируем назначение менеджера
-    await _ensure_assignment(db, client=client, manager=current_manager)
-
-    # 1) создаём устройство
-    created = await crud.create_device(db, client=client, payload=payload)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        # как и в других операциях — фиксируем назначение менеджера
+        await _ensure_assignment(db, client=client, manager=current_manager)
 
-    # 2) аккуратно пересчитываем тариф (не ломаем создание устройства при ошибке)
-    try:
-        fresh = await crud.get_client(db, client_id)
-        if fresh:
-            device_count = len(fresh.devices or [])
-            # берём extra_per_device из выбранного тарифа, иначе дефолт 1000
-            extra_per_device = (
-                float(getattr(getattr(fresh.tariff, "tariff", None), "extra_per_device", 1000) or 1000)
-                if fresh.tariff else 1000.0
-            )
-            total_extra = device_count * extra_per_device
-            await crud.update_tariff(
-                db,
-                client=fresh,
-                tariff=(fresh.tariff.tariff if fresh.tariff else None),
-                device_count=device_count,
-                total_extra_fee=total_extra,
-            )
-    except Exception as e:
-        logger.warning("tariff recalc after device create failed: %s", e)
+        # 1) создаём устройство
+        created = await crud.create_device(db, client=client, payload=payload)
 
-    return _device_to_schema(created)
+        # 2) аккуратно пересчитываем тариф в savepoint (ошибка не ломает создание устройства)
+        try:
+            async with db.begin_nested():
+                fresh = await crud.refresh_client(db, client, "devices")
+                if fresh:
+                    device_count = len(fresh.devices or [])
+                    # берём extra_per_device из выбранного тарифа, иначе дефолт 1000
+                    extra_per_device = (
+                        float(getattr(getattr(fresh.tariff, "tariff", None), "extra_per_device", 1000) or 1000)
+                        if fresh.tariff else 1000.0
+                    )
+                    total_extra = device_count * extra_per_device
+                    await crud.update_tariff(
+                        db,
+                        client=fresh,
+                        tariff=(fresh.tariff.tariff if fresh.tariff else None),
+                        device_count=device_count,
+                        total_extra_fee=total_extra,
+                    )
+        except Exception as e:
+            logger.warning("tariff recalc after device create failed: %s", e)
+
+        return _device_to_schema(created)
 
 
 @router.post("/clients/{client_id}/devices/{device_id}/photos/upload-url", response_model=PresignedUploadResponse)
@@ -258,16 +325,17 @@ async def add_device_photo(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        await _ensure_assignment(db, client=client, manager=current_manager)
 
-    device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
-    if not device:
-        raise HTTPException(status_code=404, detail="Device not found")
+        device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
 
-    await crud.add_device_photo(db, device=device, file_key=payload.file_key)
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        await crud.add_device_photo(db, device=device, file_key=payload.file_key)
+        client = await crud.refresh_client(db, client, "devices")
+        return _client_to_detail(client)
 
 
 @router.delete("/clients/{client_id}/devices/{device_id}/photos/{photo_id}", response_model=ClientDetail)
@@ -278,20 +346,21 @@ async def delete_device_photo(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        await _ensure_assignment(db, client=client, manager=current_manager)
 
-    device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
-    if not device:
-        raise HTTPException(status_code=404, detail="Device not found")
+        device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
 
-    photo = next((p for p in device.photos if str(p.id) == str(photo_id)), None)
-    if not photo:
-        raise HTTPException(status_code=404, detail="Photo not found")
+        photo = next((p for p in device.photos if str(p.id) == str(photo_id)), None)
+        if not photo:
+            raise HTTPException(status_code=404, detail="Photo not found")
 
-    await crud.remove_device_photo(db, photo=photo)
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        await crud.remove_device_photo(db, photo=photo)
+        client = await crud.refresh_client(db, client, "devices")
+        return _client_to_detail(client)
 
 # --- Удаление устройства клиента ---
 @router.delete("/clients/{client_id}/devices/{device_id}", status_code=204)
@@ -304,17 +373,18 @@ async def delete_manager_device(
     """Удаление устройства клиента.
     Возвращает 204 при успехе или 404, если устройство не найдено у клиента.
     """
-    client = await _get_client_or_404(db, client_id)
-    # гарантируем назначение менеджера (как и для остальных действий)
-    await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        # гарантируем назначение менеджера (как и для остальных действий)
+        await _ensure_assignment(db, client=client, manager=current_manager)
 
-    # найдём устройство среди устройств клиента
-    device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
-    if not device:
-        raise HTTPException(status_code=404, detail="Device not found")
+        # найдём устройство среди устройств клиента
+        device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
 
-    await crud.delete_device(db, device=device)
-    return Response(status_code=204)
+        await crud.delete_device(db, device=device)
+        return Response(status_code=204)
 
 @router.patch("/clients/{client_id}/devices/{device_id}", response_model=DeviceRead)
 async def update_manager_device(
@@ -325,17 +395,18 @@ async def update_manager_device(
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ):
     """Обновление устройства клиента (title/description/specs/extra_fee)."""
-    client = await _get_client_or_404(db, client_id)
-    # гарантируем назначение менеджера (как и для остальных действий)
-    await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        # гарантируем назначение менеджера (как и для остальных действий)
+        await _ensure_assignment(db, client=client, manager=current_manager)
 
-    # найдём устройство среди устройств клиента
-    device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
-    if not device:
-        raise HTTPException(status_code=404, detail="Device not found")
+        # найдём устройство среди устройств клиента
+        device = next((d for d in client.devices if str(d.id) == str(device_id)), None)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
 
-    updated = await crud.update_device(db, device=device, payload=payload)
-    return _device_to_schema(updated)
+        updated = await crud.update_device(db, device=device, payload=payload)
+        return _device_to_schema(updated)
 
 def _tariff_to_schema(tariff: ManagerTariff | None, client_tariff) -> TariffRead:
     if not client_tariff:
@@ -375,27 +446,28 @@ async def apply_tariff_for_client(
     """
     Зафиксировать рассчитанный тариф в карточке клиента (upsert ManagerClientTariff).
     """
-    client = await _get_client_or_404(db, client_id)
-    await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        await _ensure_assignment(db, client=client, manager=current_manager)
 
-    tariff = None
-    if payload.tariff_id:
-        tariff = await crud.get_tariff_by_id(db, payload.tariff_id)
+        tariff = None
+        if payload.tariff_id:
+            tariff = await crud.get_tariff_by_id(db, payload.tariff_id)
 
-    device_count, extra_per_device, total_extra_fee = await crud.calculate_tariff(
-        tariff=tariff,
-        request=payload,
-    )
+        device_count, extra_per_device, total_extra_fee = await crud.calculate_tariff(
+            tariff=tariff,
+            request=payload,
+        )
 
-    updated = await crud.update_tariff(
-        db,
-        client=client,
-        tariff=tariff,
-        device_count=device_count,
-        total_extra_fee=total_extra_fee,
-    )
+        updated = await crud.update_tariff(
+            db,
+            client=client,
+            tariff=tariff,
+            device_count=device_count,
+            total_extra_fee=total_extra_fee,
+        )
 
-    return _tariff_to_schema(tariff, updated)
+        return _tariff_to_schema(tariff, updated)
 
 @router.post("/clients/{client_id}/tariff/calculate", response_model=TariffCalculateResponse)
 async def calculate_tariff_post(
@@ -431,36 +503,59 @@ async def _get_client_or_404(
     db: AsyncSession,
     client_id: uuid.UUID,
 ) -> ManagerClient:
-    client = await crud.get_client(db, client_id)
+    client = await crud.load_client(db, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     return client
 
 
-def _passport_to_schema(passport) -> PassportRead | None:
+def _passport_to_schema(passport, urls: dict[str, str] | None = None) -> PassportRead | None:
     if not passport:
         return None
     schema = PassportRead.model_validate(passport)
     # Use a presigned URL so private buckets work in the browser.
-    schema.photo_url = (
-        storage_service.generate_presigned_get_url(passport.photo_url)
-        if getattr(passport, "photo_url", None)
-        else None
-    )
+    photo_key = getattr(passport, "photo_url", None)
+    if photo_key and urls is None:
+        urls = storage_service.presign_many([photo_key])
+    schema.photo_url = urls[photo_key] if photo_key else None
     return schema
 
 
+def _contract_key(contract_url: str | None) -> str | None:
+    if contract_url and f"/{settings.S3_BUCKET}/" in contract_url:
+        return contract_url.split(f"/{settings.S3_BUCKET}/", 1)[-1]
+    return None
+
+
+async def _render_contract_pdf_or_503(**kwargs) -> bytes:
+    try:
+        return await render_contract_pdf(**kwargs)
+    except ContractRendererBusy:
+        # очередь рендера заполнена — пусть клиент повторит позже, а не висит в ожидании
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="CONTRACT_RENDERER_BUSY",
+            headers={"Retry-After": "5"},
+        )
+
+
 def _client_to_detail(client: ManagerClient) -> ClientDetail:
-    devices = [_device_to_schema(d) for d in client.devices]
+    # Sign every object key of the aggregate in one batch
+    keys = [photo.file_key for device in client.devices for photo in device.photos]
+    if client.passport and client.passport.photo_url:
+        keys.append(client.passport.photo_url)
+    contract_key = _contract_key(client.contract.contract_url) if client.contract else None
+    if contract_key:
+        keys.append(contract_key)
+    urls = storage_service.presign_many(keys)
+
+    devices = [_device_to_schema(d, urls) for d in client.devices]
     tariff_schema = None
     if client.tariff:
         tariff_schema = _tariff_to_schema(client.tariff.tariff, client.tariff)
     contract_schema = None
     if client.contract:
-        contract_url = client.contract.contract_url
-        if contract_url and f"/{settings.S3_BUCKET}/" in contract_url:
-            key = contract_url.split(f"/{settings.S3_BUCKET}/", 1)[-1]
-            contract_url = storage_service.generate_presigned_get_url(key)
+        contract_url = urls[contract_key] if contract_key else client.contract.contract_url
         contract_schema = ContractRead(
             otp_code=client.contract.otp_code,
             otp_sent_at=client.contract.otp_sent_at,
@@ -498,7 +593,7 @@ def _client_to_detail(client: ManagerClient) -> ClientDetail:
             name=client.user.name,
             address=client.user.address,
         ),
-        passport=_passport_to_schema(client.passport),
+        passport=_passport_to_schema(client.passport, urls),
         devices=devices,
         tariff=tariff_schema,
         contract=contract_schema,
@@ -523,7 +618,7 @@ async def manager_login(payload: ManagerLoginRequest, db: AsyncSession = Depends
     if not manager or not manager.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not verify_password(payload.password, manager.password_hash):
+    if not await verify_password_async(payload.password, manager.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     token, expires_in = security.create_manager_access_token(
@@ -538,47 +633,87 @@ async def manager_profile(current_manager: ManagerUser = Depends(deps.get_curren
     return ManagerRead.model_validate(current_manager)
 
 
-@router.get("/clients", response_model=list[ClientSummary])
+def _clients_query(
+    tab: ClientsTab = "new",
+    q: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(CLIENTS_PAGE_DEFAULT_LIMIT, ge=1, le=CLIENTS_PAGE_MAX_LIMIT),
+) -> ClientsQuery:
+    # ClientsQuery = Depends() теряет ограничения полей: FastAPI не видит ge/le в сигнатуре модели
+    # и ошибка валидации становится 500, поэтому параметры объявлены явно — за пределами будет 422
+    return ClientsQuery(tab=tab, q=q, cursor=cursor, limit=limit)
+
+
+@router.get("/clients", response_model=ClientsPage)
 async def list_manager_clients(
-    query: ClientsQuery = Depends(),
+    query: ClientsQuery = Depends(_clients_query),
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
-) -> list[ClientSummary]:
-    if query.tab == "new":
-        # Для вкладки «Новые» показываем общий пул: БЕЗ привязки к конкретному менеджеру
-        # (crud.list_clients трактует manager_id=None как assigned_manager_id IS NULL)
-        clients = await crud.list_clients(db, manager_id=None, tab="new")
-    else:
-        # Остальные вкладки фильтруются по текущему менеджеру
-        clients = await crud.list_clients(db, manager_id=current_manager.id, tab=query.tab)
-    summaries: list[ClientSummary] = []
-    for client in clients:
-        summaries.append(
-            ClientSummary(
-                id=client.id,
-                user_id=client.user_id,
-                name=(client.user.name if client.user and client.user.name else None),
-                phone=client.user.phone if client.user else "",
-                email=client.user.email if client.user else None,
-                status=client.status,
-                assigned_manager_id=client.assigned_manager_id,
-                support_ticket_id=client.support_ticket_id,
-                created_at=client.created_at,
-                updated_at=client.updated_at,
-                devices_count=len(client.devices),
-                registration_address=client.user.address if client.user else None,
-            )
+) -> ClientsPage:
+    # Для вкладки «Новые» показываем общий пул: БЕЗ привязки к конкретному менеджеру
+    manager_id = None if query.tab == "new" else current_manager.id
+    try:
+        rows, next_cursor = await crud.list_clients(
+            db,
+            manager_id=manager_id,
+            tab=query.tab,
+            search=query.q,
+            cursor=query.cursor,
+            limit=query.limit,
         )
-    return summaries
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    summaries = [ClientSummary.model_validate(dict(row)) for row in rows]
+    return ClientsPage(items=summaries, next_cursor=next_cursor)
+
+
+@router.get("/clients/events", include_in_schema=False)
+async def stream_client_events(
+    db: AsyncSession = Depends(get_db),
+    current_manager: ManagerUser = Depends(deps.get_current_manager),
+) -> StreamingResponse:
+    """SSE: client.created / client.status_changed / client.assigned, плюс resync, если события потеряны."""
+    # стрим живёт долго — соединение из пула, взятое при авторизации, возвращаем сразу
+    await db.close()
+    return StreamingResponse(
+        client_events.events(heartbeat=settings.CLIENT_EVENTS_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Presigned URL в ClientDetail живут неделю, а кэш подписей отдаёт их до половины срока:
+# ETag меняется раз в час, чтобы 304 не продлевал жизнь старым ссылкам у SPA
+CLIENT_DETAIL_ETAG_WINDOW = 60 * 60
+CLIENT_DETAIL_CACHE_CONTROL = "private, no-cache"
+
+
+def _client_detail_etag(version: tuple) -> str:
+    """Quoted tag for the version watermark; sent as weak (W/): presigned URLs may differ byte-wise."""
+    window = int(time.time()) // CLIENT_DETAIL_ETAG_WINDOW
+    return '"' + hashlib.sha256(repr((version, window)).encode()).hexdigest()[:32] + '"'
 
 
 @router.get("/clients/{client_id}", response_model=ClientDetail)
 async def get_manager_client(
     client_id: uuid.UUID,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
+    # Версию считаем до загрузки агрегата: если клиент изменится между запросами,
+    # тело окажется новее ETag, и следующий If-None-Match просто не совпадёт
+    version = await crud.get_client_version(db, client_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    etag = _client_detail_etag(version)
+    headers = {"ETag": f"W/{etag}", "Cache-Control": CLIENT_DETAIL_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), {etag}):
+        return Response(status_code=304, headers=headers)
+
     client = await _get_client_or_404(db, client_id)
+    response.headers.update(headers)
     return _client_to_detail(client)
 
 
@@ -589,14 +724,13 @@ async def upsert_passport_put(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
 
-    # CRUD expects `payload`, not `data`.
-    await crud.upsert_passport(db, client=client, payload=payload)
-
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        # CRUD expects `payload`, not `data`.
+        await crud.upsert_passport(db, client=client, payload=payload)
+        return _client_to_detail(client)
 
 
 @router.patch("/clients/{client_id}/passport", response_model=ClientDetail)
@@ -606,14 +740,13 @@ async def upsert_passport_patch(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
 
-    # Use the same upsert for partial updates; optional fields may be omitted.
-    await crud.upsert_passport(db, client=client, payload=payload)
-
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        # Use the same upsert for partial updates; optional fields may be omitted.
+        await crud.upsert_passport(db, client=client, payload=payload)
+        return _client_to_detail(client)
 
 
 @router.post("/clients/{client_id}/passport/photo/upload-url", response_model=PassportPhotoUploadResponse)
@@ -638,15 +771,15 @@ async def attach_passport_photo(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
 
-    if client.passport is None:
-        raise HTTPException(status_code=400, detail="Passport is not filled yet")
+        if client.passport is None:
+            raise HTTPException(status_code=400, detail="Passport is not filled yet")
 
-    await crud.update_passport_photo(db, client=client, file_key=payload.file_key)
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        await crud.update_passport_photo(db, client=client, file_key=payload.file_key)
+        return _client_to_detail(client)
 
 
 @router.delete("/clients/{client_id}/passport/photo", response_model=ClientDetail)
@@ -655,16 +788,16 @@ async def delete_passport_photo(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
 
-    if not client.passport or not client.passport.photo_url:
-        raise HTTPException(status_code=404, detail="Passport photo not found")
+        if not client.passport or not client.passport.photo_url:
+            raise HTTPException(status_code=404, detail="Passport photo not found")
 
-    storage_service.delete_object(client.passport.photo_url)
-    await crud.update_passport_photo(db, client=client, file_key=None)
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        await async_storage_service.delete_object(client.passport.photo_url)
+        await crud.update_passport_photo(db, client=client, file_key=None)
+        return _client_to_detail(client)
 
 
 
@@ -736,6 +869,7 @@ def _canonical_tariff(snapshot: dict | None) -> dict:
         "base_fee": float(snapshot.get("base_fee") or 0),
         "name": snapshot.get("name") or "",
         "client_full_name": snapshot.get("client_full_name") or "",
+        "template_version": snapshot.get("template_version") or "",
     }
 
 
@@ -880,6 +1014,7 @@ async def generate_contract(
     tariff_snapshot["device_added"] = device_added
     tariff_snapshot["device_added_count"] = device_added_count
     tariff_snapshot["was_signed_before_regen"] = was_signed_before_regen
+    tariff_snapshot["template_version"] = contract_template_version()
 
     current_signature = _contract_signature(
         passport_snapshot=passport_snapshot,
@@ -889,10 +1024,14 @@ async def generate_contract(
     current_sig_hash = _signature_hash(current_signature)
 
     if client.contract:
+        previous_tariff_snapshot = dict(client.contract.tariff_snapshot or {})
+        if previous_tariff_snapshot:
+            # снапшоты до версионирования шаблона считаем собранными текущей версией
+            previous_tariff_snapshot.setdefault("template_version", tariff_snapshot["template_version"])
         previous_signature = _contract_signature(
             passport_snapshot=client.contract.passport_snapshot,
             device_snapshot=client.contract.device_snapshot,
-            tariff_snapshot=client.contract.tariff_snapshot,
+            tariff_snapshot=previous_tariff_snapshot,
         )
         previous_sig_hash = _signature_hash(previous_signature)
         prev_device_len = len(client.contract.device_snapshot or []) if isinstance(client.contract.device_snapshot, list) else -1
@@ -935,58 +1074,75 @@ async def generate_contract(
             float(tariff_snapshot.get("extra_per_device") or 0),
         )
 
-    # --- Generate short contract number: AA-YYMMDD-NN ---
-    # AA – первые 2 буквы фамилии (или имени), YYMMDD – дата UTC, NN – порядковый за день
-    last_name = (
-        client.passport.last_name
-        if (client.passport and client.passport.last_name)
-        else (client.user.name or "")
-    ).strip()
-    two = re.sub(r"[^A-Za-zА-Яа-яЁё]", "", last_name).upper()[:2] or "XX"
-    yymmdd = datetime.utcnow().strftime("%y%m%d")
-
-    # Если у клиента уже есть номер с сегодняшней датой — увеличим суффикс
-    seq = 1
-    if client.contract and client.contract.contract_number:
-        m = re.match(r"^[A-Za-zА-Яа-яЁё]{2}-(\d{6})-(\d{2})$", client.contract.contract_number or "")
-        if m and m.group(1) == yymmdd:
-            try:
-                seq = max(1, int(m.group(2))) + 1
-            except Exception:
-                seq = 1
-
-    contract_number = f"{two}-{yymmdd}-{seq:02d}"
-    pdf_bytes = build_contract_pdf(
-        contract_number=contract_number,
-        passport_snapshot=passport_snapshot,
-        devices=device_snapshot,
-        tariff_snapshot=tariff_snapshot,
-        client_full_name=client_full_name,
-    )
-
-    pdf_key = f"contracts/{client_id}/{contract_number}.pdf"
-    storage_service.upload_bytes(key=pdf_key, data=pdf_bytes, content_type="application/pdf")
+    # Готовый PDF для тех же снимков (и той же версии шаблона) переиспользуем вместе с его номером
+    pdf_key = contract_pdf_key(client_id, current_sig_hash)
+    stored_meta = await async_storage_service.get_metadata(key=pdf_key)
+    if stored_meta and stored_meta.get(CONTRACT_NUMBER_META):
+        contract_number = unquote(stored_meta[CONTRACT_NUMBER_META])
+        logger.info(
+            "CONTRACT pdf reuse client_id=%s key=%s contract_number=%s",
+            client_id,
+            pdf_key,
+            contract_number,
+        )
+    else:
+        # --- Generate short contract number: AA-YYMMDD-NN ---
+        # AA – первые 2 буквы фамилии (или имени), YYMMDD – дата UTC, NN – порядковый за день
+        last_name = (
+            client.passport.last_name
+            if (client.passport and client.passport.last_name)
+            else (client.user.name or "")
+        ).strip()
+        two = re.sub(r"[^A-Za-zА-Яа-яЁё]", "", last_name).upper()[:2] or "XX"
+        yymmdd = datetime.utcnow().strftime("%y%m%d")
+
+        # Если у клиента уже есть номер с сегодняшней датой — увеличим суффикс
+        seq = 1
+        if client.contract and client.contract.contract_number:
+            m = re.match(r"^[A-Za-zА-Яа-яЁё]{2}-(\d{6})-(\d{2})$", client.contract.contract_number or "")
+            if m and m.group(1) == yymmdd:
+                try:
+                    seq = max(1, int(m.group(2))) + 1
+                except Exception:
+                    seq = 1
+
+        contract_number = f"{two}-{yymmdd}-{seq:02d}"
+        pdf_bytes = await _render_contract_pdf_or_503(
+            contract_number=contract_number,
+            passport_snapshot=passport_snapshot,
+            devices=device_snapshot,
+            tariff_snapshot=tariff_snapshot,
+            client_full_name=client_full_name,
+        )
+        await async_storage_service.upload_bytes(
+            key=pdf_key,
+            data=pdf_bytes,
+            content_type="application/pdf",
+            metadata={CONTRACT_NUMBER_META: quote(contract_number)},
+        )
     contract_url = storage_service.get_public_url(pdf_key)
 
-    # Сохраняем контракт БЕЗ OTP (OTP запрашивается отдельным эндпоинтом /contract/request-otp)
-    contract = await crud.upsert_contract(
-        db,
-        client=client,
-        data={
-            "tariff_snapshot": tariff_snapshot,
-            "passport_snapshot": passport_snapshot,
-            "device_snapshot": device_snapshot,
-            "contract_number": contract_number,
-            "contract_url": contract_url,
-            "signed_at": None,
-            "payment_confirmed_at": None,
-            "otp_code": None,
-            "otp_sent_at": None,
-        },
-    )
+    # Контракт и статус сохраняем одной транзакцией (рендер PDF выше — вне её)
+    async with unit_of_work(db):
+        # Сохраняем контракт БЕЗ OTP (OTP запрашивается отдельным эндпоинтом /contract/request-otp)
+        contract = await crud.upsert_contract(
+            db,
+            client=client,
+            data={
+                "tariff_snapshot": tariff_snapshot,
+                "passport_snapshot": passport_snapshot,
+                "device_snapshot": device_snapshot,
+                "contract_number": contract_number,
+                "contract_url": contract_url,
+                "signed_at": None,
+                "payment_confirmed_at": None,
+                "otp_code": None,
+                "otp_sent_at": None,
+            },
+        )
 
-    # Никаких сообщений в Support здесь не отправляем
-    client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_CONTRACT)
+        # Никаких сообщений в Support здесь не отправляем
+        client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_CONTRACT)
     return ContractGenerateResponse(
         contract_id=contract.id,
         otp_code="",
@@ -1001,48 +1157,52 @@ async def request_contract_otp(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> dict:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
-
-    if not client.contract:
-        raise HTTPException(status_code=404, detail="Contract not generated")
-
-    now = datetime.now(timezone.utc)
-    if client.contract and client.contract.otp_code and client.contract.otp_sent_at:
-        elapsed = (now - client.contract.otp_sent_at).total_seconds()
-        if elapsed < 60:
-            otp_code = client.contract.otp_code
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
+
+        if not client.contract:
+            raise HTTPException(status_code=404, detail="Contract not generated")
+
+        now = datetime.now(timezone.utc)
+        if client.contract and client.contract.otp_code and client.contract.otp_sent_at:
+            elapsed = (now - client.contract.otp_sent_at).total_seconds()
+            if elapsed < 60:
+                otp_code = client.contract.otp_code
+            else:
+                otp_code = f"{secrets.randbelow(9000) + 1000:04d}"
         else:
             otp_code = f"{secrets.randbelow(9000) + 1000:04d}"
-    else:
-        otp_code = f"{secrets.randbelow(9000) + 1000:04d}"
-    await crud.upsert_contract(
-        db,
-        client=client,
-        data={"otp_code": otp_code, "otp_sent_at": now},
-    )
-    logger.info(
-        "OTP send client_id=%s contract_number=%s otp_len=%s",
-        client_id,
-        client.contract.contract_number if client.contract else None,
-        len(otp_code),
-    )
+        await crud.upsert_contract(
+            db,
+            client=client,
+            data={"otp_code": otp_code, "otp_sent_at": now},
+        )
+        logger.info(
+            "OTP send client_id=%s contract_number=%s otp_len=%s",
+            client_id,
+            client.contract.contract_number if client.contract else None,
+            len(otp_code),
+        )
 
-    try:
-        thread = await crud.ensure_support_thread(db, client=client, title="Подписание договора")
-        _ = thread  # создан и ок
-        # Пропускаем запись в локальный чат; OTP ниже отправится через SupportBridge.
-    except Exception:
-        pass
-
-    support_bridge = SupportBridgeService(db)
-    ticket = await support_bridge.ensure_ticket(client, subject="Подписание договора")
-    await support_bridge.post_support_message(
-        ticket=ticket,
-        body=f"Договор {client.contract.contract_number if client.contract and client.contract.contract_number else f'CTR-{client.id.hex[:8].upper()}'}, код подтверждения {otp_code}",
-    )
+        try:
+            async with db.begin_nested():
+                thread = await crud.ensure_support_thread(db, client=client, title="Подписание договора")
+                _ = thread  # создан и ок
+                # Пропускаем запись в локальный чат; OTP ниже отправится через outbox.
+        except Exception:
+            # откат savepoint экспайрит объекты агрегата — перечитываем его
+            client = await _get_client_or_404(db, client_id)
 
-    return {"ok": True}
+        # OTP уходит в поддержку через outbox: запрос не ждёт SupportBridge
+        await outbox.enqueue_support_message(
+            db,
+            client=client,
+            subject="Подписание договора",
+            body=f"Договор {client.contract.contract_number if client.contract and client.contract.contract_number else f'CTR-{client.id.hex[:8].upper()}'}, код подтверждения {otp_code}",
+        )
+
+        return {"ok": True}
 
 
 @router.post("/clients/{client_id}/contract/confirm", response_model=ClientDetail)
@@ -1053,122 +1213,131 @@ async def confirm_contract(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
-    if not client.contract:
-        raise HTTPException(status_code=404, detail="Contract not generated")
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
+        if not client.contract:
+            raise HTTPException(status_code=404, detail="Contract not generated")
+
+        expected_otp = (client.contract.otp_code or "").strip() if client.contract else ""
+        provided_otp = (payload.otp_code or "").strip()
+        logger.info(
+            "OTP confirm client_id=%s contract_number=%s otp_sent_at=%s expected_len=%s provided_len=%s",
+            client_id,
+            client.contract.contract_number if client.contract else None,
+            client.contract.otp_sent_at if client.contract else None,
+            len(expected_otp),
+            len(provided_otp),
+        )
+        if expected_otp != provided_otp:
+            raise HTTPException(status_code=400, detail="Invalid OTP code")
+
+        was_signed_before = bool(client.contract and client.contract.signed_at)
+        now = datetime.now(timezone.utc)
+        ip_addr = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+        contract_number = client.contract.contract_number or ""
+        pdf_key = _contract_key(client.contract.contract_url) or (
+            f"contracts/{client_id}/{contract_number}.pdf" if contract_number else ""
+        )
 
-    expected_otp = (client.contract.otp_code or "").strip() if client.contract else ""
-    provided_otp = (payload.otp_code or "").strip()
-    logger.info(
-        "OTP confirm client_id=%s contract_number=%s otp_sent_at=%s expected_len=%s provided_len=%s",
-        client_id,
-        client.contract.contract_number if client.contract else None,
-        client.contract.otp_sent_at if client.contract else None,
-        len(expected_otp),
-        len(provided_otp),
-    )
-    if expected_otp != provided_otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP code")
-
-    was_signed_before = bool(client.contract and client.contract.signed_at)
-    now = datetime.now(timezone.utc)
-    ip_addr = request.client.host if request.client else None
-    user_agent = request.headers.get("user-agent")
-    contract_number = client.contract.contract_number or ""
-    pdf_key = f"contracts/{client_id}/{contract_number}.pdf" if contract_number else ""
-
-    signature_hash = None
-    signature_hmac = None
-    if pdf_key:
-        try:
-            pdf_bytes = storage_service.get_bytes(key=pdf_key)
-        except Exception:
-            passport_snapshot = client.contract.passport_snapshot or {}
-            device_snapshot = client.contract.device_snapshot or []
-            if isinstance(device_snapshot, dict):
-                device_snapshot = list(device_snapshot.values())
-            tariff_snapshot = client.contract.tariff_snapshot or {}
-            pdf_bytes = build_contract_pdf(
-                contract_number=contract_number,
-                passport_snapshot=passport_snapshot,
-                devices=list(device_snapshot) if isinstance(device_snapshot, list) else [],
-                tariff_snapshot=tariff_snapshot,
-                client_full_name=(client.user.name if client.user else None),
-            )
-            storage_service.upload_bytes(key=pdf_key, data=pdf_bytes, content_type="application/pdf")
-
-        signature_hash = hashlib.sha256(pdf_bytes).hexdigest()
-        signature_hmac = hmac.new(
-            settings.CONTRACT_SIGNATURE_SECRET.encode("utf-8"),
-            signature_hash.encode("utf-8"),
-            digestmod=hashlib.sha256,
-        ).hexdigest()
-
-    await crud.upsert_contract(
-        db,
-        client=client,
-        data={
-            "signed_at": now,
-            "pep_agreed_at": now,
-            "otp_code": None,
-            "signature_hash": signature_hash,
-            "signature_hmac": signature_hmac,
-            "signed_ip": ip_addr,
-            "signed_user_agent": user_agent,
-        },
-    )
-    client = await _get_client_or_404(db, client_id)
-    tariff_snapshot = client.contract.tariff_snapshot if client.contract else {}
-    was_signed = bool(was_signed_before or tariff_snapshot.get("was_signed_before_regen"))
-    device_added = bool(tariff_snapshot.get("device_added"))
-    device_added_count = int(tariff_snapshot.get("device_added_count") or 0)
-    if device_added and device_added_count <= 0:
-        device_added_count = 1
-    amount_to_bill = 0.0
-    extra_per_device = float(tariff_snapshot.get("extra_per_device") or 0)
-    if extra_per_device <= 0:
-        extra_per_device = 1000.0
-    if was_signed:
-        if device_added:
-            amount_to_bill = device_added_count * extra_per_device
-    else:
-        amount_to_bill = float(tariff_snapshot.get("total_extra_fee") or 0)
-    logger.info(
-        "BILLING calc client_id=%s was_signed=%s device_added=%s device_added_count=%s amount_to_bill=%s extra_per_device=%s",
-        client_id,
-        was_signed,
-        device_added,
-        device_added_count,
-        amount_to_bill,
-        extra_per_device,
-    )
-    if device_added and amount_to_bill > 0:
-        invoice = await crud.ensure_invoice_for_client(
+        signature_hash = None
+        signature_hmac = None
+        if pdf_key:
+            try:
+                pdf_bytes = await async_storage_service.get_bytes(key=pdf_key)
+            except Exception:
+                passport_snapshot = client.contract.passport_snapshot or {}
+                device_snapshot = client.contract.device_snapshot or []
+                if isinstance(device_snapshot, dict):
+                    device_snapshot = list(device_snapshot.values())
+                tariff_snapshot = client.contract.tariff_snapshot or {}
+                pdf_bytes = await _render_contract_pdf_or_503(
+                    contract_number=contract_number,
+                    passport_snapshot=passport_snapshot,
+                    devices=list(device_snapshot) if isinstance(device_snapshot, list) else [],
+                    tariff_snapshot=tariff_snapshot,
+                    client_full_name=(client.user.name if client.user else None),
+                )
+                await async_storage_service.upload_bytes(
+                    key=pdf_key,
+                    data=pdf_bytes,
+                    content_type="application/pdf",
+                    metadata={CONTRACT_NUMBER_META: quote(contract_number)},
+                )
+
+            signature_hash = hashlib.sha256(pdf_bytes).hexdigest()
+            signature_hmac = hmac.new(
+                settings.CONTRACT_SIGNATURE_SECRET.encode("utf-8"),
+                signature_hash.encode("utf-8"),
+                digestmod=hashlib.sha256,
+            ).hexdigest()
+
+        await crud.upsert_contract(
             db,
             client=client,
-            contract_number=client.contract.contract_number or "",
-            amount=amount_to_bill,
+            data={
+                "signed_at": now,
+                "pep_agreed_at": now,
+                "otp_code": None,
+                "signature_hash": signature_hash,
+                "signature_hmac": signature_hmac,
+                "signed_ip": ip_addr,
+                "signed_user_agent": user_agent,
+            },
         )
-        try:
-            thread = await crud.ensure_support_thread(db, client=client, title="Подписание договора")
-            _ = thread
-        except Exception:
-            pass
-        support_bridge = SupportBridgeService(db)
-        ticket = await support_bridge.ensure_ticket(client, subject="Подписание договора")
-        await support_bridge.post_support_message(
-            ticket=ticket,
-            body=(
-                f"Выставлен счёт по договору {invoice.contract_number}: {float(invoice.amount):.2f} ₽."
-                f" Оплатите до {invoice.due_date.strftime('%d.%m.%Y')}"
-            ),
+        tariff_snapshot = client.contract.tariff_snapshot if client.contract else {}
+        was_signed = bool(was_signed_before or tariff_snapshot.get("was_signed_before_regen"))
+        device_added = bool(tariff_snapshot.get("device_added"))
+        device_added_count = int(tariff_snapshot.get("device_added_count") or 0)
+        if device_added and device_added_count <= 0:
+            device_added_count = 1
+        amount_to_bill = 0.0
+        extra_per_device = float(tariff_snapshot.get("extra_per_device") or 0)
+        if extra_per_device <= 0:
+            extra_per_device = 1000.0
+        if was_signed:
+            if device_added:
+                amount_to_bill = device_added_count * extra_per_device
+        else:
+            amount_to_bill = float(tariff_snapshot.get("total_extra_fee") or 0)
+        logger.info(
+            "BILLING calc client_id=%s was_signed=%s device_added=%s device_added_count=%s amount_to_bill=%s extra_per_device=%s",
+            client_id,
+            was_signed,
+            device_added,
+            device_added_count,
+            amount_to_bill,
+            extra_per_device,
         )
-        client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_PAYMENT)
-    else:
-        client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.PROCESSED)
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        if device_added and amount_to_bill > 0:
+            invoice = await crud.ensure_invoice_for_client(
+                db,
+                client=client,
+                contract_number=client.contract.contract_number or "",
+                amount=amount_to_bill,
+            )
+            try:
+                async with db.begin_nested():
+                    thread = await crud.ensure_support_thread(db, client=client, title="Подписание договора")
+                    _ = thread
+            except Exception:
+                # откат savepoint экспайрит объекты агрегата — перечитываем его
+                client = await _get_client_or_404(db, client_id)
+            await outbox.enqueue_support_message(
+                db,
+                client=client,
+                subject="Подписание договора",
+                body=(
+                    f"Выставлен счёт по договору {invoice.contract_number}: {float(invoice.amount):.2f} ₽."
+                    f" Оплатите до {invoice.due_date.strftime('%d.%m.%Y')}"
+                ),
+            )
+            client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_PAYMENT)
+        else:
+            client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.PROCESSED)
+        client = await crud.refresh_client(db, client, "invoices")
+        return _client_to_detail(client)
 
 
 @router.post("/clients/{client_id}/payment/confirm", response_model=ClientDetail)
@@ -1178,16 +1347,16 @@ async def confirm_payment(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
-    if not client.contract:
-        raise HTTPException(status_code=404, detail="Contract not generated")
-
-    now = datetime.now(timezone.utc)
-    await crud.upsert_contract(db, client=client, data={"payment_confirmed_at": now})
-    client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.PROCESSED)
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
+        if not client.contract:
+            raise HTTPException(status_code=404, detail="Contract not generated")
+
+        now = datetime.now(timezone.utc)
+        await crud.upsert_contract(db, client=client, data={"payment_confirmed_at": now})
+        client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.PROCESSED)
+        return _client_to_detail(client)
 
 
 @router.post("/clients/{client_id}/billing/notify", response_model=ClientDetail)
@@ -1197,37 +1366,40 @@ async def notify_billing(
     db: AsyncSession = Depends(get_db),
     current_manager: ManagerUser = Depends(deps.get_current_manager),
 ) -> ClientDetail:
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
 
-    await crud.create_invoice(
-        db,
-        client=client,
-        amount=payload.amount,
-        description=payload.description,
-        contract_number=payload.contract_number,
-        due_date=payload.due_date,
-    )
+        await crud.create_invoice(
+            db,
+            client=client,
+            amount=payload.amount,
+            description=payload.description,
+            contract_number=payload.contract_number,
+            due_date=payload.due_date,
+        )
 
-    try:
-        thread = await crud.ensure_support_thread(db, client=client, title="Подписание договора")
-        _ = thread
-        # Пропускаем запись в локальный чат (enum sender в БД отличается). Уведомление отправится через SupportBridge ниже.
-    except Exception:
-        pass
-
-    support_bridge = SupportBridgeService(db)
-    ticket = await support_bridge.ensure_ticket(client, subject="Подписание договора")
-    await support_bridge.post_support_message(
-        ticket=ticket,
-        body=(
-            f"Выставлен счёт по договору {payload.contract_number}: {payload.amount:.2f} ₽."
-            f" Оплатите до {payload.due_date.strftime('%d.%m.%Y')}"
-        ),
-    )
+        try:
+            async with db.begin_nested():
+                thread = await crud.ensure_support_thread(db, client=client, title="Подписание договора")
+                _ = thread
+                # Пропускаем запись в локальный чат (enum sender в БД отличается). Уведомление отправится через outbox ниже.
+        except Exception:
+            # откат savepoint экспайрит объекты агрегата — перечитываем его
+            client = await _get_client_or_404(db, client_id)
 
-    client = await _get_client_or_404(db, client_id)
-    return _client_to_detail(client)
+        await outbox.enqueue_support_message(
+            db,
+            client=client,
+            subject="Подписание договора",
+            body=(
+                f"Выставлен счёт по договору {payload.contract_number}: {payload.amount:.2f} ₽."
+                f" Оплатите до {payload.due_date.strftime('%d.%m.%Y')}"
+            ),
+        )
+
+        client = await crud.refresh_client(db, client, "invoices")
+        return _client_to_detail(client)
 
 
 @router.patch("/clients/{client_id}/profile", response_model=ClientDetail)
@@ -1243,23 +1415,23 @@ async def update_client_profile(
         current_manager.id,
         payload.model_dump(exclude_none=True),
     )
-    client = await _get_client_or_404(db, client_id)
-    client = await _ensure_assignment(db, client=client, manager=current_manager)
+    async with unit_of_work(db):
+        client = await _get_client_or_404(db, client_id)
+        client = await _ensure_assignment(db, client=client, manager=current_manager)
 
-    await crud.update_client_profile(db, client=client, payload=payload)
+        await crud.update_client_profile(db, client=client, payload=payload)
 
-    if client.status == ManagerClientStatus.NEW:
-        client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.IN_VERIFICATION)
+        if client.status == ManagerClientStatus.NEW:
+            client = await crud.set_client_status(db, client=client, status=ManagerClientStatus.IN_VERIFICATION)
 
-    # Always refetch to return fresh values to the UI
-    client = await _get_client_or_404(db, client_id)
-    logger.info(
-        "PROFILE PATCH done client_id=%s manager_id=%s phone=%s email=%s name=%s address=%s",
-        client_id,
-        current_manager.id,
-        client.user.phone,
-        client.user.email,
-        client.user.name,
-        client.user.address,
-    )
-    return _client_to_detail(client)
+        # user обновлён и перечитан в crud.update_client_profile — повторная загрузка клиента не нужна
+        logger.info(
+            "PROFILE PATCH done client_id=%s manager_id=%s phone=%s email=%s name=%s address=%s",
+            client_id,
+            current_manager.id,
+            client.user.phone,
+            client.user.email,
+            client.user.name,
+            client.user.address,
+        )
+        return _client_to_detail(client)
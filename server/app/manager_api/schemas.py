@@ -242,6 +242,12 @@ class ClientSummary(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ClientsPage(BaseModel):
+    items: list[ClientSummary] = []
+    # Opaque keyset cursor for the next page; None when the list is exhausted
+    next_cursor: str | None = None
+
+
 class ClientDetail(BaseModel):
     id: uuid.UUID
     status: ManagerClientStatus
@@ -257,5 +263,14 @@ class ClientDetail(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+CLIENTS_PAGE_DEFAULT_LIMIT = 50
+CLIENTS_PAGE_MAX_LIMIT = 200
+
+ClientsTab = Literal["new", "processed", "mine", "in_work"]
+
+
 class ClientsQuery(BaseModel):
-    tab: Literal["new", "processed", "mine", "in_work"] = "new"
+    tab: ClientsTab = "new"
+    q: str | None = None
+    cursor: str | None = None
+    limit: int = Field(CLIENTS_PAGE_DEFAULT_LIMIT, ge=1, le=CLIENTS_PAGE_MAX_LIMIT)
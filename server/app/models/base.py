@@ -6,6 +6,9 @@ from app.core.database import Base as CoreBase
 # Базовый класс для всех моделей
 class Base(CoreBase):
     __abstract__ = True
+    # серверные значения (server_default/onupdate) забираем через RETURNING в том же INSERT/UPDATE,
+    # поэтому после flush refresh() не нужен
+    __mapper_args__ = {"eager_defaults": True}
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
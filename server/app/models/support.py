@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Enum as SAEnum, ForeignKey, String, Text
+from sqlalchemy import Enum as SAEnum, ForeignKey, Index, String, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from enum import Enum
@@ -24,6 +24,10 @@ class MessageAuthor(str, Enum):
 
 class SupportTicket(Base):
     __tablename__ = "support_tickets"
+    # SupportBridgeService.ensure_ticket: последний тикет пользователя (с темой)
+    __table_args__ = (
+        Index("ix_support_tickets_user_subject_created", "user_id", "subject", text("created_at DESC")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True, nullable=False)
@@ -0,0 +1,144 @@
+"""Manager client-list change events: Postgres NOTIFY in, server-sent events out."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+import psycopg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SQLALCHEMY_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "manager_clients"
+
+CLIENT_CREATED = "client.created"
+STATUS_CHANGED = "client.status_changed"
+ASSIGNED = "client.assigned"
+# события могли потеряться (переподключение к базе, переполнение очереди) — SPA перечитывает список
+RESYNC = "resync"
+
+# EventSource переподключается через столько миллисекунд после обрыва
+RETRY_MS = 3000
+
+
+async def notify_client_change(db: AsyncSession, kind: str, client) -> None:
+    """pg_notify in the caller's transaction: delivered on commit, dropped on rollback."""
+    payload = {
+        "type": kind,
+        "client_id": str(client.id),
+        "status": getattr(client.status, "value", client.status),
+        "assigned_manager_id": str(client.assigned_manager_id) if client.assigned_manager_id else None,
+    }
+    await db.execute(select(func.pg_notify(CHANNEL, json.dumps(payload, separators=(",", ":")))))
+
+
+def _frame(kind: str, data: str) -> str:
+    return f"event: {kind}\ndata: {data}\n\n"
+
+
+def _listen_dsn(url: str) -> str:
+    """SQLAlchemy URL -> libpq URI for a plain psycopg connection."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class ClientEventBroadcaster:
+    """One LISTEN connection fanned out to every open SSE stream.
+
+    The listener starts with the first subscriber. Each subscriber gets a
+    bounded queue of ready SSE frames; a subscriber that falls behind has its
+    queue replaced by a single `resync` event instead of blocking the others.
+    After the LISTEN connection is re-established every subscriber gets
+    `resync` too, since notifications sent meanwhile are lost.
+    """
+
+    def __init__(self, dsn: str, *, queue_size: int, reconnect_delay: float = 1.0) -> None:
+        self._dsn = dsn
+        self._queue_size = max(1, queue_size)
+        self._reconnect_delay = reconnect_delay
+        self._subscribers: set[asyncio.Queue[str]] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()
+
+    def subscribe(self) -> asyncio.Queue[str]:
+        if self._task is None:
+            self._listening = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[str]) -> None:
+        self._subscribers.discard(queue)
+
+    async def wait_listening(self) -> None:
+        await self._listening.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def events(self, *, heartbeat: float) -> AsyncIterator[str]:
+        """SSE frames for one client; a comment line every `heartbeat` seconds keeps proxies from closing it."""
+        queue = self.subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+    def publish(self, payload: str) -> None:
+        try:
+            kind = json.loads(payload)["type"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed %s notification: %r", CHANNEL, payload)
+            return
+        # кадр собирается один раз и раздаётся всем подписчикам
+        self._broadcast(_frame(kind, payload))
+
+    def _broadcast(self, frame: str) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_frame(RESYNC, "{}"))
+
+    async def _listen(self) -> None:
+        connected_before = False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._dsn, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    if connected_before:
+                        self._broadcast(_frame(RESYNC, "{}"))
+                    connected_before = True
+                    self._listening.set()
+                    async for notify in conn.notifies():
+                        self.publish(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("LISTEN %s connection lost: %s", CHANNEL, exc)
+            self._listening.clear()
+            await asyncio.sleep(self._reconnect_delay)
+
+
+client_events = ClientEventBroadcaster(
+    _listen_dsn(SQLALCHEMY_DATABASE_URL),
+    queue_size=settings.CLIENT_EVENTS_QUEUE_SIZE,
+)
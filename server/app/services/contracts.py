@@ -1,13 +1,21 @@
 """Helpers for contract PDF generation."""
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import logging
+import multiprocessing
 import random
 from datetime import datetime, timedelta
 
 import re
+import string
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from pathlib import Path
-from typing import Sequence
+from typing import Optional, Sequence
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
@@ -16,19 +24,121 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import cidfonts
 from reportlab.lib.styles import getSampleStyleSheet
 
-try:
-    pdfmetrics.registerFont(TTFont("DejaVuSans", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"))
-except Exception:
-    pass
+from app.core.config import settings
+from app.services.docx_converter import docx_converter, docx_template_cache
 
-_TEMPLATE_PATH = Path(__file__).with_name("templates") / "contract_template.txt"
+logger = logging.getLogger(__name__)
 
 
-def _load_template() -> str:
+def _register_fonts() -> None:
     try:
-        return _TEMPLATE_PATH.read_text(encoding="utf-8")
-    except FileNotFoundError as exc:  # pragma: no cover - template is part of repo
-        raise RuntimeError(f"Contract template not found at {_TEMPLATE_PATH}") from exc
+        pdfmetrics.registerFont(TTFont("DejaVuSans", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"))
+    except Exception:
+        pass
+
+
+_register_fonts()
+
+_TEMPLATE_PATH = Path(__file__).with_name("templates") / "contract_template.txt"
+# Bump when the PDF layout in build_contract_pdf/_write_lines changes
+_RENDERER_REVISION = "1"
+
+
+class ContractTemplate:
+    """Pre-parsed str.format template: literal chunks and fields are split once on load."""
+
+    def __init__(self, text: str, *, version: str) -> None:
+        self.text = text
+        self.version = version
+        self._parts: list[tuple[str, Optional[str], str, Optional[str]]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if field is not None and not field.isidentifier():
+                raise RuntimeError(f"Unsupported contract template field: {{{field}}}")
+            if spec and "{" in spec:
+                raise RuntimeError(f"Nested format spec is not supported: {{{field}:{spec}}}")
+            self._parts.append((literal, field, spec or "", conversion))
+
+    @property
+    def fields(self) -> set[str]:
+        return {field for _, field, _, _ in self._parts if field is not None}
+
+    def render(self, context: dict) -> str:
+        out: list[str] = []
+        for literal, field, spec, conversion in self._parts:
+            out.append(literal)
+            if field is None:
+                continue
+            value = context[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "a":
+                value = ascii(value)
+            elif conversion == "s":
+                value = str(value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+
+class TemplateRegistry:
+    """Compiled contract templates, reloaded when the file mtime changes.
+
+    The version id is `<revision>-<sha256 of text>[:12]`; it goes into
+    content-addressed PDF keys and the contract snapshot signature.
+    """
+
+    def __init__(self, path: Path, *, revision: str = _RENDERER_REVISION) -> None:
+        self._path = path
+        self._revision = revision
+        self._lock = threading.Lock()
+        self._template: Optional[ContractTemplate] = None
+        self._mtime_ns: Optional[int] = None
+
+    def _stat_mtime(self) -> int:
+        try:
+            return self._path.stat().st_mtime_ns
+        except FileNotFoundError as exc:  # pragma: no cover - template is part of repo
+            raise RuntimeError(f"Contract template not found at {self._path}") from exc
+
+    def get(self) -> ContractTemplate:
+        mtime_ns = self._stat_mtime()
+        template = self._template
+        if template is not None and mtime_ns == self._mtime_ns:
+            return template
+        with self._lock:
+            if self._template is None or mtime_ns != self._mtime_ns:
+                text = self._path.read_text(encoding="utf-8")
+                digest = hashlib.sha256(self._revision.encode("utf-8") + b"\0" + text.encode("utf-8"))
+                self._template = ContractTemplate(text, version=f"{self._revision}-{digest.hexdigest()[:12]}")
+                self._mtime_ns = mtime_ns
+            return self._template
+
+
+contract_templates = TemplateRegistry(_TEMPLATE_PATH)
+
+
+def contract_template_version() -> str:
+    """Version id of the current template + renderer revision.
+
+    While the DOCX renderer is active its template is part of the version,
+    so editing base_contract.docx does not reuse PDFs rendered from the old one.
+    """
+    version = contract_templates.get().version
+    if docx_converter.available:
+        version = f"{version}-docx-{docx_template_cache.digest()}"
+    return version
+
+
+def contract_pdf_key(client_id, signature_hash: str) -> str:
+    """Content-addressed S3 key of a rendered contract for a snapshot signature hash.
+
+    The contract number printed in the PDF is stored in the object metadata
+    (see CONTRACT_NUMBER_META) and reused together with the object.
+    """
+    content_id = hashlib.sha256(f"{signature_hash}:{contract_template_version()}".encode("utf-8")).hexdigest()
+    return f"contracts/{client_id}/by-content/{content_id}.pdf"
+
+
+CONTRACT_NUMBER_META = "contract-number"
 
 
 def _render_template(
@@ -39,7 +149,7 @@ def _render_template(
     tariff_snapshot: dict,
     client_full_name: str | None = None,
 ) -> list[str]:
-    template = _load_template()
+    template = contract_templates.get()
 
     client_full_name = (client_full_name or "").strip()
 
@@ -87,7 +197,7 @@ def _render_template(
         "tariff_total_extra_fee": tariff_snapshot.get("total_extra_fee", 0),
     }
 
-    rendered = template.format(**context)
+    rendered = template.render(context)
     return rendered.splitlines()
 
 
@@ -136,6 +246,97 @@ def build_contract_pdf(
     buffer.seek(0)
     return buffer.read()
 
+
+class ContractRendererBusy(Exception):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"{limit} contract renders are already queued")
+        self.limit = limit
+
+
+class ContractPdfRenderer:
+    """Renders contract PDFs on a process pool so ReportLab does not block the event loop.
+
+    `workers=0` renders in-process (tests, scripts). At most `workers` renders
+    run at once and at most `max_pending` callers wait for a slot; beyond that
+    render raises ContractRendererBusy instead of queueing.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int) -> None:
+        self._workers = max(0, workers)
+        self._max_pending = max(0, max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    def _executor_or_init(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_register_fonts,
+            )
+        return self._executor
+
+    async def render(self, **kwargs) -> bytes:
+        """Same keyword arguments as build_contract_pdf."""
+        if self._workers == 0:
+            return build_contract_pdf(**kwargs)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._workers)
+        if self._slots.locked() and self._waiting >= self._max_pending:
+            raise ContractRendererBusy(self._max_pending)
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor_or_init(), functools.partial(build_contract_pdf, **kwargs))
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+contract_pdf_renderer = ContractPdfRenderer(
+    workers=settings.CONTRACT_PDF_WORKERS,
+    max_pending=settings.CONTRACT_PDF_MAX_PENDING,
+)
+
+
+async def render_contract_pdf(
+    *,
+    contract_number: str,
+    passport_snapshot: dict,
+    devices: list[dict],
+    tariff_snapshot: dict,
+    client_full_name: str | None = None,
+) -> bytes:
+    """Contract PDF: DOCX template through the LibreOffice pool, ReportLab when it is unavailable or fails."""
+    if docx_converter.available:
+        try:
+            return await _try_build_from_docx(
+                passport_snapshot=passport_snapshot,
+                devices=devices,
+                tariff_snapshot=tariff_snapshot,
+                contract_number=contract_number,
+                client_full_name=client_full_name,
+            )
+        except Exception:
+            logger.warning("DOCX contract render failed for %s, falling back to ReportLab", contract_number, exc_info=True)
+    return await contract_pdf_renderer.render(
+        contract_number=contract_number,
+        passport_snapshot=passport_snapshot,
+        devices=devices,
+        tariff_snapshot=tariff_snapshot,
+        client_full_name=client_full_name,
+    )
+
+
 async def request_contract_otp(db, *, client):
     """Генерирует OTP, гарантирует наличие номера договора, сохраняет в контракт и отправляет в чат Support."""
     from app.manager_api import crud  # локальный импорт, чтобы избежать циклов
@@ -183,7 +384,7 @@ async def request_contract_otp(db, *, client):
 async def confirm_contract_and_build_pdf(db, *, client, otp_code: str) -> dict:
     """Проверяет OTP, рендерит PDF, сохраняет в S3, помечает контракт подписанным."""
     from app.manager_api import crud
-    from app.services.storage import storage_service
+    from app.services.storage import async_storage_service
 
     from fastapi import HTTPException
 
@@ -218,24 +419,16 @@ async def confirm_contract_and_build_pdf(db, *, client, otp_code: str) -> dict:
         yymmdd = datetime.utcnow().strftime("%y%m%d")
         number = f"{two}-{yymmdd}-01"
 
-    try:
-        pdf_bytes = await _try_build_from_docx(
-            passport_snapshot=passport_snapshot,
-            devices=devices,
-            tariff_snapshot=tariff_snapshot,
-            contract_number=number,
-        )
-    except Exception:
-        pdf_bytes = build_contract_pdf(
-            contract_number=number,
-            passport_snapshot=passport_snapshot,
-            devices=devices,
-            tariff_snapshot=tariff_snapshot,
-        )
+    pdf_bytes = await render_contract_pdf(
+        contract_number=number,
+        passport_snapshot=passport_snapshot,
+        devices=devices,
+        tariff_snapshot=tariff_snapshot,
+    )
 
     key = f"contracts/{fresh.id}/{number}.pdf"
-    storage_service.upload_bytes(key=key, data=pdf_bytes, content_type="application/pdf")
-    public_url = storage_service.get_public_url(key)
+    await async_storage_service.upload_bytes(key=key, data=pdf_bytes, content_type="application/pdf")
+    public_url = async_storage_service.get_public_url(key)
 
     # persist snapshots to suppress unnecessary regenerations on next visits
     await crud.upsert_contract(db, client=fresh, data={
@@ -260,24 +453,28 @@ async def confirm_contract_and_build_pdf(db, *, client, otp_code: str) -> dict:
         )
 
 
-async def _try_build_from_docx(*, passport_snapshot: dict, devices: list[dict], tariff_snapshot: dict, contract_number: str) -> bytes:
-    """Пытается собрать PDF из DOCX через docxtpl + LibreOffice headless. Кидает исключение при любой ошибке."""
-    from tempfile import TemporaryDirectory
-    from pathlib import Path
-    import subprocess
-
+async def _try_build_from_docx(
+    *,
+    passport_snapshot: dict,
+    devices: list[dict],
+    tariff_snapshot: dict,
+    contract_number: str,
+    client_full_name: str | None = None,
+) -> bytes:
+    """Собирает PDF из DOCX через docxtpl + пул LibreOffice. Кидает исключение при любой ошибке."""
     try:
-        from docxtpl import DocxTemplate
+        import docxtpl  # noqa: F401
     except Exception as e:
         raise RuntimeError("docxtpl is not available") from e
 
     context = {
         "contract": {"number": contract_number, "date": f"{datetime.utcnow():%Y-%m-%d}"},
         "client": {
-            "full_name": " ".join(filter(None, [passport_snapshot.get("last_name"), passport_snapshot.get("first_name"), passport_snapshot.get("middle_name")])),
-            "phone": "",
-            "email": "",
-            "address": passport_snapshot.get("registration_address") or "",
+            "full_name": " ".join(filter(None, [passport_snapshot.get("last_name"), passport_snapshot.get("first_name"), passport_snapshot.get("middle_name")]))
+            or (client_full_name or ""),
+            "phone": passport_snapshot.get("phone") or "",
+            "email": passport_snapshot.get("email") or "",
+            "address": passport_snapshot.get("address") or passport_snapshot.get("registration_address") or "",
         },
         "passport": {
             "series": passport_snapshot.get("series", ""),
@@ -295,22 +492,9 @@ async def _try_build_from_docx(*, passport_snapshot: dict, devices: list[dict],
         },
     }
 
-    template_path = Path("app/templates/contracts/base_contract.docx")
-    if not template_path.exists():
-        raise RuntimeError(f"Contract template not found: {template_path}")
-
-    with TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        docx_out = tmpdir / "contract.docx"
-        pdf_out = tmpdir / "contract.pdf"
-
-        tpl = DocxTemplate(str(template_path))
-        tpl.render(context)
-        tpl.save(str(docx_out))
+    docx = await asyncio.to_thread(docx_template_cache.render, context)
+    return await docx_converter.convert(docx)
 
-        subprocess.run(["soffice", "--headless", "--convert-to", "pdf", "--outdir", str(tmpdir), str(docx_out)], check=True)
-        return pdf_out.read_bytes()
-    
 
 # --- Ищем и патчим другие вызовы post_support_message с "Код подтверждения договора" ---
 import inspect
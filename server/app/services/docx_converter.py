@@ -0,0 +1,219 @@
+"""DOCX -> PDF conversion through a pool of warm LibreOffice profiles."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DOCX_TEMPLATE_PATH = Path(__file__).resolve().parents[1] / "templates" / "contracts" / "base_contract.docx"
+
+
+class DocxTemplateCache:
+    """Keeps the DOCX template in memory, re-reading it only when the file mtime changes.
+
+    docxtpl mutates the document while rendering, so each render gets a fresh
+    DocxTemplate built from the cached bytes instead of the disk file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._data: Optional[bytes] = None
+        self._digest: Optional[str] = None
+        self._mtime_ns: Optional[int] = None
+
+    def data(self) -> bytes:
+        try:
+            mtime_ns = self._path.stat().st_mtime_ns
+        except FileNotFoundError as exc:
+            raise RuntimeError(f"Contract template not found: {self._path}") from exc
+        with self._lock:
+            if self._data is None or mtime_ns != self._mtime_ns:
+                self._data = self._path.read_bytes()
+                self._digest = hashlib.sha256(self._data).hexdigest()[:12]
+                self._mtime_ns = mtime_ns
+            return self._data
+
+    def digest(self) -> str:
+        """Short content hash of the current template (part of the contract template version)."""
+        self.data()
+        return self._digest
+
+    def render(self, context: dict) -> bytes:
+        from docxtpl import DocxTemplate
+
+        tpl = DocxTemplate(BytesIO(self.data()))
+        tpl.render(context)
+        out = BytesIO()
+        tpl.save(out)
+        return out.getvalue()
+
+
+class _ConverterSlot:
+    def __init__(self, index: int, root: Path) -> None:
+        self.index = index
+        self.profile = root / f"profile-{index}"
+        self.warm = False
+        self.conversions = 0
+        self.failures = 0
+
+    def reset(self) -> None:
+        # профиль мог остаться в неконсистентном состоянии после таймаута/падения
+        shutil.rmtree(self.profile, ignore_errors=True)
+        self.warm = False
+
+
+class LibreOfficeConverterPool:
+    """Fixed number of LibreOffice converter slots.
+
+    Every slot owns its own user profile (`-env:UserInstallation`), so
+    conversions run in parallel without fighting over the profile lock and
+    skip the first-run profile setup after warm-up. A slot is health-checked
+    with a tiny conversion before first use and after any failure; each
+    conversion is killed after `timeout` seconds.
+
+    The binary is looked up on PATH once, in `start()`; until then the pool
+    is not available. Every conversion still starts its own soffice process,
+    which is why the pool is off by default (CONTRACT_DOCX_CONVERTERS=0).
+    """
+
+    def __init__(self, *, size: int, timeout: float, binary: str = "soffice") -> None:
+        self._size = max(0, size)
+        self._timeout = timeout
+        self._binary = binary
+        self._executable: Optional[str] = None
+        self._root: Optional[Path] = None
+        self._slots: list[_ConverterSlot] = []
+        self._idle: Optional[asyncio.Queue[_ConverterSlot]] = None
+
+    @property
+    def available(self) -> bool:
+        return self._executable is not None
+
+    def _queue(self) -> asyncio.Queue[_ConverterSlot]:
+        if self._idle is None:
+            self._root = Path(tempfile.mkdtemp(prefix="lo-pool-"))
+            self._slots = [_ConverterSlot(i, self._root) for i in range(self._size)]
+            self._idle = asyncio.Queue()
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    async def start(self) -> None:
+        """Resolves the binary and warms every slot; unhealthy slots are retried on first use."""
+        if self._size == 0:
+            return
+        self._executable = shutil.which(self._binary)
+        if self._executable is None:
+            logger.warning("LibreOffice binary %r not found, contracts are rendered with ReportLab", self._binary)
+            return
+        queue = self._queue()
+        slots = [queue.get_nowait() for _ in range(queue.qsize())]
+        try:
+            await asyncio.gather(*(self._ensure_warm(slot) for slot in slots), return_exceptions=True)
+        finally:
+            for slot in slots:
+                queue.put_nowait(slot)
+
+    async def convert(self, docx: bytes) -> bytes:
+        if not self.available:
+            raise RuntimeError(f"LibreOffice converter is not available ({self._binary})")
+        queue = self._queue()
+        slot = await queue.get()
+        try:
+            await self._ensure_warm(slot)
+            pdf = await self._convert_on(slot, docx, suffix=".docx")
+            slot.conversions += 1
+            return pdf
+        except Exception:
+            slot.failures += 1
+            slot.reset()
+            raise
+        finally:
+            queue.put_nowait(slot)
+
+    async def _ensure_warm(self, slot: _ConverterSlot) -> None:
+        if slot.warm:
+            return
+        try:
+            await self._convert_on(slot, b"ok\n", suffix=".txt")
+        except Exception:
+            slot.reset()
+            logger.warning("LibreOffice slot %s failed health check", slot.index, exc_info=True)
+            raise
+        slot.warm = True
+
+    async def _convert_on(self, slot: _ConverterSlot, data: bytes, *, suffix: str) -> bytes:
+        with tempfile.TemporaryDirectory(dir=self._root) as tmp:
+            workdir = Path(tmp)
+            src = workdir / f"contract{suffix}"
+            src.write_bytes(data)
+            proc = await asyncio.create_subprocess_exec(
+                self._executable,
+                f"-env:UserInstallation={slot.profile.as_uri()}",
+                "--headless",
+                "--norestore",
+                "--nologo",
+                "--nodefault",
+                "--nolockcheck",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                str(workdir),
+                str(src),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=self._timeout)
+            except asyncio.TimeoutError:
+                # soffice порождает soffice.bin — убиваем всю группу процессов
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+                raise TimeoutError(f"LibreOffice conversion timed out after {self._timeout}s")
+            pdf = workdir / "contract.pdf"
+            if proc.returncode != 0 or not pdf.exists():
+                raise RuntimeError(
+                    f"LibreOffice conversion failed (rc={proc.returncode}): {stderr.decode(errors='replace')[-500:]}"
+                )
+            return pdf.read_bytes()
+
+    def stats(self) -> dict:
+        return {
+            "size": self._size,
+            "warm": sum(1 for slot in self._slots if slot.warm),
+            "conversions": sum(slot.conversions for slot in self._slots),
+            "failures": sum(slot.failures for slot in self._slots),
+        }
+
+    def shutdown(self) -> None:
+        if self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+        self._executable = None
+        self._root = None
+        self._slots = []
+        self._idle = None
+
+
+docx_template_cache = DocxTemplateCache(DOCX_TEMPLATE_PATH)
+docx_converter = LibreOfficeConverterPool(
+    size=settings.CONTRACT_DOCX_CONVERTERS,
+    timeout=settings.CONTRACT_DOCX_TIMEOUT,
+    binary=settings.LIBREOFFICE_BINARY,
+)
@@ -0,0 +1,219 @@
+"""Serving the manager SPA build (frontend-manager/dist) from memory."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.http import etag_matches, parse_accept_encoding
+
+try:  # brotli есть в requirements.txt; если его всё же нет в окружении — отдаём gzip/identity
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+@dataclass
+class Representation:
+    body: bytes
+    etag: str
+    encoding: Optional[str] = None
+
+
+@dataclass
+class CompressedFile:
+    """One file with its identity body and precomputed encodings, each with its own strong ETag."""
+
+    variants: dict[Optional[str], Representation] = field(default_factory=dict)
+
+    @property
+    def etags(self) -> set[str]:
+        return {variant.etag for variant in self.variants.values()}
+
+    def select(self, accept_encoding: str | None) -> Representation:
+        accepted = parse_accept_encoding(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and (coding in accepted or "*" in accepted):
+                return self.variants[coding]
+        return self.variants[None]
+
+
+def compress_variants(data: bytes, digest: str) -> CompressedFile:
+    variants = {None: Representation(data, f'"{digest}"')}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        variants["gzip"] = Representation(gz, f'"{digest}-gz"', "gzip")
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            variants["br"] = Representation(br, f'"{digest}-br"', "br")
+    return CompressedFile(variants)
+
+
+class SpaShell:
+    """index.html held in memory with gzip/brotli variants and strong ETags.
+
+    The file is re-read only when its mtime/size change (a new build), so a
+    navigation costs one stat() instead of a read and a decode.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._stamp: Optional[tuple[int, int]] = None
+        self._file: Optional[CompressedFile] = None
+
+    def get(self) -> Optional[CompressedFile]:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._file is None or stamp != self._stamp:
+                data = self._path.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()[:32]
+                self._file = compress_variants(data, digest)
+                self._stamp = stamp
+            return self._file
+
+
+def serve_file(file: CompressedFile, request: Request, *, media_type: str, cache_control: str) -> Response:
+    """Best representation for the request's Accept-Encoding, or 304 when If-None-Match matches."""
+    representation = file.select(request.headers.get("accept-encoding"))
+    headers = {"ETag": representation.etag, "Vary": "Accept-Encoding", "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), file.etags):
+        return Response(status_code=304, headers=headers)
+    if representation.encoding:
+        headers["Content-Encoding"] = representation.encoding
+    return Response(content=representation.body, media_type=media_type, headers=headers)
+
+
+# Vite кладёт хэш содержимого в имя: index-BX3a9f2c.js, logo-4f1d2a9e.svg
+_HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# готовые сжатые «соседи»: app-1a2b3c4d.js.br / app-1a2b3c4d.js.gz
+_SIBLING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+@dataclass
+class AssetVariant:
+    path: Path
+    stat: os.stat_result
+    etag: str
+    encoding: Optional[str] = None
+
+
+@dataclass
+class AssetEntry:
+    media_type: str
+    cache_control: str
+    variants: dict[Optional[str], AssetVariant]
+
+    @property
+    def etags(self) -> set[str]:
+        return {variant.etag for variant in self.variants.values()}
+
+    def select(self, accept_encoding: str | None) -> AssetVariant:
+        accepted = parse_accept_encoding(accept_encoding)
+        for coding, _ in _SIBLING_SUFFIXES:
+            if coding in self.variants and (coding in accepted or "*" in accepted):
+                return self.variants[coding]
+        return self.variants[None]
+
+
+def _asset_etag(stat: os.stat_result, encoding: Optional[str]) -> str:
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}"'
+
+
+class AssetServer:
+    """ASGI app for the Vite `dist/assets` directory.
+
+    Keeps an in-memory index (url path -> stat, ETag, content type, `.br`/`.gz`
+    siblings), rebuilt only when the directory itself changes, so a request
+    costs one stat() of the directory. Hashed filenames get a one-year
+    `immutable` Cache-Control; anything else is revalidated by ETag.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._stamp: Optional[int] = None
+        self._index: dict[str, AssetEntry] = {}
+
+    def index(self) -> dict[str, AssetEntry]:
+        try:
+            stamp = self._directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if stamp != self._stamp:
+                self._index = self._scan()
+                self._stamp = stamp
+            return self._index
+
+    def _scan(self) -> dict[str, AssetEntry]:
+        files = {
+            path.relative_to(self._directory).as_posix(): path
+            for path in self._directory.rglob("*")
+            if path.is_file()
+        }
+        sibling_names = {name + suffix for name in files for _, suffix in _SIBLING_SUFFIXES}
+        index: dict[str, AssetEntry] = {}
+        for name, path in files.items():
+            if name in sibling_names:
+                continue
+            stat = path.stat()
+            variants = {None: AssetVariant(path, stat, _asset_etag(stat, None))}
+            for coding, suffix in _SIBLING_SUFFIXES:
+                sibling = files.get(name + suffix)
+                if sibling is not None:
+                    sibling_stat = sibling.stat()
+                    variants[coding] = AssetVariant(sibling, sibling_stat, _asset_etag(sibling_stat, coding), coding)
+            index[name] = AssetEntry(
+                media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                cache_control=IMMUTABLE_CACHE_CONTROL if _HASHED_NAME.search(name) else REVALIDATE_CACHE_CONTROL,
+                variants=variants,
+            )
+        return index
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            await Response(status_code=405, headers={"Allow": "GET, HEAD"})(scope, receive, send)
+            return
+        entry = self.index().get(scope["path"].lstrip("/"))
+        if entry is None:
+            await Response("Not Found", status_code=404, media_type="text/plain")(scope, receive, send)
+            return
+
+        variant = entry.select(request.headers.get("accept-encoding"))
+        headers = {"ETag": variant.etag, "Cache-Control": entry.cache_control}
+        if len(entry.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(request.headers.get("if-none-match"), entry.etags):
+            response: Response = Response(status_code=304, headers=headers)
+        else:
+            if variant.encoding:
+                headers["Content-Encoding"] = variant.encoding
+            response = FileResponse(
+                variant.path,
+                headers=headers,
+                media_type=entry.media_type,
+                stat_result=variant.stat,
+                method=request.method,
+            )
+        await response(scope, receive, send)
@@ -0,0 +1,244 @@
+"""Transactional outbox: side effects are written with the business change and delivered in the background."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import async_session_maker, save_changes, unit_of_work
+from app.core.mailer import send_email
+from app.manager_api.models import ManagerClient
+from app.models.outbox import OutboxMessage, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+SUPPORT_MESSAGE = "support_message"
+EMAIL = "email"
+
+# session.info key: the transaction added outbox rows — wake the dispatcher after commit
+_PENDING_KEY = "outbox_pending"
+
+Handler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+
+async def enqueue(db: AsyncSession, kind: str, payload: dict) -> OutboxMessage:
+    """Record a side effect in the caller's transaction; it is delivered after commit."""
+    message = OutboxMessage(kind=kind, payload=payload)
+    db.add(message)
+    db.info[_PENDING_KEY] = True
+    await save_changes(db)
+    return message
+
+
+async def enqueue_support_message(db: AsyncSession, *, client: ManagerClient, subject: str, body: str) -> OutboxMessage:
+    """SupportBridgeService.ensure_ticket + post_support_message, deferred."""
+    return await enqueue(db, SUPPORT_MESSAGE, {"client_id": str(client.id), "subject": subject, "body": body})
+
+
+async def enqueue_email(
+    db: AsyncSession,
+    *,
+    subject: str,
+    body_text: str,
+    to: Iterable[str],
+    html_body: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> OutboxMessage:
+    """core.mailer.send_email, deferred."""
+    payload = {"subject": subject, "body_text": body_text, "to": list(to), "html_body": html_body, "headers": headers}
+    return await enqueue(db, EMAIL, payload)
+
+
+async def _deliver_support_message(db: AsyncSession, payload: dict) -> None:
+    from app.services.support_bridge import SupportBridgeService  # локальный импорт, чтобы избежать циклов
+
+    client = await db.get(ManagerClient, payload["client_id"])
+    if client is None:
+        raise LookupError(f"Manager client {payload['client_id']} not found")
+    bridge = SupportBridgeService(db)
+    ticket = await bridge.ensure_ticket(client, subject=payload["subject"])
+    await bridge.post_support_message(ticket=ticket, body=payload["body"])
+
+
+async def _deliver_email(db: AsyncSession, payload: dict) -> None:
+    sent = await send_email(
+        payload["subject"],
+        payload["body_text"],
+        payload["to"],
+        html_body=payload.get("html_body"),
+        headers=payload.get("headers"),
+    )
+    if not sent:
+        raise RuntimeError("Email was not sent")
+
+
+HANDLERS: dict[str, Handler] = {
+    SUPPORT_MESSAGE: _deliver_support_message,
+    EMAIL: _deliver_email,
+}
+
+
+class OutboxDispatcher:
+    """Background loop that delivers pending outbox rows.
+
+    A round claims up to `batch_size` due rows in one short statement
+    (UPDATE … WHERE id IN (SELECT … FOR UPDATE SKIP LOCKED) RETURNING): the
+    attempt is counted and the row is leased for `claim_timeout` seconds, then
+    the locks are released. Rows are delivered concurrently, at most
+    `concurrency` at a time, each on its own session; a handler's database
+    work commits together with the row's `done` state. A failed row is retried
+    with exponential backoff (`backoff_base` * 2^n, capped at `backoff_max`)
+    and marked failed after `max_attempts`; a row whose worker died comes back
+    when its lease runs out. The loop wakes right after a commit that added
+    rows, otherwise every `poll_interval`.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+        handlers: Optional[dict[str, Handler]] = None,
+        batch_size: int,
+        concurrency: int = 1,
+        claim_timeout: float = 300.0,
+        poll_interval: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._handlers = HANDLERS if handlers is None else handlers
+        self._batch_size = max(1, batch_size)
+        self._concurrency = max(1, concurrency)
+        self._claim_timeout = timedelta(seconds=claim_timeout)
+        self._poll_interval = poll_interval
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+
+    def wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self._backoff_max, self._backoff_base * 2 ** (attempts - 1)))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                processed = 0
+            if processed >= self._batch_size:
+                continue  # очередь не пуста — забираем следующую пачку сразу
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch of due rows; returns how many rows were attempted."""
+        messages = await self._claim()
+        slots = asyncio.Semaphore(self._concurrency)
+
+        async def deliver(message: OutboxMessage) -> None:
+            async with slots:
+                await self._deliver(message)
+
+        # письма уходят одновременно — mailer успевает собрать их в пачки на одной SMTP-сессии
+        await asyncio.gather(*(deliver(message) for message in messages))
+        return len(messages)
+
+    async def _claim(self) -> list[OutboxMessage]:
+        async with self._session_factory() as db:
+            async with unit_of_work(db):
+                now = datetime.now(timezone.utc)
+                due = (
+                    select(OutboxMessage.id)
+                    .where(OutboxMessage.status == OutboxStatus.pending.value, OutboxMessage.available_at <= now)
+                    .order_by(OutboxMessage.available_at)
+                    .limit(self._batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                claim = (
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(due.scalar_subquery()))
+                    .values(attempts=OutboxMessage.attempts + 1, available_at=now + self._claim_timeout)
+                    .returning(OutboxMessage)
+                )
+                stmt = select(OutboxMessage).from_statement(claim).execution_options(populate_existing=True)
+                return list((await db.execute(stmt)).scalars())
+
+    async def _deliver(self, message: OutboxMessage) -> None:
+        handler = self._handlers.get(message.kind)
+        async with self._session_factory() as db:
+            try:
+                async with unit_of_work(db):
+                    if handler is None:
+                        raise LookupError(f"No outbox handler for kind {message.kind!r}")
+                    await handler(db, message.payload)
+                    await self._record(
+                        db,
+                        message,
+                        status=OutboxStatus.done.value,
+                        processed_at=datetime.now(timezone.utc),
+                        last_error=None,
+                    )
+                return
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"[:2000]
+            async with unit_of_work(db):
+                if message.attempts >= self._max_attempts:
+                    await self._record(db, message, status=OutboxStatus.failed.value, last_error=error)
+                    logger.error("Outbox %s %s failed permanently: %s", message.kind, message.id, error)
+                else:
+                    available_at = datetime.now(timezone.utc) + self.backoff(message.attempts)
+                    await self._record(db, message, available_at=available_at, last_error=error)
+                    logger.warning("Outbox %s %s attempt %s failed: %s", message.kind, message.id, message.attempts, error)
+
+    @staticmethod
+    async def _record(db: AsyncSession, message: OutboxMessage, **values) -> None:
+        await db.execute(update(OutboxMessage).where(OutboxMessage.id == message.id).values(**values))
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    claim_timeout=settings.OUTBOX_CLAIM_TIMEOUT,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.OUTBOX_BACKOFF_BASE,
+    backoff_max=settings.OUTBOX_BACKOFF_MAX,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        outbox_dispatcher.wake()
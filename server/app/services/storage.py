@@ -2,12 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import hmac
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
+from urllib.parse import quote, urlsplit
 
 import boto3
 from botocore.client import BaseClient, Config
+from botocore.exceptions import ClientError
 
 from app.core.config import settings
 import os
@@ -19,6 +30,81 @@ S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY", "minioadmin")
 S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "minioadmin")
 S3_BUCKET = os.getenv("S3_BUCKET", "privet-bucket")
 
+T = TypeVar("T")
+
+
+def _client_config() -> Config:
+    return Config(
+        signature_version="s3v4",
+        s3={"addressing_style": "path"},  # MinIO
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.S3_CONNECT_TIMEOUT,
+        read_timeout=settings.S3_READ_TIMEOUT,
+        tcp_keepalive=settings.S3_TCP_KEEPALIVE,
+    )
+
+
+def _public_endpoint() -> str:
+    return os.getenv("S3_PUBLIC_ENDPOINT") or getattr(settings, "S3_PUBLIC_ENDPOINT", None) or settings.S3_ENDPOINT
+
+
+class S3ClientRegistry:
+    """Application-wide boto3 clients sharing one pooled config.
+
+    "internal" talks to S3_ENDPOINT, "public" signs URLs for S3_PUBLIC_ENDPOINT.
+    open()/close() are called from the FastAPI lifespan; outside the app
+    (scripts, tests) clients are created lazily on first use.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clients: dict[str, BaseClient] = {}
+
+    def _endpoint(self, name: str) -> str:
+        if name == "internal":
+            return settings.S3_ENDPOINT
+        if name == "public":
+            return _public_endpoint()
+        raise KeyError(name)
+
+    def get(self, name: str = "internal") -> BaseClient:
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = boto3.client(
+                        "s3",
+                        endpoint_url=self._endpoint(name),
+                        aws_access_key_id=settings.S3_ACCESS_KEY,
+                        aws_secret_access_key=settings.S3_SECRET_KEY,
+                        region_name=settings.S3_REGION,
+                        config=_client_config(),
+                    )
+                    self._clients[name] = client
+        return client
+
+    def open(self) -> None:
+        self.get("internal")
+        self.get("public")
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+
+# S3 requires every multipart part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
 @dataclass
 class PresignedPost:
     url: str
@@ -26,34 +112,132 @@ class PresignedPost:
     file_key: str
 
 
+class PresignedUrlCache:
+    """Bounded LRU of presigned URLs keyed by (object key, expires).
+
+    An entry is served until `refresh_fraction` of its lifetime has passed,
+    so a returned URL always stays valid for the rest of that window.
+    """
+
+    def __init__(self, *, maxsize: int, refresh_fraction: float) -> None:
+        self._maxsize = max(0, maxsize)
+        self._refresh_fraction = min(max(refresh_fraction, 0.0), 1.0)
+        self._entries: OrderedDict[tuple[str, int], tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, expires: int) -> str | None:
+        with self._lock:
+            entry = self._entries.get((key, expires))
+            if entry is not None:
+                url, issued_at = entry
+                if time.monotonic() - issued_at < expires * self._refresh_fraction:
+                    self._entries.move_to_end((key, expires))
+                    self.hits += 1
+                    return url
+                del self._entries[(key, expires)]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, expires: int, url: str) -> None:
+        if self._maxsize == 0:
+            return
+        with self._lock:
+            self._entries[(key, expires)] = (url, time.monotonic())
+            self._entries.move_to_end((key, expires))
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == key]:
+                del self._entries[cache_key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class SigV4QuerySigner:
+    """Minimal SigV4 query-string signer for path-style S3 GET URLs.
+
+    Produces the same URLs as boto3's generate_presigned_url("get_object")
+    with path addressing, but skips botocore's request pipeline. The derived
+    signing key is cached per (date, region).
+    """
+
+    _ALGORITHM = "AWS4-HMAC-SHA256"
+
+    def __init__(self, *, endpoint: str, access_key: str, secret_key: str, region: str) -> None:
+        parts = urlsplit(endpoint)
+        self._origin = f"{parts.scheme}://{parts.netloc}"
+        self._base_path = parts.path.rstrip("/")
+        self._host = parts.netloc
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._region = region
+        self._signing_key: tuple[str, bytes] | None = None
+
+    def _key_for(self, datestamp: str) -> bytes:
+        cached = self._signing_key
+        if cached is not None and cached[0] == datestamp:
+            return cached[1]
+        key = ("AWS4" + self._secret_key).encode("utf-8")
+        for part in (datestamp, self._region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+        self._signing_key = (datestamp, key)
+        return key
+
+    def presign_get(
+        self,
+        bucket: str,
+        keys: Iterable[str],
+        *,
+        expires: int,
+        now: datetime | None = None,
+    ) -> dict[str, str]:
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = amz_date[:8]
+        scope = f"{datestamp}/{self._region}/s3/aws4_request"
+        signing_key = self._key_for(datestamp)
+        # Everything but the path is shared by all keys in the batch
+        query = (
+            f"X-Amz-Algorithm={self._ALGORITHM}"
+            f"&X-Amz-Credential={quote(f'{self._access_key}/{scope}', safe='~')}"
+            f"&X-Amz-Date={amz_date}"
+            f"&X-Amz-Expires={int(expires)}"
+            f"&X-Amz-SignedHeaders=host"
+        )
+        request_tail = f"\n{query}\nhost:{self._host}\n\nhost\nUNSIGNED-PAYLOAD"
+        sts_prefix = f"{self._ALGORITHM}\n{amz_date}\n{scope}\n"
+
+        urls: dict[str, str] = {}
+        for key in keys:
+            path = quote(f"{self._base_path}/{bucket}/{key.lstrip('/')}", safe="/~")
+            canonical_request = "GET\n" + path + request_tail
+            string_to_sign = sts_prefix + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+            signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+            urls[key] = f"{self._origin}{path}?{query}&X-Amz-Signature={signature}"
+        return urls
+
+
 class StorageService:
-    def __init__(self) -> None:
+    def __init__(self, clients: S3ClientRegistry) -> None:
         self._bucket = settings.S3_BUCKET
-        self._client: Optional[BaseClient] = None
-        self._public_client: Optional[BaseClient] = None
+        self._clients = clients
+        self._signer: Optional[SigV4QuerySigner] = None
+        self._presigned_get_cache = PresignedUrlCache(
+            maxsize=settings.PRESIGNED_URL_CACHE_SIZE,
+            refresh_fraction=settings.PRESIGNED_URL_CACHE_REFRESH_FRACTION,
+        )
 
     def _client_or_init(self) -> BaseClient:
-        if self._client is None:
-            self._client = boto3.client(
-                "s3",
-                endpoint_url=settings.S3_ENDPOINT,
-                aws_access_key_id=settings.S3_ACCESS_KEY,
-                aws_secret_access_key=settings.S3_SECRET_KEY,
-                config=Config(signature_version="s3v4"),
-            )
-        return self._client
+        return self._clients.get("internal")
 
     def _public_client_or_init(self) -> BaseClient:
-        if self._public_client is None:
-            public_endpoint = os.getenv("S3_PUBLIC_ENDPOINT") or getattr(settings, "S3_PUBLIC_ENDPOINT", None) or settings.S3_ENDPOINT
-            self._public_client = boto3.client(
-                "s3",
-                endpoint_url=public_endpoint,
-                aws_access_key_id=settings.S3_ACCESS_KEY,
-                aws_secret_access_key=settings.S3_SECRET_KEY,
-                config=Config(signature_version="s3v4"),
-            )
-        return self._public_client
+        return self._clients.get("public")
 
     @property
     def bucket(self) -> str:
@@ -75,10 +259,49 @@ class StorageService:
         )
         return PresignedPost(url=presigned["url"], fields=presigned["fields"], file_key=file_key)
 
-    def upload_bytes(self, *, key: str, data: bytes, content_type: str = "application/octet-stream") -> str:
-        self._client_or_init().put_object(Bucket=self._bucket, Key=key, Body=data, ContentType=content_type)
+    def upload_bytes(
+        self,
+        *,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        metadata: dict[str, str] | None = None,
+    ) -> str:
+        extra = {"Metadata": metadata} if metadata else {}
+        self._client_or_init().put_object(Bucket=self._bucket, Key=key, Body=data, ContentType=content_type, **extra)
         return key
 
+    def create_multipart_upload(self, *, key: str, content_type: str) -> str:
+        resp = self._client_or_init().create_multipart_upload(Bucket=self._bucket, Key=key, ContentType=content_type)
+        return resp["UploadId"]
+
+    def upload_part(self, *, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        resp = self._client_or_init().upload_part(
+            Bucket=self._bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data
+        )
+        return resp["ETag"]
+
+    def complete_multipart_upload(self, *, key: str, upload_id: str, etags: list[str]) -> None:
+        self._client_or_init().complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"ETag": etag, "PartNumber": i} for i, etag in enumerate(etags, start=1)]},
+        )
+
+    def abort_multipart_upload(self, *, key: str, upload_id: str) -> None:
+        self._client_or_init().abort_multipart_upload(Bucket=self._bucket, Key=key, UploadId=upload_id)
+
+    def get_metadata(self, *, key: str) -> dict[str, str] | None:
+        """Return user metadata of an object, or None if it does not exist."""
+        try:
+            resp = self._client_or_init().head_object(Bucket=self._bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return resp.get("Metadata") or {}
+
     def get_bytes(self, *, key: str) -> bytes:
         resp = self._client_or_init().get_object(Bucket=self._bucket, Key=key)
         return resp["Body"].read()
@@ -89,19 +312,185 @@ class StorageService:
         Prefers S3_PUBLIC_ENDPOINT if it is set (useful when MinIO is behind
         ngrok/Nginx), otherwise falls back to internal S3_ENDPOINT.
         """
-        public_endpoint = os.getenv("S3_PUBLIC_ENDPOINT") or getattr(settings, "S3_PUBLIC_ENDPOINT", None) or settings.S3_ENDPOINT
-        return f"{public_endpoint.rstrip('/')}/{self._bucket}/{key.lstrip('/')}"
+        return f"{_public_endpoint().rstrip('/')}/{self._bucket}/{key.lstrip('/')}"
 
     def generate_presigned_get_url(self, key: str, expires: int = 60 * 60 * 24 * 7) -> str:
-        """Return a time-limited URL for private objects."""
-        return self._public_client_or_init().generate_presigned_url(
-            "get_object",
-            Params={"Bucket": self._bucket, "Key": key},
-            ExpiresIn=expires,
-        )
+        """Return a time-limited URL for private objects (cached, see PresignedUrlCache)."""
+        url = self._presigned_get_cache.get(key, expires)
+        if url is None:
+            url = self._public_client_or_init().generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self._bucket, "Key": key},
+                ExpiresIn=expires,
+            )
+            self._presigned_get_cache.put(key, expires, url)
+        return url
+
+    def _signer_or_init(self) -> SigV4QuerySigner:
+        if self._signer is None:
+            self._signer = SigV4QuerySigner(
+                endpoint=_public_endpoint(),
+                access_key=settings.S3_ACCESS_KEY,
+                secret_key=settings.S3_SECRET_KEY,
+                region=settings.S3_REGION,
+            )
+        return self._signer
+
+    def presign_many(self, keys: Iterable[str], expires: int = 60 * 60 * 24 * 7) -> dict[str, str]:
+        """Return {key: presigned GET URL} for all keys, signing cache misses in one batch."""
+        urls: dict[str, str] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            url = self._presigned_get_cache.get(key, expires)
+            if url is None:
+                missing.append(key)
+            else:
+                urls[key] = url
+        if missing:
+            signed = self._signer_or_init().presign_get(self._bucket, missing, expires=expires)
+            for key, url in signed.items():
+                self._presigned_get_cache.put(key, expires, url)
+            urls.update(signed)
+        return urls
+
+    def presigned_cache_stats(self) -> dict[str, int]:
+        return self._presigned_get_cache.stats()
 
     def delete_object(self, key: str) -> None:
         self._client_or_init().delete_object(Bucket=self._bucket, Key=key)
+        self._presigned_get_cache.invalidate(key)
+
+
+class AsyncStorageService:
+    """Non-blocking facade over StorageService for use in async route handlers.
+
+    Blocking boto3 calls run on a dedicated bounded thread pool (S3_IO_WORKERS)
+    and are limited by S3_CALL_TIMEOUT. Signing helpers do no I/O and are
+    delegated as-is. The sync StorageService remains available for scripts.
+    """
+
+    def __init__(self, sync: StorageService, *, max_workers: int, call_timeout: float) -> None:
+        self._sync = sync
+        self._max_workers = max(1, max_workers)
+        self._call_timeout = call_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def bucket(self) -> str:
+        return self._sync.bucket
+
+    def _executor_or_init(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="storage-io")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: float | None = None, **kwargs: Any) -> T:
+        """Run a blocking storage call on the storage thread pool."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor_or_init(), functools.partial(fn, *args, **kwargs))
+        return await asyncio.wait_for(future, timeout=timeout or self._call_timeout)
+
+    async def upload_bytes(
+        self,
+        *,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        metadata: dict[str, str] | None = None,
+    ) -> str:
+        return await self.run(self._sync.upload_bytes, key=key, data=data, content_type=content_type, metadata=metadata)
+
+    async def upload_stream(
+        self,
+        *,
+        key: str,
+        read: Callable[[int], Awaitable[bytes]],
+        content_type: str = "application/octet-stream",
+        part_size: int,
+        max_bytes: int,
+    ) -> int:
+        """Upload from an async `read(n)` source in parts of `part_size` bytes.
+
+        At most two parts are held in memory. Sources that fit into one part go
+        through a single put_object; larger ones through multipart upload, which
+        is aborted on any error. Raises UploadTooLarge once more than
+        `max_bytes` have been read. Returns the number of bytes stored.
+        """
+        part_size = max(part_size, MIN_PART_SIZE)
+
+        async def read_part() -> bytes:
+            chunks: list[bytes] = []
+            size = 0
+            while size < part_size:
+                chunk = await read(part_size - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            return b"".join(chunks)
+
+        part = await read_part()
+        total = len(part)
+        if total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        next_part = await read_part() if len(part) == part_size else b""
+        if not next_part:
+            await self.upload_bytes(key=key, data=part, content_type=content_type)
+            return total
+
+        upload_id = await self.run(self._sync.create_multipart_upload, key=key, content_type=content_type)
+        etags: list[str] = []
+        try:
+            while part:
+                total += len(next_part)
+                if total > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                etags.append(
+                    await self.run(
+                        self._sync.upload_part, key=key, upload_id=upload_id, part_number=len(etags) + 1, data=part
+                    )
+                )
+                part, next_part = next_part, (await read_part() if next_part else b"")
+            await self.run(self._sync.complete_multipart_upload, key=key, upload_id=upload_id, etags=etags)
+        except BaseException:
+            try:
+                await self.run(self._sync.abort_multipart_upload, key=key, upload_id=upload_id)
+            except Exception:
+                pass
+            raise
+        return total
+
+    async def get_metadata(self, *, key: str) -> dict[str, str] | None:
+        return await self.run(self._sync.get_metadata, key=key)
+
+    async def get_bytes(self, *, key: str) -> bytes:
+        return await self.run(self._sync.get_bytes, key=key)
+
+    async def delete_object(self, key: str) -> None:
+        await self.run(self._sync.delete_object, key)
+
+    def generate_presigned_post(self, *, key_prefix: str, content_type: str | None = None, expires: int = 600) -> PresignedPost:
+        return self._sync.generate_presigned_post(key_prefix=key_prefix, content_type=content_type, expires=expires)
+
+    def generate_presigned_get_url(self, key: str, expires: int = 60 * 60 * 24 * 7) -> str:
+        return self._sync.generate_presigned_get_url(key, expires)
+
+    def presign_many(self, keys: Iterable[str], expires: int = 60 * 60 * 24 * 7) -> dict[str, str]:
+        return self._sync.presign_many(keys, expires)
+
+    def get_public_url(self, key: str) -> str:
+        return self._sync.get_public_url(key)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
 
-storage_service = StorageService()
+s3_clients = S3ClientRegistry()
+storage_service = StorageService(s3_clients)
+async_storage_service = AsyncStorageService(
+    storage_service,
+    max_workers=settings.S3_IO_WORKERS,
+    call_timeout=settings.S3_CALL_TIMEOUT,
+)
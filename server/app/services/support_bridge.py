@@ -3,14 +3,55 @@
 from __future__ import annotations
 
 import uuid
-from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import event, exists, false, func, insert, literal, select, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.database import save_changes
 from app.manager_api.models import ManagerClient
 from app.models.support import SupportTicket, SupportMessage, MessageAuthor, SupportCaseStatus
 
+DEFAULT_SUBJECT = "Оформление договора"
+
+# session.info key: (client_id, subject) -> (SupportTicket, транзакция/savepoint, где он получен)
+_MEMO_KEY = "support_ticket_memo"
+# session.info key: [(транзакция, client, support_ticket_id до привязки)] — чтобы вернуть его при откате
+_LINKS_KEY = "support_ticket_links"
+
+
+def _current_transaction(session: Session) -> SessionTransaction | None:
+    return session.get_nested_transaction() or session.get_transaction()
+
+
+def _within(transaction: SessionTransaction | None, rolled_back: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is rolled_back:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_tickets(session: Session, previous_transaction: SessionTransaction) -> None:
+    # тикет из INSERT … RETURNING сессия не считает новым: после отката savepoint он остаётся
+    # persistent, хотя строки уже нет, — поэтому записи откаченной транзакции выкидываем сами
+    memo = session.info.get(_MEMO_KEY)
+    if memo:
+        for key, (ticket, transaction) in list(memo.items()):
+            if _within(transaction, previous_transaction):
+                del memo[key]
+                if ticket in session:
+                    session.expunge(ticket)
+    links = session.info.get(_LINKS_KEY)
+    if links:
+        for entry in reversed(list(links)):
+            transaction, client, previous_id = entry
+            if _within(transaction, previous_transaction):
+                set_committed_value(client, "support_ticket_id", previous_id)
+                links.remove(entry)
+
 
 class SupportBridgeService:
     def __init__(self, db: AsyncSession) -> None:
@@ -23,60 +64,77 @@ class SupportBridgeService:
         subject: str | None = None,
         force_new: bool = False,
     ) -> SupportTicket:
-        if client.support_ticket_id and not force_new:
-            ticket = await self.db.get(SupportTicket, client.support_ticket_id)
-            if ticket and (subject is None or ticket.subject == subject):
-                return ticket
+        """Ticket for the client, found or created in a single statement.
 
-        ticket = None
-        if not force_new:
-            if subject:
-                ticket = await self._find_existing_ticket_by_subject(client.user_id, subject)
-            if ticket is None:
-                ticket = await self._find_existing_ticket(client.user_id)
-
-        if ticket is None or (subject and ticket.subject != subject):
-            ticket = await self._create_ticket(client.user_id, subject=subject)
+        Without `subject` the client's linked ticket wins, then the user's latest
+        one; with `subject` only tickets with that subject qualify. A new ticket
+        is inserted when nothing matches (or `force_new`), and the client link is
+        updated in the same statement. Repeated calls within the session are
+        answered from a memo without touching the database; rolling back the
+        transaction or savepoint the ticket came from drops it from the memo
+        and restores the client's previous link.
+        """
+        memo = self.db.info.setdefault(_MEMO_KEY, {})
+        key = (client.id, subject)
+        if key in memo and not force_new:
+            return memo[key][0]
 
+        stmt = select(SupportTicket).from_statement(self._ensure_ticket_stmt(client, subject, force_new))
+        ticket = (await self.db.scalars(stmt)).one()
+        transaction = _current_transaction(self.db.sync_session)
         if client.support_ticket_id != ticket.id:
-            client.support_ticket_id = ticket.id
-            await self.db.commit()
-            await self.db.refresh(client)
-
+            self.db.info.setdefault(_LINKS_KEY, []).append((transaction, client, client.support_ticket_id))
+        # manager_clients уже обновлён тем же запросом: синхронизируем объект без повторного UPDATE
+        set_committed_value(client, "support_ticket_id", ticket.id)
+        memo[key] = (ticket, transaction)
         return ticket
 
     async def post_support_message(self, *, ticket: SupportTicket, body: str) -> SupportMessage:
         message = SupportMessage(ticket_id=ticket.id, author=MessageAuthor.support, body=body)
         self.db.add(message)
-        await self.db.commit()
-        await self.db.refresh(message)
+        await save_changes(self.db)
         return message
 
-    async def _find_existing_ticket_by_subject(self, user_id: uuid.UUID, subject: str) -> Optional[SupportTicket]:
-        stmt = (
-            select(SupportTicket)
-            .where(SupportTicket.user_id == user_id, SupportTicket.subject == subject)
-            .order_by(SupportTicket.created_at.desc())
-        )
-        result = await self.db.execute(stmt)
-        return result.scalars().first()
-
-    async def _find_existing_ticket(self, user_id: uuid.UUID) -> Optional[SupportTicket]:
-        stmt = (
-            select(SupportTicket)
-            .where(SupportTicket.user_id == user_id)
-            .order_by(SupportTicket.created_at.desc())
+    @staticmethod
+    def _ensure_ticket_stmt(client: ManagerClient, subject: str | None, force_new: bool):
+        """WITH found / created (INSERT … WHERE NOT EXISTS found) / linked (UPDATE manager_clients).
+
+        Lookup goes through ix_support_tickets_user_subject_created.
+        """
+        tickets = SupportTicket.__table__
+        clients = ManagerClient.__table__
+
+        order = [tickets.c.created_at.desc()]
+        if client.support_ticket_id is not None:
+            order.insert(0, (tickets.c.id == client.support_ticket_id).desc())
+        found = select(tickets).where(tickets.c.user_id == client.user_id)
+        if subject:
+            found = found.where(tickets.c.subject == subject)
+        if force_new:
+            found = found.where(false())
+        found = found.order_by(*order).limit(1).cte("found")
+
+        values = select(
+            literal(uuid.uuid4(), tickets.c.id.type),
+            literal(client.user_id, tickets.c.user_id.type),
+            literal(subject or DEFAULT_SUBJECT, tickets.c.subject.type),
+            literal(SupportCaseStatus.open, tickets.c.status.type),
+            func.now(),
+            func.now(),
+        ).where(~exists(select(found.c.id)))
+        created = (
+            insert(tickets)
+            .from_select(["id", "user_id", "subject", "status", "created_at", "updated_at"], values)
+            .returning(*tickets.c)
+            .cte("created")
         )
-        result = await self.db.execute(stmt)
-        return result.scalars().first()
-
-    async def _create_ticket(self, user_id: uuid.UUID, *, subject: str | None = None) -> SupportTicket:
-        ticket = SupportTicket(
-            user_id=user_id,
-            subject=subject or "Оформление договора",
-            status=SupportCaseStatus.open,
+        ticket = union_all(select(found), select(created)).cte("ticket")
+
+        ticket_id = select(ticket.c.id).scalar_subquery()
+        linked = (
+            update(clients)
+            .where(clients.c.id == client.id, clients.c.support_ticket_id.is_distinct_from(ticket_id))
+            .values(support_ticket_id=ticket_id, updated_at=func.now())
+            .cte("linked")
         )
-        self.db.add(ticket)
-        await self.db.commit()
-        await self.db.refresh(ticket)
-        return ticket
+        return select(ticket).add_cte(linked)
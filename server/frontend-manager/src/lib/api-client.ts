@@ -109,8 +109,11 @@ async function authorizedFetch<T>(path: string, { token, ...init }: FetchOptions
 
 export function createApiClient(token: string) {
   return {
-    getClients(tab: string) {
-      return authorizedFetch<ClientSummary[]>(`/clients?tab=${encodeURIComponent(tab)}`, {
+    getClients(tab: string, { q, cursor }: { q?: string; cursor?: string | null } = {}) {
+      const params = new URLSearchParams({ tab })
+      if (q) params.set('q', q)
+      if (cursor) params.set('cursor', cursor)
+      return authorizedFetch<ClientsPage>(`/clients?${params.toString()}`, {
         token,
         method: 'GET',
       })
@@ -269,6 +272,11 @@ export type ClientSummary = {
   registration_address?: string | null
 }
 
+export type ClientsPage = {
+  items: ClientSummary[]
+  next_cursor: string | null
+}
+
 export type ClientDetail = {
   id: string
   status: string
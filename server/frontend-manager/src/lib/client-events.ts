@@ -0,0 +1,129 @@
+import { useEffect, useState } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+import { clearAccessToken } from './auth'
+import { useAuth } from './auth-context'
+
+const API_BASE = import.meta.env.VITE_API_BASE ?? '/api/manager'
+
+export type ClientEvent = {
+  type: 'client.created' | 'client.status_changed' | 'client.assigned' | 'resync'
+  client_id?: string
+  status?: string
+  assigned_manager_id?: string | null
+}
+
+type StreamOptions = {
+  token: string
+  signal: AbortSignal
+  onOpen: () => void
+  onClose: () => void
+  onEvent: (event: ClientEvent) => void
+}
+
+const DEFAULT_RETRY_MS = 3000
+
+function sleep(ms: number, signal: AbortSignal) {
+  return new Promise<void>((resolve) => {
+    const timer = setTimeout(resolve, ms)
+    signal.addEventListener('abort', () => {
+      clearTimeout(timer)
+      resolve()
+    }, { once: true })
+  })
+}
+
+// SSE через fetch: EventSource не умеет передавать заголовок Authorization
+export async function streamClientEvents({ token, signal, onOpen, onClose, onEvent }: StreamOptions) {
+  let retryMs = DEFAULT_RETRY_MS
+  while (!signal.aborted) {
+    try {
+      const response = await fetch(`${API_BASE}/clients/events`, {
+        headers: { Accept: 'text/event-stream', Authorization: `Bearer ${token}` },
+        cache: 'no-store',
+        signal,
+      })
+      if (response.status === 401) {
+        clearAccessToken()
+        window.location.replace('/')
+        return
+      }
+      if (!response.ok || !response.body) throw new Error(`events stream: HTTP ${response.status}`)
+      onOpen()
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value.replace(/\r\n?/g, '\n')
+        let boundary: number
+        while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+          const frame = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          const data: string[] = []
+          for (const line of frame.split('\n')) {
+            if (line.startsWith(':')) continue // heartbeat
+            const sep = line.indexOf(':')
+            const field = sep >= 0 ? line.slice(0, sep) : line
+            const text = sep >= 0 ? line.slice(sep + 1).replace(/^ /, '') : ''
+            if (field === 'data') data.push(text)
+            else if (field === 'retry' && /^\d+$/.test(text)) retryMs = Number(text)
+          }
+          if (data.length) {
+            try {
+              onEvent(JSON.parse(data.join('\n')) as ClientEvent)
+            } catch {
+              // битый кадр пропускаем, поток продолжаем
+            }
+          }
+        }
+      }
+    } catch (error) {
+      if (signal.aborted) return
+      try { console.warn('[client events]', error) } catch {}
+    }
+    // обрыв: пока нас не было, события могли потеряться — список перечитываем
+    onClose()
+    onEvent({ type: 'resync' })
+    await sleep(retryMs, signal)
+  }
+}
+
+/**
+ * Keeps the cached client lists fresh from the server's change stream.
+ * Returns true while the stream is connected, so list queries can stop
+ * refetching on focus/mount and only reload when something changed.
+ */
+export function useClientEvents(): boolean {
+  const { token } = useAuth()
+  const queryClient = useQueryClient()
+  const [connected, setConnected] = useState(false)
+
+  useEffect(() => {
+    const controller = new AbortController()
+    let timer: ReturnType<typeof setTimeout> | undefined
+    // пачку событий (например, массовый импорт) склеиваем в одну перезагрузку
+    const invalidate = () => {
+      clearTimeout(timer)
+      timer = setTimeout(() => {
+        queryClient.invalidateQueries({ queryKey: ['clients'] })
+      }, 300)
+    }
+
+    streamClientEvents({
+      token,
+      signal: controller.signal,
+      onOpen: () => setConnected(true),
+      onClose: () => setConnected(false),
+      onEvent: invalidate,
+    })
+
+    return () => {
+      controller.abort()
+      clearTimeout(timer)
+      setConnected(false)
+    }
+  }, [token, queryClient])
+
+  return connected
+}
@@ -1,7 +1,8 @@
-import { useMemo, useState } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import { useNavigate, useSearchParams } from 'react-router-dom'
-import { useQuery } from '@tanstack/react-query'
+import { useInfiniteQuery } from '@tanstack/react-query'
 import { useApi } from '../../lib/use-api'
+import { useClientEvents } from '../../lib/client-events'
 import NewIcon from '../../assets/icons/new.svg?react'
 import DoneIcon from '../../assets/icons/done.svg?react'
 import MyIcon from '../../assets/icons/my.svg?react'
@@ -70,52 +71,27 @@ function ClientsPage() {
   const [query, setQuery] = useState('')
   const currentTab = searchParams.get('tab') ?? 'new'
 
-  const queryKey = useMemo(() => ['clients', currentTab], [currentTab])
-  const { data, isLoading, isError, refetch } = useQuery({
+  // Поиск выполняется на сервере; ждём паузу в наборе, чтобы не слать запрос на каждую букву
+  const [search, setSearch] = useState('')
+  useEffect(() => {
+    const timer = setTimeout(() => setSearch(norm(query)), 300)
+    return () => clearTimeout(timer)
+  }, [query])
+
+  // Пока открыт поток изменений, список перечитывается только по событию, а не на каждый фокус/возврат
+  const live = useClientEvents()
+
+  const queryKey = useMemo(() => ['clients', currentTab, search], [currentTab, search])
+  const { data, isLoading, isError, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey,
-    queryFn: () => api.getClients(currentTab),
+    queryFn: ({ pageParam }) => api.getClients(currentTab, { q: search, cursor: pageParam }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage: any) => lastPage?.next_cursor ?? null,
+    staleTime: live ? Infinity : 0,
+    refetchOnWindowFocus: !live,
   })
 
-  const filtered = useMemo(() => {
-    if (!data) return []
-    const q = norm(query)
-    if (!q) return data
-
-    const nameOf = (c: any): string => {
-      // 1) ФИО из паспорта
-      const fio = c?.passport && [c.passport.last_name, c.passport.first_name, c.passport.middle_name]
-        .filter(Boolean)
-        .join(' ')
-      if (fio && fio.trim()) return fio.trim()
-      // 2) плоские поля
-      const flat = c?.name || c?.user_name || c?.full_name
-      if (flat && String(flat).trim()) return String(flat).trim()
-      // 3) вложенный пользователь
-      const un = c?.user?.name
-      if (un && String(un).trim()) return String(un).trim()
-      return ''
-    }
-
-    const addrOf = (c: any): string => {
-      return (
-        (c?.registration_address ?? '') ||
-        (c?.address ?? '') ||
-        (c?.passport?.registration_address ?? '') ||
-        (c?.user?.address ?? '') ||
-        ''
-      ) as string
-    }
-
-    return data.filter((c) => {
-      const haystack = [
-        nameOf(c),
-        c?.phone,
-        c?.email,
-        addrOf(c),
-      ].map((v) => norm(String(v || '')))
-      return haystack.some((v) => v.includes(q))
-    })
-  }, [data, query])
+  const filtered = useMemo(() => (data?.pages ?? []).flatMap((page: any) => page?.items ?? []), [data])
 
   const handleTabClick = (tab: string) => {
     setSearchParams({ tab })
@@ -192,6 +168,11 @@ function ClientsPage() {
                   </li>
                 ))}
               </ul>
+              {hasNextPage && (
+                <button type="button" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+                  {isFetchingNextPage ? 'Загружаем…' : 'Показать ещё'}
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -0,0 +1,58 @@
+"""Login throughput under concurrency: password checks on the event loop vs the hash pool.
+
+Usage (from server/): python -m scripts.bench_login [concurrent_logins] [scheme]
+Runs `concurrent_logins` verifications at once and measures the worst delay of
+a 10 ms ticker running on the same loop (what every other request would see).
+No database is needed: only the password check of a login is exercised.
+"""
+
+import asyncio
+import sys
+import time
+
+from app.core import security
+
+
+async def _ticker(stop: asyncio.Event, delays: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        delays.append(time.perf_counter() - started - 0.01)
+
+
+async def _run(label: str, verify, password: str, hashed: str, n: int) -> None:
+    stop = asyncio.Event()
+    delays: list[float] = []
+    ticker = asyncio.create_task(_ticker(stop, delays))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify(password, hashed) for _ in range(n)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    assert all(results)
+    print(
+        f"{label:6} {n / elapsed:8.1f} logins/s  total={elapsed:6.2f}s  "
+        f"max loop stall={max(delays) * 1000:7.1f} ms"
+    )
+
+
+async def _inline(password: str, hashed: str) -> bool:
+    return security.verify_password(password, hashed)
+
+
+async def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    scheme = sys.argv[2] if len(sys.argv) > 2 else "bcrypt"
+    password = "correct horse battery staple"
+    hashed = security.pwd_context.handler(scheme).hash(password)
+    print(f"logins={n} scheme={scheme} workers={security.PASSWORD_HASH_WORKERS}")
+    await _run("inline", _inline, password, hashed, n)
+    await security.verify_password_async(password, hashed)  # поднимаем процессы пула до замера
+    await _run("pool", security.verify_password_async, password, hashed, n)
+    security.shutdown_password_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""Compare boto3 generate_presigned_url with StorageService's batch SigV4 signer.
+
+Usage (from server/): python -m scripts.bench_presign [keys] [rounds]
+No network access is needed: both paths only compute signatures.
+"""
+
+import sys
+import time
+
+from app.services.storage import S3ClientRegistry, StorageService
+
+
+def main() -> None:
+    n_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    keys = [f"clients/bench/devices/{i}/photo-{i}.jpg" for i in range(n_keys)]
+    storage = StorageService(S3ClientRegistry())
+    boto_client = storage._public_client_or_init()
+    signer = storage._signer_or_init()
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            boto_client.generate_presigned_url(
+                "get_object", Params={"Bucket": storage.bucket, "Key": key}, ExpiresIn=604800
+            )
+    boto_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        signer.presign_get(storage.bucket, keys, expires=604800)
+    batch_elapsed = time.perf_counter() - started
+
+    total = n_keys * rounds
+    print(f"keys={n_keys} rounds={rounds}")
+    print(f"boto3:  {boto_elapsed * 1e6 / total:8.1f} us/url")
+    print(f"sigv4:  {batch_elapsed * 1e6 / total:8.1f} us/url  (x{boto_elapsed / batch_elapsed:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Write .gz (and .br, if the brotli module is installed) siblings for Vite build assets.
+
+Usage (from server/): python -m scripts.compress_assets [--require-brotli] [assets_dir]
+Default directory: frontend-manager/dist/assets. Run after `npm run build`;
+AssetServer serves the siblings to clients that accept them.
+--require-brotli fails instead of falling back to gzip only (the Docker build uses it).
+"""
+
+import gzip
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".webmanifest"}
+MIN_SIZE = 1024
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    require_brotli = "--require-brotli" in args
+    args = [arg for arg in args if arg != "--require-brotli"]
+    if require_brotli and brotli is None:
+        sys.exit("brotli is not installed (pip install -r requirements.txt), cannot write .br assets")
+    directory = Path(args[0]) if args else Path("frontend-manager/dist/assets")
+    written = 0
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE or path.stat().st_size < MIN_SIZE:
+            continue
+        data = path.read_bytes()
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                written += 1
+    print(f"{directory}: {written} compressed files written" + ("" if brotli else " (brotli not installed, gzip only)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Build the schema the database tests expect in an empty database.
+
+Usage (from server/): TEST_DATABASE_URL=... python -m scripts.create_test_schema
+Tables and indexes come from the models (create_all); objects that exist only
+in migrations (the client.created trigger) are applied from their revisions.
+`alembic upgrade head` cannot start from an empty database: the revision ids
+are longer than alembic_version.version_num.
+"""
+
+import asyncio
+import importlib.util
+import os
+from pathlib import Path
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.manager_api.models  # noqa: F401
+import app.models.devices  # noqa: F401
+import app.models.outbox  # noqa: F401
+import app.models.support  # noqa: F401
+import app.models.users  # noqa: F401
+from app.models.base import Base
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+# ревизии с объектами, которых нет в моделях
+MIGRATION_ONLY = ["20261016_notify_manager_client_created"]
+
+
+def _apply_revisions(connection) -> None:
+    with Operations.context(MigrationContext.configure(connection)):
+        for name in MIGRATION_ONLY:
+            spec = importlib.util.spec_from_file_location(name, VERSIONS / f"{name}.py")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            module.upgrade()
+
+
+async def main() -> None:
+    engine = create_async_engine(os.environ["TEST_DATABASE_URL"])
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS citext"))
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_apply_revisions)
+    finally:
+        await engine.dispose()
+    print(f"tables: {len(Base.metadata.tables)}, revisions: {', '.join(MIGRATION_ONLY)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import base64
+import uuid
+
+import pytest
+from sqlalchemy.orm import make_transient_to_detached
+from starlette.requests import Request
+
+from app.core import deps
+from app.core.basic_auth_cache import BasicAuthCache
+from app.models.users import User
+
+
+def _request(header: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", header.encode())], "client": ("1.2.3.4", 1)})
+
+
+def _basic(phone: str, password: str) -> str:
+    return "Basic " + base64.b64encode(f"{phone}:{password}".encode()).decode()
+
+
+class _FakeSession:
+    def __init__(self, user: User):
+        self.user = user
+        self.lookups = 0
+
+    async def scalar(self, stmt):
+        self.lookups += 1
+        return self.user
+
+    async def merge(self, instance, load=True):
+        assert load is False
+        return instance
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_is_verified_once_and_dropped_on_password_change(monkeypatch):
+    cache = BasicAuthCache(ttl=60, maxsize=10)
+    monkeypatch.setattr(deps, "basic_auth_cache", cache)
+    monkeypatch.setattr("app.core.basic_auth_cache.basic_auth_cache", cache)
+    verified = []
+
+    async def fake_verify(password, hashed):
+        verified.append(password)
+        return password == "pw" and hashed == "hash"
+
+    monkeypatch.setattr(deps, "verify_password_async", fake_verify)
+    user = User(id=uuid.uuid4(), phone="+70000000000", password_hash="hash", name="Тест")
+    make_transient_to_detached(user)
+    db = _FakeSession(user)
+    header = _basic(user.phone, "pw")
+
+    first = await deps.get_current_user(_request(header), creds=None, db=db)
+    second = await deps.get_current_user(_request(header), creds=None, db=db)
+    assert first.id == second.id == user.id
+    assert verified == ["pw"] and db.lookups == 1
+
+    # неверный пароль не кэшируется и кэш не отдаёт чужой заголовок
+    with pytest.raises(deps.HTTPException):
+        await deps.get_current_user(_request(_basic(user.phone, "bad")), creds=None, db=db)
+    assert cache.stats()["size"] == 1
+
+    user.password_hash = "new-hash"
+    assert cache.stats()["size"] == 0
+    with pytest.raises(deps.HTTPException):
+        await deps.get_current_user(_request(header), creds=None, db=db)
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_cache_is_dropped_on_any_user_change(monkeypatch):
+    cache = BasicAuthCache(ttl=60, maxsize=10)
+    monkeypatch.setattr(deps, "basic_auth_cache", cache)
+    monkeypatch.setattr("app.core.basic_auth_cache.basic_auth_cache", cache)
+
+    async def fake_verify(password, hashed):
+        return True
+
+    monkeypatch.setattr(deps, "verify_password_async", fake_verify)
+    user = User(id=uuid.uuid4(), phone="+70000000001", password_hash="hash", name="Старое имя")
+    make_transient_to_detached(user)
+    header = _basic(user.phone, "pw")
+    await deps.get_current_user(_request(header), creds=None, db=_FakeSession(user))
+    assert cache.get(header).name == "Старое имя"
+
+    # снимок merge(load=False) не должен отдавать устаревшие name/email/status до конца TTL
+    user.name = "Новое имя"
+    assert cache.get(header) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_basic_auth_cache_index_follows_lru_eviction():
+    cache = BasicAuthCache(ttl=60, maxsize=1)
+    first = User(id=uuid.uuid4(), phone="+70000000002", password_hash="h", name="A")
+    second = User(id=uuid.uuid4(), phone="+70000000003", password_hash="h", name="B")
+    for user in (first, second):
+        make_transient_to_detached(user)
+        cache.put(_basic(user.phone, "pw"), user)
+
+    assert cache.get(_basic(first.phone, "pw")) is None
+    assert cache.get(_basic(second.phone, "pw")).id == second.id
+    assert list(cache._by_user) == [second.id]
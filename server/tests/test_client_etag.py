@@ -0,0 +1,95 @@
+"""GET /api/manager/clients/{id}: ETag from the version watermark, 304 after one query.
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import os
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import get_db
+from app.manager_api import crud, deps
+from app.manager_api.models import ManagerClientStatus, ManagerDevice
+from app.manager_api.router import router as manager_router
+from app.models.users import User
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.mark.asyncio
+async def test_client_detail_conditional_get():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+            async def _db():
+                # как в get_db: своя сессия на запрос
+                async with AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint") as session:
+                    yield session
+
+            app = FastAPI()
+            app.include_router(manager_router)
+            app.dependency_overrides[get_db] = _db
+            app.dependency_overrides[deps.get_current_manager] = lambda: None
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                db.add(user)
+                await db.commit()
+                client = await crud.ensure_manager_client(db, user.id)
+                url = f"/api/manager/clients/{client.id}"
+
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+                    first = await http.get(url)
+                    assert first.status_code == 200 and first.headers["etag"].startswith('W/"')
+                    etag = first.headers["etag"]
+
+                    statements.clear()
+                    cached = await http.get(url, headers={"If-None-Match": etag})
+                    assert cached.status_code == 304 and cached.headers["etag"] == etag
+                    assert len([sql for sql in statements if "SAVEPOINT" not in sql]) == 1
+
+                    # изменение клиента, добавление и удаление дочерней строки меняют ETag
+                    seen = {etag}
+                    await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_CONTRACT)
+                    response = await http.get(url, headers={"If-None-Match": etag})
+                    assert response.status_code == 200 and response.headers["etag"] not in seen
+                    seen.add(response.headers["etag"])
+
+                    older = ManagerDevice(client_id=client.id, device_type="tv", title="ТВ")
+                    db.add(older)
+                    await db.commit()
+                    db.add(ManagerDevice(client_id=client.id, device_type="tv", title="ТВ 2"))
+                    await db.commit()
+                    response = await http.get(url, headers={"If-None-Match": response.headers["etag"]})
+                    assert response.status_code == 200 and len(response.json()["devices"]) == 2
+                    assert response.headers["etag"] not in seen
+                    seen.add(response.headers["etag"])
+
+                    # удаление не самой свежей строки max(updated_at) не двигает — ловит count
+                    await db.delete(older)
+                    await db.commit()
+                    response = await http.get(url, headers={"If-None-Match": response.headers["etag"]})
+                    assert response.status_code == 200 and len(response.json()["devices"]) == 1
+                    assert response.headers["etag"] not in seen
+
+                    assert (await http.get(f"/api/manager/clients/{uuid.uuid4()}")).status_code == 404
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
@@ -0,0 +1,105 @@
+"""Client-list change events: crud helpers and the insert trigger NOTIFY, ClientEventBroadcaster fans out SSE frames.
+
+The delivery test needs a PostgreSQL database with the schema (set TEST_DATABASE_URL);
+NOTIFY is only delivered on commit, so it commits and deletes its rows afterwards.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import unit_of_work
+from app.manager_api import crud
+from app.manager_api.models import ManagerClient, ManagerClientStatus, ManagerUser
+from app.models.users import User
+from app.services import client_events
+from app.services.client_events import ClientEventBroadcaster
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _parse(frame: str) -> tuple[str, dict]:
+    lines = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_resync_instead_of_blocking():
+    # LISTEN-соединение здесь не поднимется — проверяем только раздачу
+    broadcaster = ClientEventBroadcaster("postgresql://127.0.0.1:1/none", queue_size=2, reconnect_delay=60)
+    fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+    try:
+        for n in range(3):
+            broadcaster.publish(json.dumps({"type": client_events.STATUS_CHANGED, "client_id": str(n)}))
+            assert _parse(await fast.get())[1]["client_id"] == str(n)
+        assert slow.qsize() == 1 and _parse(slow.get_nowait())[0] == client_events.RESYNC
+        broadcaster.publish("not json")
+        assert fast.empty()
+    finally:
+        await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_crud_changes_reach_subscribers():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    broadcaster = ClientEventBroadcaster(client_events._listen_dsn(TEST_DATABASE_URL), queue_size=10)
+    queue = broadcaster.subscribe()
+    user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+    manager = ManagerUser(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+    try:
+        await asyncio.wait_for(broadcaster.wait_listening(), timeout=5)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all([user, manager])
+            await db.commit()
+            user_id, manager_id = user.id, manager.id
+            client = await crud.ensure_manager_client(db, user.id)
+            await crud.ensure_manager_client(db, user.id)  # уже есть — без события
+            await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_CONTRACT)
+            await crud.assign_manager(db, client=client, manager_id=manager.id)
+
+            received = [_parse(await asyncio.wait_for(queue.get(), timeout=5)) for _ in range(3)]
+            assert [kind for kind, _ in received] == [
+                client_events.CLIENT_CREATED,
+                client_events.STATUS_CHANGED,
+                client_events.ASSIGNED,
+            ]
+            assert {data["client_id"] for _, data in received} == {str(client.id)}
+            assert received[1][1]["status"] == ManagerClientStatus.AWAITING_CONTRACT.value
+            assert received[2][1]["assigned_manager_id"] == str(manager.id)
+
+            # откат транзакции — уведомление не уходит
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(db):
+                    await crud.set_client_status(db, client=client, status=ManagerClientStatus.NEW)
+                    raise RuntimeError("rollback")
+            await asyncio.sleep(0.2)
+            assert queue.empty()
+
+            # вставка в обход crud (как scripts/backfill_manager_clients.py) — событие шлёт триггер
+            other = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+            db.add(other)
+            await db.flush()
+            other_id = other.id
+            db.add(ManagerClient(user_id=other_id, status=ManagerClientStatus.NEW))
+            await db.commit()
+            kind, data = _parse(await asyncio.wait_for(queue.get(), timeout=5))
+            assert kind == client_events.CLIENT_CREATED
+            assert data["status"] == ManagerClientStatus.NEW.value and data["assigned_manager_id"] is None
+
+            await db.execute(delete(ManagerClient).where(ManagerClient.user_id.in_([user_id, other_id])))
+            await db.execute(delete(User).where(User.id.in_([user_id, other_id])))
+            await db.execute(delete(ManagerUser).where(ManagerUser.id == manager_id))
+            await db.commit()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await broadcaster.stop()
+        await engine.dispose()
@@ -0,0 +1,108 @@
+"""Request-scoped client loader (crud.load_client / crud.refresh_client).
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import os
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import unit_of_work
+from app.manager_api import crud
+from app.manager_api.models import ManagerClient, ManagerDevice, ManagerDevicePhoto
+from app.models.users import User
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.mark.asyncio
+async def test_load_client_is_cached_and_refresh_is_targeted():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                db.add(user)
+                await db.flush()
+                client = ManagerClient(user_id=user.id)
+                db.add(client)
+                await db.commit()
+
+                loaded = await crud.load_client(db, client.id)
+                statements.clear()
+                assert await crud.load_client(db, client.id) is loaded
+                assert statements == []
+
+                # как crud.create_device/add_device_photo: строки добавлены мимо коллекции
+                device = ManagerDevice(client_id=client.id, device_type="tv", title="TV")
+                db.add(device)
+                await db.flush()
+                db.add(ManagerDevicePhoto(device_id=device.id, file_key="k1"))
+                await db.commit()
+                assert loaded.devices == []
+
+                statements.clear()
+                await crud.refresh_client(db, loaded, "devices")
+                assert [p.file_key for d in loaded.devices for p in d.photos] == ["k1"]
+                selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+                assert len(selects) == 2  # devices + photos
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_load_client_reloads_after_savepoint_rollback():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                db.add(user)
+                await db.flush()
+                client = ManagerClient(user_id=user.id)
+                db.add(client)
+                await db.flush()
+                db.add(ManagerDevice(client_id=client.id, device_type="tv", title="TV"))
+                await db.commit()
+
+                async with unit_of_work(db):
+                    loaded = await crud.load_client(db, client.id)
+                    # как «терпимые» блоки в router: savepoint с ошибкой внутри, исключение проглочено
+                    with pytest.raises(RuntimeError):
+                        async with db.begin_nested():
+                            loaded.devices[0].title = "Телевизор"
+                            await crud.ensure_support_thread(db, client=loaded, title="Подписание договора")
+                            raise RuntimeError("boom")
+
+                    reloaded = await crud.load_client(db, client.id)
+                    # без перезагрузки: devices[0] expired (ленивая загрузка -> MissingGreenlet),
+                    # support_thread указывает на откаченную строку
+                    assert [d.title for d in reloaded.devices] == ["TV"]
+                    assert reloaded.support_thread is None
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
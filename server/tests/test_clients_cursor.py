@@ -0,0 +1,93 @@
+import os
+import uuid
+from datetime import date, datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import get_db
+from app.manager_api import crud, deps
+from app.manager_api.crud import decode_clients_cursor, encode_clients_cursor
+from app.manager_api.models import ManagerClient, ManagerUser, UserPassport
+from app.manager_api.router import router as manager_router
+from app.manager_api.schemas import CLIENTS_PAGE_MAX_LIMIT
+from app.models.users import User
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_clients_cursor_roundtrip():
+    created_at = datetime(2025, 10, 24, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    client_id = uuid.uuid4()
+
+    cursor = encode_clients_cursor(created_at, client_id)
+
+    assert "=" not in cursor
+    assert decode_clients_cursor(cursor) == (created_at, client_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", "eyJjIjoieCIsImkiOiJ5In0"])
+def test_clients_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_clients_cursor(cursor)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", [0, CLIENTS_PAGE_MAX_LIMIT + 1])
+async def test_clients_limit_is_validated(limit):
+    app = FastAPI()
+    app.include_router(manager_router)
+    app.dependency_overrides[deps.get_current_manager] = lambda: ManagerUser(id=uuid.uuid4(), email="m@example.com")
+    app.dependency_overrides[get_db] = lambda: None  # до базы запрос не доходит
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+        resp = await http.get("/api/manager/clients", params={"tab": "new", "limit": limit})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_clients_search_matches_passport_full_name():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Аккаунт")
+                db.add(user)
+                await db.flush()
+                client = ManagerClient(user_id=user.id)
+                db.add(client)
+                await db.flush()
+                db.add(
+                    UserPassport(
+                        client_id=client.id,
+                        last_name="Щербакова",
+                        first_name="Ольга",
+                        middle_name="Игоревна",
+                        series="1234",
+                        number="567890",
+                        issued_by="ОВД",
+                        issue_code="770-001",
+                        issue_date=date(2020, 1, 1),
+                        registration_address="Тверь, ул. Советская, 5",
+                    )
+                )
+                await db.flush()
+
+                for term in ("щербакова ольга", "Советская"):
+                    rows, _ = await crud.list_clients(db, manager_id=None, tab="new", search=term)
+                    assert [row["id"] for row in rows] == [client.id]
+                rows, _ = await crud.list_clients(db, manager_id=None, tab="new", search="Щербакова Игорь")
+                assert rows == []
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
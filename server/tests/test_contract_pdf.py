@@ -1,4 +1,18 @@
-from app.services.contracts import build_contract_pdf
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import contracts
+from app.services.contracts import (
+    ContractPdfRenderer,
+    ContractRendererBusy,
+    TemplateRegistry,
+    build_contract_pdf,
+    contract_pdf_key,
+)
 
 
 def test_build_contract_pdf_creates_bytes():
@@ -22,3 +36,71 @@ def test_build_contract_pdf_creates_bytes():
     assert isinstance(data, bytes)
     # ReportLab PDF starts with %PDF header
     assert data.startswith(b"%PDF")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_contract_pdf_renderer(workers):
+    renderer = ContractPdfRenderer(workers=workers, max_pending=2)
+    try:
+        data = await renderer.render(
+            contract_number="CTR-1",
+            passport_snapshot={"series": "1234", "number": "567890"},
+            devices=[],
+            tariff_snapshot={},
+        )
+    finally:
+        renderer.shutdown()
+
+    assert data.startswith(b"%PDF")
+
+
+@pytest.mark.asyncio
+async def test_contract_pdf_renderer_rejects_beyond_max_pending(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(contracts, "build_contract_pdf", lambda **kwargs: release.wait(5) and kwargs["contract_number"].encode())
+    renderer = ContractPdfRenderer(workers=1, max_pending=1)
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(renderer, "_executor_or_init", lambda: pool)
+    try:
+        running = asyncio.create_task(renderer.render(contract_number="CTR-1"))
+        queued = asyncio.create_task(renderer.render(contract_number="CTR-2"))
+        await asyncio.sleep(0.05)
+
+        # один рендерится, один ждёт слот — третий сразу получает отказ
+        with pytest.raises(ContractRendererBusy):
+            await renderer.render(contract_number="CTR-3")
+
+        release.set()
+        assert await asyncio.gather(running, queued) == [b"CTR-1", b"CTR-2"]
+        assert await renderer.render(contract_number="CTR-4") == b"CTR-4"
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+
+
+def test_contract_pdf_key_is_content_addressed():
+    key = contract_pdf_key("client-1", "abc")
+
+    assert key == contract_pdf_key("client-1", "abc")
+    assert key != contract_pdf_key("client-1", "abd")
+    assert key.startswith("contracts/client-1/") and key.endswith(".pdf")
+
+
+def test_template_registry_reloads_on_mtime_change(tmp_path):
+    path = tmp_path / "contract.txt"
+    path.write_text("Договор {contract_number} {{копия}}", encoding="utf-8")
+    registry = TemplateRegistry(path)
+
+    first = registry.get()
+    assert registry.get() is first
+    assert first.render({"contract_number": "AA-1"}) == "Договор AA-1 {копия}"
+
+    path.write_text("Договор №{contract_number:>5}", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = registry.get()
+    assert second is not first
+    assert second.version != first.version
+    assert second.render({"contract_number": "A1"}) == "Договор №   A1"
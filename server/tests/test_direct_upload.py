@@ -0,0 +1,69 @@
+"""POST /api/manager/uploads/direct: content type detection before the allowlist."""
+
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.manager_api import deps
+from app.manager_api.models import ManagerUser
+from app.manager_api.router import router as manager_router
+from app.services.storage import async_storage_service
+
+HEIC_HEAD = b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic"
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    stored: list[tuple[str, str, bytes]] = []
+
+    async def upload_stream(*, key, read, content_type, part_size, max_bytes):
+        data = await read(max_bytes)
+        stored.append((key, content_type, data))
+        return len(data)
+
+    monkeypatch.setattr(async_storage_service, "upload_stream", upload_stream)
+    manager = ManagerUser(id=uuid.uuid4(), email="m@example.com", password_hash="x")
+    app = FastAPI()
+    app.include_router(manager_router)
+    app.dependency_overrides[deps.get_current_manager] = lambda: manager
+    return app, stored
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("filename", "declared", "body", "expected"),
+    [
+        ("IMG_0001.HEIC", "application/octet-stream", HEIC_HEAD, "image/heic"),
+        ("photo", "application/octet-stream", b"\xff\xd8\xff\xe0" + b"\x00" * 16, "image/jpeg"),
+        ("scan.pdf", "", b"%PDF-1.7\n", "application/pdf"),
+        ("photo.png", "image/png; charset=binary", b"\x89PNG\r\n\x1a\n", "image/png"),
+    ],
+)
+async def test_direct_upload_detects_generic_content_types(uploads, filename, declared, body, expected):
+    app, stored = uploads
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+        resp = await http.post("/api/manager/uploads/direct", files={"file": (filename, body, declared)})
+
+    assert resp.status_code == 200
+    (_, content_type, data), = stored
+    assert content_type == expected
+    assert data == body  # сниффинг не съедает начало файла
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_still_rejects_unknown_types(uploads):
+    app, stored = uploads
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+        octet = await http.post(
+            "/api/manager/uploads/direct",
+            files={"file": ("payload.bin", b"MZ\x90\x00" * 8, "application/octet-stream")},
+        )
+        declared = await http.post(
+            "/api/manager/uploads/direct",
+            files={"file": ("page.html", b"<html></html>", "text/html")},
+        )
+
+    assert octet.status_code == 415 and declared.status_code == 415
+    assert stored == []
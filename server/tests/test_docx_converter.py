@@ -0,0 +1,134 @@
+import sys
+
+import pytest
+
+from app.services.docx_converter import LibreOfficeConverterPool
+
+# Заглушка soffice: "конвертирует" входной файл в <outdir>/<stem>.pdf, на "sleep" зависает
+FAKE_SOFFICE = """#!{python}
+import pathlib, sys, time
+args = sys.argv[1:]
+outdir = pathlib.Path(args[args.index("--outdir") + 1])
+src = pathlib.Path(args[-1])
+data = src.read_bytes()
+if data == b"sleep":
+    time.sleep(30)
+(outdir / (src.stem + ".pdf")).write_bytes(b"%PDF-fake " + data)
+"""
+
+
+@pytest.fixture
+def fake_soffice(tmp_path):
+    binary = tmp_path / "soffice"
+    binary.write_text(FAKE_SOFFICE.format(python=sys.executable))
+    binary.chmod(0o755)
+    return str(binary)
+
+
+@pytest.mark.asyncio
+async def test_converter_pool_warms_and_converts(fake_soffice):
+    pool = LibreOfficeConverterPool(size=2, timeout=10, binary=fake_soffice)
+    try:
+        await pool.start()
+        assert pool.stats()["warm"] == 2
+
+        pdf = await pool.convert(b"docx")
+        assert pdf == b"%PDF-fake docx"
+        assert pool.stats()["conversions"] == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_converter_pool_times_out_and_resets_slot(fake_soffice):
+    pool = LibreOfficeConverterPool(size=1, timeout=0.5, binary=fake_soffice)
+    try:
+        await pool.start()
+        with pytest.raises(TimeoutError):
+            await pool.convert(b"sleep")
+        assert pool.stats() == {"size": 1, "warm": 0, "conversions": 0, "failures": 1}
+
+        # слот снова проходит проверку и принимает работу
+        assert await pool.convert(b"again") == b"%PDF-fake again"
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_converter_pool_resolves_binary_once_in_start(fake_soffice, monkeypatch):
+    from app.services import docx_converter
+
+    disabled = LibreOfficeConverterPool(size=0, timeout=10, binary=fake_soffice)
+    await disabled.start()
+    assert not disabled.available
+    missing = LibreOfficeConverterPool(size=1, timeout=10, binary="no-such-soffice")
+    await missing.start()
+    assert not missing.available
+
+    pool = LibreOfficeConverterPool(size=1, timeout=10, binary=fake_soffice)
+    try:
+        # до start() пул недоступен — договоры рендерит ReportLab
+        assert not pool.available
+        await pool.start()
+        assert pool.available
+
+        # PATH больше не просматривается: ни в available, ни при конвертации
+        def _which(*args):
+            raise AssertionError("shutil.which called after start()")
+
+        monkeypatch.setattr(docx_converter.shutil, "which", _which)
+        assert pool.available
+        assert await pool.convert(b"docx") == b"%PDF-fake docx"
+    finally:
+        pool.shutdown()
+    assert not pool.available
+
+
+def test_docx_template_renders_contract_fields():
+    pytest.importorskip("docxtpl")
+    from docx import Document
+    from io import BytesIO
+
+    from app.services.docx_converter import docx_template_cache
+
+    data = docx_template_cache.render({
+        "contract": {"number": "ИВ-261016-01", "date": "2026-10-16"},
+        "client": {"full_name": "Иванов Иван", "phone": "+70000000000", "email": "", "address": ""},
+        "passport": {"series": "4510", "number": "123456"},
+        "devices": [{"device_type": "tv", "title": "Телевизор", "specs": {"диагональ": "55"}}],
+        "tariff": {"device_count": 1, "extra_per_device": 1000, "total_extra_fee": 1000},
+    })
+    text = "\n".join(p.text for p in Document(BytesIO(data)).paragraphs)
+    assert "ИВ-261016-01" in text and "Иванов Иван" in text
+    assert "- tv — Телевизор" in text and "диагональ: 55" in text
+    assert "{{" not in text and "{%" not in text
+
+
+@pytest.mark.asyncio
+async def test_render_contract_pdf_uses_docx_and_falls_back_to_reportlab(fake_soffice, tmp_path, monkeypatch):
+    pytest.importorskip("docxtpl")
+    from app.services import contracts
+
+    monkeypatch.setattr(contracts, "contract_pdf_renderer", contracts.ContractPdfRenderer(workers=0, max_pending=1))
+    kwargs = dict(contract_number="AA-1", passport_snapshot={}, devices=[], tariff_snapshot={})
+
+    pool = LibreOfficeConverterPool(size=1, timeout=10, binary=fake_soffice)
+    monkeypatch.setattr(contracts, "docx_converter", pool)
+    try:
+        await pool.start()
+        # заглушка soffice возвращает "%PDF-fake " + исходный DOCX (zip)
+        assert (await contracts.render_contract_pdf(**kwargs)).startswith(b"%PDF-fake PK")
+    finally:
+        pool.shutdown()
+
+    broken = tmp_path / "broken-soffice"
+    broken.write_text("#!/bin/sh\nexit 1\n")
+    broken.chmod(0o755)
+    pool = LibreOfficeConverterPool(size=1, timeout=10, binary=str(broken))
+    monkeypatch.setattr(contracts, "docx_converter", pool)
+    try:
+        await pool.start()
+        pdf = await contracts.render_contract_pdf(**kwargs)
+        assert pdf.startswith(b"%PDF-") and not pdf.startswith(b"%PDF-fake")
+    finally:
+        pool.shutdown()
@@ -0,0 +1,130 @@
+"""Write endpoints of the manager API issue no SELECT after their last write.
+
+The write helpers no longer refresh() after commit; these tests count the
+statements each endpoint sends through the router, so a reload that creeps
+back in (a refresh or a lazy load while building the response) fails here.
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import os
+import uuid
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import get_db
+from app.manager_api import crud, deps
+from app.manager_api.models import ManagerTariff, ManagerUser
+from app.manager_api.router import router as manager_router
+from app.models.users import User
+from app.services.contracts import CONTRACT_NUMBER_META
+from app.services.storage import async_storage_service
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# клиент + selectin-связи агрегата (devices, invoices, contract, passport, support_thread, tariff, user)
+CLIENT_LOAD = ["SELECT"] * 8
+
+
+def _kinds(statements: list[str]) -> list[str]:
+    # SAVEPOINT/RELEASE — от тестовой транзакции и begin_nested, pg_notify — событие SSE-стрима, а не чтение
+    return [
+        sql.lstrip().split(None, 1)[0].upper()
+        for sql in statements
+        if "SAVEPOINT" not in sql and "pg_notify" not in sql
+    ]
+
+
+@pytest.mark.asyncio
+async def test_write_endpoints_do_not_reload_after_write(monkeypatch):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+            async def _db():
+                async with AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint") as session:
+                    yield session
+
+            manager = ManagerUser(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+            app = FastAPI()
+            app.include_router(manager_router)
+            app.dependency_overrides[get_db] = _db
+            app.dependency_overrides[deps.get_current_manager] = lambda: manager
+
+            # готовый PDF уже в хранилище — генерация договора его переиспользует, без рендера
+            async def _stored_pdf(*, key):
+                return {CONTRACT_NUMBER_META: "TE-000000-01"}
+
+            monkeypatch.setattr(async_storage_service, "get_metadata", _stored_pdf)
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                tariff = ManagerTariff(name="Базовый", base_fee=Decimal("1000"), extra_per_device=Decimal("500"))
+                db.add_all([user, manager, tariff])
+                await db.commit()
+                client = await crud.ensure_manager_client(db, user.id)
+                # менеджер уже назначен: в счёт попадает только сама операция
+                await crud.assign_manager(db, client=client, manager_id=manager.id)
+                url = f"/api/manager/clients/{client.id}"
+
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+
+                    async def call(method: str, path: str, **kwargs) -> tuple[httpx.Response, list[str]]:
+                        statements.clear()
+                        response = await http.request(method, url + path, **kwargs)
+                        assert response.status_code == 200, response.text
+                        return response, _kinds(statements)
+
+                    passport = {
+                        "last_name": "Петров", "first_name": "Иван", "series": "1234", "number": "567890",
+                        "issued_by": "ОВД", "issue_code": "770-001", "issue_date": "2020-01-01",
+                        "registration_address": "Москва",
+                    }
+                    response, kinds = await call("PUT", "/passport", json=passport)
+                    assert kinds == CLIENT_LOAD + ["INSERT"]
+                    assert response.json()["passport"]["last_name"] == "Петров"
+
+                    response, kinds = await call("PATCH", "/passport", json={**passport, "registration_address": "Казань"})
+                    assert kinds == CLIENT_LOAD + ["UPDATE"]
+                    assert response.json()["passport"]["registration_address"] == "Казань"
+
+                    # устройство + зеркало в devices; пересчёт тарифа читает устройства до своей записи
+                    response, kinds = await call("POST", "/devices", json={"device_type": "tv", "title": "TV"})
+                    assert kinds == CLIENT_LOAD + ["INSERT", "INSERT", "SELECT", "SELECT", "INSERT"]
+                    device_id = response.json()["id"]
+
+                    # + фото устройств (selectin, у клиента уже есть устройство) и строка зеркала
+                    response, kinds = await call("PATCH", f"/devices/{device_id}", json={"title": "TV 2"})
+                    assert kinds == CLIENT_LOAD + ["SELECT", "UPDATE", "SELECT", "UPDATE"]
+                    assert response.json()["title"] == "TV 2"
+
+                    # + сам тариф
+                    response, kinds = await call(
+                        "POST", "/tariff/apply", json={"device_count": 1, "tariff_id": str(tariff.id)}
+                    )
+                    assert kinds == CLIENT_LOAD + ["SELECT", "SELECT", "UPDATE"]
+                    assert response.json()["name"] == "Базовый" and response.json()["device_count"] == 1
+
+                    # + фото устройств и тариф клиента (selectin); договор и статус — без перечитывания
+                    response, kinds = await call("POST", "/contract/generate")
+                    assert kinds == CLIENT_LOAD + ["SELECT", "SELECT", "INSERT", "UPDATE"]
+                    assert response.json()["contract_number"] == "TE-000000-01"
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
@@ -0,0 +1,90 @@
+import gzip
+import os
+
+import brotli
+import pytest
+from starlette.requests import Request
+
+from app.services.frontend import SpaShell, serve_file
+
+
+def _request(**headers: str) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def test_spa_shell_is_cached_compressed_and_revalidated(tmp_path):
+    index = tmp_path / "index.html"
+    index.write_text("<html>" + "app " * 200 + "</html>")
+    shell = SpaShell(index)
+
+    first = shell.get()
+    assert shell.get() is first
+
+    resp = serve_file(first, _request(accept_encoding="gzip, deflate"), media_type="text/html", cache_control="no-cache")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(resp.body) == index.read_bytes()
+    etag = resp.headers["etag"]
+
+    br = serve_file(first, _request(accept_encoding="gzip, br"), media_type="text/html", cache_control="no-cache")
+    assert br.headers["content-encoding"] == "br"
+    assert brotli.decompress(br.body) == index.read_bytes()
+
+    plain = serve_file(first, _request(), media_type="text/html", cache_control="no-cache")
+    assert "content-encoding" not in plain.headers and plain.headers["etag"] != etag
+
+    not_modified = serve_file(first, _request(if_none_match=etag), media_type="text/html", cache_control="no-cache")
+    assert not_modified.status_code == 304 and not_modified.body == b""
+
+    # новая сборка: другой mtime/size — перечитываем и меняем ETag
+    index.write_text("<html>new build</html>")
+    os.utime(index, ns=(1, 1))
+    rebuilt = shell.get()
+    assert rebuilt is not first
+    assert serve_file(rebuilt, _request(if_none_match=etag), media_type="text/html", cache_control="").status_code == 200
+
+
+def test_asset_server_serves_siblings_with_immutable_cache(tmp_path):
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.testclient import TestClient
+
+    from app.services.frontend import AssetServer
+
+    bundle = b"console.log(1);" * 100
+    (tmp_path / "index-BX3a9f2c.js").write_bytes(bundle)
+    (tmp_path / "index-BX3a9f2c.js.gz").write_bytes(gzip.compress(bundle))
+    (tmp_path / "notes.txt").write_text("plain")
+    client = TestClient(Starlette(routes=[Mount("/assets", app=AssetServer(tmp_path))]))
+
+    resp = client.get("/assets/index-BX3a9f2c.js", headers={"Accept-Encoding": "gzip"})
+    assert resp.content == bundle  # httpx распаковал .gz
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    identity = client.get("/assets/index-BX3a9f2c.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers and identity.content == bundle
+    revalidated = client.get(
+        "/assets/index-BX3a9f2c.js",
+        headers={"Accept-Encoding": "identity", "If-None-Match": identity.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+    assert client.get("/assets/notes.txt").headers["cache-control"] == "no-cache"
+    assert client.get("/assets/index-BX3a9f2c.js.gz").status_code == 404
+    assert client.get("/assets/../secret").status_code == 404
+
+
+def test_compress_assets_writes_brotli_siblings(tmp_path, monkeypatch):
+    from scripts import compress_assets
+
+    bundle = b"export const x = 1;\n" * 200
+    (tmp_path / "index-BX3a9f2c.js").write_bytes(bundle)
+    monkeypatch.setattr("sys.argv", ["compress_assets", "--require-brotli", str(tmp_path)])
+    compress_assets.main()
+    assert gzip.decompress((tmp_path / "index-BX3a9f2c.js.gz").read_bytes()) == bundle
+    assert brotli.decompress((tmp_path / "index-BX3a9f2c.js.br").read_bytes()) == bundle
+
+    monkeypatch.setattr(compress_assets, "brotli", None)
+    with pytest.raises(SystemExit):
+        compress_assets.main()
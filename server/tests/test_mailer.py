@@ -0,0 +1,100 @@
+import asyncio
+import smtplib
+import socketserver
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+from app.core.mailer import SmtpMailer
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO/MAIL/RCPT/DATA/NOOP/RSET/QUIT."""
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.wfile.write(b"220 stand-in ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO") or command.startswith("HELO"):
+                self.wfile.write(b"250 stand-in\r\n")
+            elif command.startswith("RCPT") and "REJECT@" in command:
+                self.wfile.write(b"550 no such user\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                body = []
+                while (data := self.rfile.readline()) != b".\r\n":
+                    body.append(data)
+                server.messages.append(b"".join(body))
+                self.wfile.write(b"250 queued\r\n")
+                if server.drop_after and len(server.messages) % server.drop_after == 0:
+                    return  # сервер рвёт сессию, как по лимиту писем
+            elif command == "QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:  # MAIL, RCPT, NOOP, RSET
+                self.wfile.write(b"250 ok\r\n")
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    server.drop_after = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _message(n: int, to: str = "client@example.com") -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "no-reply@example.com"
+    msg["To"] = to
+    msg["Subject"] = f"message {n}"
+    msg.set_content(f"body {n}")
+    return msg
+
+
+@pytest.mark.asyncio
+async def test_mailer_batches_on_one_reused_session(smtp_server):
+    port = smtp_server.server_address[1]
+    mailer = SmtpMailer(pool_size=1, batch_size=10, idle_timeout=60, connect=lambda: smtplib.SMTP("127.0.0.1", port))
+    try:
+        await asyncio.gather(*(mailer.send(_message(i)) for i in range(5)))
+        await mailer.send(_message(5))
+        assert len(smtp_server.messages) == 6
+        assert smtp_server.connections == 1
+
+        # отказ по одному получателю не ломает сессию и остальные письма
+        results = await asyncio.gather(
+            mailer.send(_message(6, to="reject@example.com")),
+            mailer.send(_message(7)),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], smtplib.SMTPRecipientsRefused) and results[1] is None
+        assert smtp_server.connections == 1
+    finally:
+        await mailer.close()
+
+
+@pytest.mark.asyncio
+async def test_mailer_reconnects_when_server_drops_session(smtp_server):
+    smtp_server.drop_after = 2
+    port = smtp_server.server_address[1]
+    mailer = SmtpMailer(pool_size=1, batch_size=10, idle_timeout=60, connect=lambda: smtplib.SMTP("127.0.0.1", port))
+    try:
+        await asyncio.gather(*(mailer.send(_message(i)) for i in range(5)))
+        assert len(smtp_server.messages) == 5
+        assert mailer.connections_opened == 3
+    finally:
+        await mailer.close()
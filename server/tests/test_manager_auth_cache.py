@@ -0,0 +1,81 @@
+import uuid
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core import cache as cache_module
+from app.manager_api import auth_cache as auth_cache_module
+from app.manager_api import deps
+from app.manager_api.auth_cache import ManagerCache
+from app.manager_api.models import ManagerUser
+
+
+def _manager(**kwargs) -> ManagerUser:
+    manager = ManagerUser(id=uuid.uuid4(), email="m@example.com", password_hash="x", is_active=True, **kwargs)
+    make_transient_to_detached(manager)
+    return manager
+
+
+def test_manager_cache_ttl_and_active_only(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ManagerCache(ttl=30, maxsize=2)
+    manager = _manager()
+
+    cache.put(manager)
+    cached = cache.get(manager.id)
+    assert cached is not manager and cached.email == "m@example.com"
+    assert inspect(cached).detached
+
+    now[0] += 31
+    assert cache.get(manager.id) is None
+
+    inactive = _manager()
+    inactive.is_active = False
+    cache.put(inactive)
+    assert cache.get(inactive.id) is None
+
+    assert ManagerCache(ttl=0, maxsize=2).get(manager.id) is None
+
+
+def test_is_active_change_invalidates(monkeypatch):
+    cache = ManagerCache(ttl=30, maxsize=10)
+    monkeypatch.setattr(auth_cache_module, "manager_cache", cache)
+    manager = _manager()
+    cache.put(manager)
+
+    manager.is_active = False
+    assert cache.get(manager.id) is None
+
+    # любое изменение строки: кэш отдаёт снимок через merge(load=False), устаревший email недопустим
+    other = _manager()
+    cache.put(other)
+    other.email = "new@example.com"
+    assert cache.get(other.id) is None
+
+
+class _FakeSession:
+    def __init__(self):
+        self.executed = 0
+
+    async def merge(self, instance, load=True):
+        assert load is False
+        return instance
+
+    async def execute(self, stmt):
+        self.executed += 1
+        raise AssertionError("cache hit must not query the database")
+
+
+@pytest.mark.asyncio
+async def test_get_current_manager_uses_cache(monkeypatch):
+    cache = ManagerCache(ttl=30, maxsize=10)
+    monkeypatch.setattr(deps, "manager_cache", cache)
+    manager = _manager()
+    cache.put(manager)
+    monkeypatch.setattr(deps.security, "decode_manager_token", lambda token: {"sub": str(manager.id)})
+
+    db = _FakeSession()
+    current = await deps.get_current_manager(token="t", db=db)
+    assert current.id == manager.id and db.executed == 0
@@ -0,0 +1,181 @@
+"""Outbox rows are committed with the business change and delivered by OutboxDispatcher.
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import unit_of_work
+from app.manager_api.models import ManagerClient
+from app.models.outbox import OutboxMessage
+from app.models.support import SupportMessage, SupportTicket
+from app.models.users import User
+from app.services import outbox
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class _SameSession:
+    """session_factory stand-in: the dispatcher works inside the test transaction."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def __aenter__(self):
+        return self.db
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    """Just enough of AsyncSession for unit_of_work; `log` records session lifetimes."""
+
+    def __init__(self, log: list[str]):
+        self.info: dict = {}
+        self.log = log
+
+    async def __aenter__(self):
+        self.log.append("open")
+        return self
+
+    async def __aexit__(self, *exc):
+        self.log.append("close")
+        return False
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def test_backoff_grows_and_is_capped():
+    dispatcher = outbox.OutboxDispatcher(
+        batch_size=10, poll_interval=1, max_attempts=5, backoff_base=2, backoff_max=60
+    )
+    assert [dispatcher.backoff(n).total_seconds() for n in (1, 2, 3, 6, 10)] == [2, 4, 8, 60, 60]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_claims_first_then_delivers_concurrently(monkeypatch):
+    log: list[str] = []
+    in_flight = peak = 0
+
+    async def slow(session, payload):
+        nonlocal in_flight, peak
+        log.append("deliver")
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if payload["n"] == 3:
+            raise ConnectionError("smtp down")
+
+    dispatcher = outbox.OutboxDispatcher(
+        session_factory=lambda: _FakeSession(log),
+        handlers={"slow": slow},
+        batch_size=10,
+        concurrency=2,
+        poll_interval=1,
+        max_attempts=3,
+        backoff_base=30,
+        backoff_max=60,
+    )
+    messages = [OutboxMessage(id=uuid.uuid4(), kind="slow", payload={"n": n}, attempts=1) for n in range(5)]
+
+    async def claim():
+        async with dispatcher._session_factory():
+            return messages
+
+    recorded = {}
+
+    async def record(db, message, **values):
+        recorded[message.payload["n"]] = values
+
+    monkeypatch.setattr(dispatcher, "_claim", claim)
+    monkeypatch.setattr(dispatcher, "_record", record)
+
+    assert await dispatcher.dispatch_once() == 5
+    # строки заблокированы только на время захвата: сессия закрыта до первой доставки
+    assert log[:2] == ["open", "close"] and log.count("deliver") == 5
+    assert peak == 2
+    assert {n for n, values in recorded.items() if values.get("status") == "done"} == {0, 1, 2, 4}
+    assert "ConnectionError" in recorded[3]["last_error"] and "available_at" in recorded[3]
+
+
+@pytest.mark.asyncio
+async def test_outbox_delivers_support_message_and_retries_failures():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                # строки, оставшиеся в базе от других прогонов, диспетчер бы тоже забрал
+                await db.execute(delete(OutboxMessage))
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                db.add(user)
+                await db.flush()
+                client = ManagerClient(user_id=user.id)
+                db.add(client)
+                await db.flush()
+                async with unit_of_work(db):
+                    await outbox.enqueue_support_message(db, client=client, subject="Подписание договора", body="код 1234")
+                    await outbox.enqueue(db, "flaky", {"n": 1})
+                # в запросе — только запись outbox, тикет ещё не создан
+                assert await db.scalar(select(SupportTicket).where(SupportTicket.user_id == user.id)) is None
+
+                calls = []
+
+                async def flaky(session, payload):
+                    calls.append(payload)
+                    if len(calls) == 1:
+                        raise ConnectionError("smtp down")
+
+                dispatcher = outbox.OutboxDispatcher(
+                    session_factory=lambda: _SameSession(db),
+                    handlers={**outbox.HANDLERS, "flaky": flaky},
+                    batch_size=10,
+                    poll_interval=1,
+                    max_attempts=3,
+                    backoff_base=30,
+                    backoff_max=60,
+                )
+                assert await dispatcher.dispatch_once() == 2
+
+                ticket = await db.scalar(select(SupportTicket).where(SupportTicket.user_id == user.id))
+                assert ticket is not None and client.support_ticket_id == ticket.id
+                bodies = (await db.scalars(select(SupportMessage.body).where(SupportMessage.ticket_id == ticket.id))).all()
+                assert bodies == ["код 1234"]
+
+                rows = {m.kind: m for m in (await db.scalars(select(OutboxMessage))).all()}
+                assert rows["support_message"].status == "done"
+                flaky_row = rows["flaky"]
+                assert flaky_row.status == "pending" and flaky_row.attempts == 1
+                assert "ConnectionError" in flaky_row.last_error
+
+                # до истечения backoff строка не берётся, после — доставляется
+                assert await dispatcher.dispatch_once() == 0
+                flaky_row.available_at -= timedelta(seconds=31)
+                await db.commit()
+                assert await dispatcher.dispatch_once() == 1
+                assert flaky_row.status == "done" and len(calls) == 2
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
@@ -0,0 +1,21 @@
+import pytest
+
+from app.core import security
+
+
+@pytest.mark.asyncio
+async def test_async_password_api_round_trip(monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 0)
+    hashed = await security.hash_password_async("s3cret")
+    assert await security.verify_password_async("s3cret", hashed)
+    assert not await security.verify_password_async("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_password_pool_runs_in_worker_process():
+    hashed = security.pwd_context.handler("argon2").hash("s3cret")
+    try:
+        assert await security.verify_password_async("s3cret", hashed)
+        assert security._hash_executor is not None
+    finally:
+        security.shutdown_password_executor()
@@ -0,0 +1,169 @@
+import pytest
+
+from app.services import storage as storage_module
+from app.services.storage import PresignedUrlCache, S3ClientRegistry, StorageService
+
+
+class _FakeS3:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_presigned_url(self, op, Params, ExpiresIn):
+        self.calls += 1
+        return f"https://s3.local/{Params['Bucket']}/{Params['Key']}?sig={self.calls}"
+
+
+def test_presigned_get_url_is_reused_until_refresh_window():
+    service = StorageService(S3ClientRegistry())
+    fake = _FakeS3()
+    service._public_client_or_init = lambda: fake
+
+    first = service.generate_presigned_get_url("clients/1/photo.jpg")
+    second = service.generate_presigned_get_url("clients/1/photo.jpg")
+
+    assert first == second
+    assert fake.calls == 1
+    assert service.presigned_cache_stats()["hits"] == 1
+    assert service.presigned_cache_stats()["misses"] == 1
+
+
+def test_presigned_cache_expires_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(storage_module.time, "monotonic", lambda: now[0])
+    cache = PresignedUrlCache(maxsize=2, refresh_fraction=0.5)
+
+    cache.put("a", 100, "url-a")
+    now[0] += 49
+    assert cache.get("a", 100) == "url-a"
+    now[0] += 2
+    assert cache.get("a", 100) is None
+
+    cache.put("a", 100, "url-a")
+    cache.put("b", 100, "url-b")
+    cache.put("c", 100, "url-c")
+    assert cache.get("a", 100) is None
+    assert cache.get("c", 100) == "url-c"
+
+    cache.invalidate("c")
+    assert cache.get("c", 100) is None
+
+
+def test_sigv4_signer_matches_boto3():
+    from datetime import datetime, timezone
+    from urllib.parse import parse_qs, urlsplit
+
+    import boto3
+    from botocore.client import Config
+
+    from app.services.storage import SigV4QuerySigner
+
+    endpoint = "http://minio.local:9000"
+    client = boto3.client(
+        "s3",
+        endpoint_url=endpoint,
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="secret/EXAMPLE+key",
+        region_name="us-east-1",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+    key = "clients/42/devices/7/фото 1+(a).jpg"
+    expected = client.generate_presigned_url(
+        "get_object", Params={"Bucket": "privet-bucket", "Key": key}, ExpiresIn=3600
+    )
+    expected_parts = urlsplit(expected)
+    expected_query = parse_qs(expected_parts.query)
+    now = datetime.strptime(expected_query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+
+    signer = SigV4QuerySigner(
+        endpoint=endpoint, access_key="AKIDEXAMPLE", secret_key="secret/EXAMPLE+key", region="us-east-1"
+    )
+    actual = signer.presign_get("privet-bucket", [key], expires=3600, now=now)[key]
+    actual_parts = urlsplit(actual)
+
+    assert actual_parts.netloc == expected_parts.netloc
+    assert actual_parts.path == expected_parts.path
+    assert parse_qs(actual_parts.query) == expected_query
+
+
+@pytest.mark.asyncio
+async def test_async_storage_runs_calls_off_the_event_loop():
+    import asyncio
+    import threading
+    import time as _time
+
+    from app.services.storage import AsyncStorageService
+
+    service = AsyncStorageService(StorageService(S3ClientRegistry()), max_workers=2, call_timeout=0.2)
+    try:
+        loop_thread = threading.get_ident()
+        worker_thread = await service.run(threading.get_ident)
+        assert worker_thread != loop_thread
+
+        with pytest.raises(asyncio.TimeoutError):
+            await service.run(_time.sleep, 1)
+    finally:
+        service.shutdown()
+
+
+class _FakeMultipartS3:
+    def __init__(self):
+        self.objects = {}
+        self.parts = {}
+        self.aborted = []
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.parts[Key] = []
+        return {"UploadId": "up-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.parts[Key].append(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        assert [p["PartNumber"] for p in MultipartUpload["Parts"]] == list(range(1, len(self.parts[Key]) + 1))
+        self.objects[Key] = b"".join(self.parts.pop(Key))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(Key)
+        self.parts.pop(Key, None)
+
+
+def _reader(data: bytes):
+    import io
+
+    buf = io.BytesIO(data)
+
+    async def read(size: int) -> bytes:
+        # отдаём кусками меньше запрошенного, как SpooledTemporaryFile/сеть
+        return buf.read(min(size, 1024 * 1024))
+
+    return read
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_uses_multipart_and_enforces_limit():
+    from app.services.storage import MIN_PART_SIZE, AsyncStorageService, UploadTooLarge
+
+    sync = StorageService(S3ClientRegistry())
+    fake = _FakeMultipartS3()
+    sync._client_or_init = lambda: fake
+    service = AsyncStorageService(sync, max_workers=2, call_timeout=5)
+    try:
+        small = b"x" * 10
+        assert await service.upload_stream(key="s", read=_reader(small), part_size=1, max_bytes=100) == 10
+        assert fake.objects["s"] == small
+
+        big = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 10)
+        size = await service.upload_stream(key="b", read=_reader(big), part_size=MIN_PART_SIZE, max_bytes=len(big))
+        assert size == len(big)
+        assert fake.objects["b"] == big
+
+        with pytest.raises(UploadTooLarge):
+            await service.upload_stream(key="t", read=_reader(big), part_size=MIN_PART_SIZE, max_bytes=len(big) - 1)
+        assert fake.aborted == ["t"]
+        assert "t" not in fake.objects
+    finally:
+        service.shutdown()
@@ -0,0 +1,136 @@
+"""SupportBridgeService.ensure_ticket finds or creates the ticket in one statement.
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import os
+import uuid
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.manager_api.models import ManagerClient
+from app.models.support import SupportTicket
+from app.models.users import User
+from app.services.support_bridge import SupportBridgeService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _queries(statements: list[str]) -> list[str]:
+    # SAVEPOINT/RELEASE — от внешней тестовой транзакции, не от сервиса
+    return [sql for sql in statements if "SAVEPOINT" not in sql]
+
+
+@pytest.mark.asyncio
+async def test_ensure_ticket_is_one_statement_and_memoized():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                db.add(user)
+                await db.flush()
+                client = ManagerClient(user_id=user.id)
+                db.add(client)
+                await db.commit()
+                bridge = SupportBridgeService(db)
+
+                # создание тикета + привязка клиента + сообщение: два запроса
+                statements.clear()
+                ticket = await bridge.ensure_ticket(client, subject="Подписание договора")
+                await bridge.post_support_message(ticket=ticket, body="код 1234")
+                assert len(_queries(statements)) == 2
+                assert ticket.subject == "Подписание договора" and client.support_ticket_id == ticket.id
+                assert await db.scalar(
+                    select(ManagerClient.support_ticket_id).where(ManagerClient.id == client.id)
+                ) == ticket.id
+
+                # повторно в той же сессии — из memo, без запросов
+                statements.clear()
+                assert await bridge.ensure_ticket(client, subject="Подписание договора") is ticket
+                assert _queries(statements) == []
+
+                # новая сессия: существующий тикет находится, новый не создаётся
+                other = SupportBridgeService(AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"))
+                statements.clear()
+                found = await other.ensure_ticket(client, subject="Подписание договора")
+                assert found.id == ticket.id and len(_queries(statements)) == 1
+                # без темы — привязанный тикет; force_new — всегда новый
+                assert (await other.ensure_ticket(client)).id == ticket.id
+                fresh = await other.ensure_ticket(client, subject="Подписание договора", force_new=True)
+                assert fresh.id != ticket.id and client.support_ticket_id == fresh.id
+                await other.db.commit()
+                await other.db.close()
+                assert await db.scalar(
+                    select(ManagerClient.support_ticket_id).where(ManagerClient.id == client.id)
+                ) == fresh.id
+                tickets = (await db.scalars(select(SupportTicket.id).where(SupportTicket.user_id == user.id))).all()
+                assert len(tickets) == 2
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_ensure_ticket_forgets_tickets_from_rolled_back_savepoint():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                db.add(user)
+                await db.flush()
+                client = ManagerClient(user_id=user.id)
+                db.add(client)
+                await db.flush()
+                bridge = SupportBridgeService(db)
+
+                # как в OutboxDispatcher: доставка в savepoint, после создания тикета — ошибка
+                with pytest.raises(RuntimeError):
+                    async with db.begin_nested():
+                        phantom = await bridge.ensure_ticket(client, subject="Подписание договора")
+                        raise RuntimeError("delivery failed")
+                assert client.support_ticket_id is None
+                assert await db.scalar(select(SupportTicket.id).where(SupportTicket.id == phantom.id)) is None
+
+                # следующее сообщение в той же сессии: тикет создаётся заново, FK не ломается
+                async with db.begin_nested():
+                    ticket = await bridge.ensure_ticket(client, subject="Подписание договора")
+                    await bridge.post_support_message(ticket=ticket, body="код 1234")
+                assert ticket.id != phantom.id and client.support_ticket_id == ticket.id
+
+                # откат соседнего savepoint не трогает тикет из уже сохранённого
+                with pytest.raises(RuntimeError):
+                    async with db.begin_nested():
+                        await bridge.ensure_ticket(client, subject="Другая тема")
+                        raise RuntimeError("delivery failed")
+                assert client.support_ticket_id == ticket.id
+                assert await bridge.ensure_ticket(client, subject="Подписание договора") is ticket
+                assert await db.scalar(
+                    select(ManagerClient.support_ticket_id).where(ManagerClient.id == client.id)
+                ) == ticket.id
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
@@ -0,0 +1,77 @@
+"""POST /api/manager/clients/{id}/tariff/apply returns the tariff it just applied.
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import os
+import uuid
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import get_db
+from app.manager_api import crud, deps
+from app.manager_api.models import ManagerTariff, ManagerUser
+from app.manager_api.router import router as manager_router
+from app.models.users import User
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.mark.asyncio
+async def test_apply_tariff_switches_relationship():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+            async def _db():
+                # как в get_db: своя сессия на запрос, агрегат клиента грузится заново
+                async with AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint") as session:
+                    yield session
+
+            manager = ManagerUser(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+            app = FastAPI()
+            app.include_router(manager_router)
+            app.dependency_overrides[get_db] = _db
+            app.dependency_overrides[deps.get_current_manager] = lambda: manager
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                basic = ManagerTariff(name="Базовый", base_fee=Decimal("1000"), extra_per_device=Decimal("500"))
+                premium = ManagerTariff(name="Премиум", base_fee=Decimal("3000"), extra_per_device=Decimal("250"))
+                db.add_all([user, manager, basic, premium])
+                await db.commit()
+                client = await crud.ensure_manager_client(db, user.id)
+                url = f"/api/manager/clients/{client.id}"
+
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+                    # без тарифа -> Базовый (новая строка user_tariffs)
+                    applied = await http.post(f"{url}/tariff/apply", json={"device_count": 2, "tariff_id": str(basic.id)})
+                    assert applied.status_code == 200
+                    assert applied.json()["name"] == "Базовый" and applied.json()["base_fee"] == 1000
+                    assert applied.json()["total_extra_fee"] == 1000
+
+                    # Базовый -> Премиум (строка уже есть, связь загружена со старым тарифом)
+                    applied = await http.post(f"{url}/tariff/apply", json={"device_count": 2, "tariff_id": str(premium.id)})
+                    assert applied.status_code == 200
+                    body = applied.json()
+                    assert body["tariff_id"] == str(premium.id) and body["name"] == "Премиум"
+                    assert body["base_fee"] == 3000 and body["extra_per_device"] == 250
+
+                    detail = (await http.get(url)).json()
+                    assert detail["tariff"]["name"] == "Премиум"
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()
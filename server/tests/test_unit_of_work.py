@@ -0,0 +1,46 @@
+import pytest
+
+from app.core.database import save_changes, unit_of_work
+
+
+class _FakeSession:
+    def __init__(self):
+        self.info = {}
+        self.calls = []
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def flush(self):
+        self.calls.append("flush")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_flushes_inside_and_commits_once():
+    db = _FakeSession()
+    await save_changes(db)
+    assert db.calls == ["commit"]
+
+    db.calls.clear()
+    async with unit_of_work(db):
+        await save_changes(db)
+        async with unit_of_work(db):
+            await save_changes(db)
+    assert db.calls == ["flush", "flush", "commit"]
+    assert db.info == {}
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_rolls_back_on_error():
+    db = _FakeSession()
+    with pytest.raises(RuntimeError):
+        async with unit_of_work(db):
+            await save_changes(db)
+            raise RuntimeError("boom")
+    assert db.calls == ["flush", "rollback"]
+
+    await save_changes(db)
+    assert db.calls[-1] == "commit"
@@ -0,0 +1,71 @@
+"""Write helpers in crud persist without a follow-up SELECT (no refresh after commit).
+
+Needs a PostgreSQL database with the schema: set TEST_DATABASE_URL.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import os
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.manager_api import crud
+from app.manager_api.models import ManagerClientStatus, ManagerUser, SupportSender
+from app.models.users import User
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _kinds(statements: list[str]) -> list[str]:
+    # SELECT pg_notify(...) — событие для SSE-стрима списка клиентов, а не чтение
+    return [sql.lstrip().split(None, 1)[0].upper() for sql in statements if "pg_notify" not in sql]
+
+
+@pytest.mark.asyncio
+async def test_write_helpers_issue_no_selects():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                user = User(phone=f"+7{uuid.uuid4().int % 10**10:010d}", password_hash="x", name="Тест")
+                manager = ManagerUser(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+                db.add_all([user, manager])
+                await db.commit()
+                client = await crud.ensure_manager_client(db, user.id)
+                client = await crud.load_client(db, client.id)
+
+                statements.clear()
+                await crud.set_client_status(db, client=client, status=ManagerClientStatus.AWAITING_CONTRACT)
+                await crud.assign_manager(db, client=client, manager_id=manager.id)
+                contract = await crud.upsert_contract(db, client=client, data={
+                    "tariff_snapshot": {}, "passport_snapshot": {}, "device_snapshot": [], "contract_number": "AB-1",
+                })
+                await crud.upsert_contract(db, client=client, data={"otp_code": "1234"})
+                await crud.update_tariff(db, client=client, tariff=None, device_count=2, total_extra_fee=2000)
+                thread = await crud.ensure_support_thread(db, client=client, title="Тест")
+                message = await crud.add_support_message(
+                    db, thread=thread, sender=SupportSender.MANAGER, content="Привет"
+                )
+                assert "SELECT" not in _kinds(statements)
+
+                # серверные/клиентские значения уже на объектах, повторная загрузка не нужна
+                assert client.contract is contract and contract.otp_code == "1234"
+                assert client.support_thread is thread
+                assert client.tariff.device_count == 2
+                assert message.id and message.created_at and client.updated_at
+            finally:
+                await db.close()
+                await trans.rollback()
+    except OperationalError as exc:
+        pytest.skip(f"Database unavailable: {exc}")
+    finally:
+        await engine.dispose()